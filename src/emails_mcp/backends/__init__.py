@@ -1,5 +1,8 @@
 from .imap_backend import IMAPBackend
 from .smtp_backend import SMTPBackend
 from .file_backend import FileBackend
+from .imap_pool import IMAPConnectionPool
+from .smtp_pool import SMTPConnectionPool
+from .outbox_spool import OutboxSpool
 
-__all__ = ['IMAPBackend', 'SMTPBackend', 'FileBackend']
\ No newline at end of file
+__all__ = ['IMAPBackend', 'SMTPBackend', 'FileBackend', 'IMAPConnectionPool', 'SMTPConnectionPool', 'OutboxSpool']
\ No newline at end of file
@@ -0,0 +1,80 @@
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+from ..utils.exceptions import ValidationError
+
+# Compression applied to blobs that shrink enough to be worth it
+BLOB_COMPRESSIONS = [None, 'gzip']
+
+# Keep the compressed copy only if it saves at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+
+
+class BlobStore:
+    """Content-addressed store for attachment data
+
+    Each distinct content is written once, named by its SHA-256 digest and
+    sharded by the first two hex digits (``ab/abcd...``). Compressed blobs
+    carry a ``.gz`` suffix; reads accept either form, so stores written with
+    different settings can be mixed. Writes go through a temporary file and
+    an atomic rename, so concurrent exporters can share a store.
+    """
+
+    def __init__(self, root: Path, compression: Optional[str] = 'gzip'):
+        if compression not in BLOB_COMPRESSIONS:
+            raise ValidationError(f"Unsupported blob compression: {compression}")
+        self.root = Path(root)
+        self.compression = compression
+
+    def _candidates(self, digest: str):
+        shard = self.root / digest[:2]
+        return [shard / digest, shard / f"{digest}.gz"]
+
+    def path_for(self, digest: str) -> Optional[Path]:
+        """Path of a stored blob, or None if it is not in the store"""
+        for path in self._candidates(digest):
+            if path.exists():
+                return path
+        return None
+
+    def put(self, data: bytes) -> str:
+        """Store data unless already present and return its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.path_for(digest):
+            return digest
+
+        payload, target = data, self._candidates(digest)[0]
+        if self.compression == 'gzip':
+            compressed = gzip.compress(data, compresslevel=6, mtime=0)
+            if len(compressed) <= len(data) * (1 - MIN_COMPRESSION_SAVING):
+                payload, target = compressed, self._candidates(digest)[1]
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        """Read a blob's content, verifying it against its digest"""
+        path = self.path_for(digest)
+        if path is None:
+            raise ValidationError(f"Attachment blob {digest} not found in {self.root}")
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        if path.suffix == '.gz':
+            data = gzip.decompress(data)
+
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValidationError(f"Attachment blob {digest} is corrupt")
+        return data
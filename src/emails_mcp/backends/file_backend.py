@@ -1,16 +1,938 @@
+import gzip
+import io
 import json
+import lzma
+import mailbox
 import os
+import re
 import base64
+import sqlite3
+import struct
+import tarfile
+import tempfile
+import textwrap
+import zlib
 from pathlib import Path
-from typing import List
-from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
 from ..models.email import EmailMessage
 from ..utils.exceptions import ValidationError
 from ..utils.validators import validate_file_path
-from ..utils.email_parser import parse_raw_email
+from ..utils.email_parser import parse_raw_email, parse_email_message
+from .blob_store import BlobStore
 import logging
 from email import encoders
 
+# Version of the JSON Lines export layout written in the header line
+JSONL_FORMAT_VERSION = 1
+
+# Export formats that are written as a stream, one email at a time
+EXPORT_FORMATS = ['jsonl', 'jsonl.gz', 'jsonl.xz', 'json', 'eml', 'tar.gz', 'mbox', 'maildir', 'sqlite']
+
+# Formats whose writers can checkpoint and resume an interrupted export
+RESUMABLE_FORMATS = ['jsonl', 'jsonl.gz', 'jsonl.xz', 'json', 'sqlite']
+
+# Version of the SQLite archive schema, kept in its archive_info table
+SQLITE_SCHEMA_VERSION = 1
+
+_SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS archive_info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    email_id TEXT,
+    folder TEXT,
+    message_id TEXT,
+    subject TEXT,
+    from_addr TEXT,
+    to_addr TEXT,
+    cc_addr TEXT,
+    bcc_addr TEXT,
+    date TEXT,
+    date_utc TEXT,
+    internal_date TEXT,
+    flags TEXT,
+    is_read INTEGER NOT NULL DEFAULT 0,
+    is_important INTEGER NOT NULL DEFAULT 0,
+    body_text TEXT,
+    body_html TEXT,
+    size INTEGER,
+    raw BLOB
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    id INTEGER PRIMARY KEY,
+    message INTEGER NOT NULL REFERENCES messages(id) ON DELETE CASCADE,
+    filename TEXT,
+    content_type TEXT,
+    size INTEGER,
+    content BLOB
+);
+CREATE INDEX IF NOT EXISTS messages_date ON messages(date_utc);
+CREATE INDEX IF NOT EXISTS messages_from ON messages(from_addr);
+CREATE INDEX IF NOT EXISTS messages_message_id ON messages(message_id);
+CREATE INDEX IF NOT EXISTS messages_folder ON messages(folder, id);
+CREATE INDEX IF NOT EXISTS attachments_message ON attachments(message);
+'''
+
+# Maildir message keys: "<seconds>.M<microseconds>P<pid>Q<counter>.<host>"
+_MAILDIR_KEY = re.compile(r'^(\d+)\.M(\d+)P\d+Q(\d+)')
+_DIGITS = re.compile(r'(\d+)')
+
+# Compression level used when none is given (gzip 1-9, xz preset 0-9)
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Shared attachment blob directory, next to the export files
+BLOB_DIR_NAME = 'blobs'
+
+# Characters read at a time when scanning a JSON document incrementally
+JSON_SCAN_CHUNK_SIZE = 1 << 20
+
+# Checkpoints of an xz stream that end it; the ones in between are skipped,
+# since lzma cannot flush without ending the stream
+XZ_CHECKPOINT_INTERVAL = 20
+
+# Export checkpoints are kept next to the output as <prefix>.<format> + suffix
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+# Per-folder high-water marks of the last complete export, as <prefix> + suffix
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Flag changes found by an incremental export, as <export path> + suffix
+FLAG_CHANGES_SUFFIX = '.flags.jsonl'
+
+
+def _open_text_stream(path: Path, mode: str, compression: Optional[str] = None,
+                      level: int = DEFAULT_COMPRESSION_LEVEL):
+    """Open a text file, transparently (de)compressing gzip or xz"""
+    if compression == 'gz':
+        if 'w' in mode:
+            return gzip.open(path, mode + 't', compresslevel=level, encoding='utf-8')
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if compression == 'xz':
+        if 'w' in mode:
+            return lzma.open(path, mode + 't', preset=level, encoding='utf-8')
+        return lzma.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]):
+    """Replace a JSON file through a temporary file and an atomic rename"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_json_file(path: Path, description: str) -> Optional[Dict[str, Any]]:
+    """Read a JSON state file, or None if it is missing or unreadable"""
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable {description} {path}: {str(e)}")
+        return None
+
+
+class _JsonScanner:
+    """Incremental reader of a JSON document's top-level values
+    
+    Values are decoded with ``raw_decode`` from a buffer that holds only the
+    unread part of the file; a value cut off by the end of the buffer is
+    retried with a read at least as large as what is buffered, so even very
+    large values cost linear time.
+    """
+    
+    _decoder = json.JSONDecoder()
+    
+    def __init__(self, f):
+        self._file = f
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.keys: List[str] = []
+    
+    def _fill(self) -> bool:
+        chunk = self._file.read(max(JSON_SCAN_CHUNK_SIZE, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at the end of the file"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+    
+    def take(self, expected: str) -> str:
+        """Consume the next character, which must be one of ``expected``"""
+        char = self.peek()
+        if not char or char not in expected:
+            raise ValidationError(f"Invalid JSON: expected one of {expected!r}, found {char or 'end of file'!r}")
+        self._pos += 1
+        return char
+    
+    def value(self) -> Any:
+        """Decode the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number may continue past the end of the buffer
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if not self._fill() and not self._buffer[self._pos:].strip():
+                raise ValidationError("Invalid JSON: unexpected end of file")
+    
+    def iter_document(self) -> Iterator[tuple]:
+        """Yield (key, value) for a top-level object, and ('emails', record)
+        for each element of its "emails" array instead of the whole array"""
+        self.take('{')
+        if self.peek() == '}':
+            return
+        while True:
+            key = self.value()
+            self.keys.append(key)
+            self.take(':')
+            if key == 'emails' and self.peek() == '[':
+                self.take('[')
+                if self.peek() == ']':
+                    self.take(']')
+                else:
+                    while True:
+                        yield key, self.value()
+                        if self.take(',]') == ']':
+                            break
+            else:
+                yield key, self.value()
+            if self.take(',}') == '}':
+                return
+
+
+def parse_import_record(record: Dict[str, Any], blob_root: Optional[str] = None) -> EmailMessage:
+    """Turn a JSON or JSON Lines email record into an EmailMessage
+    
+    Takes plain, picklable arguments so records can be parsed in worker
+    processes; ``blob_root`` is the export's blob directory, if any.
+    """
+    return _record_to_email(record, BlobStore(Path(blob_root)) if blob_root else None)
+
+
+def parse_raw_import(source: Dict[str, Any]) -> EmailMessage:
+    """Parse one raw message yielded by FileBackend.iter_raw_imports
+    
+    ``source`` holds the message bytes ('data') or the path of an EML file
+    to read them from ('path'), plus its 'email_id' and 'folder'. Like
+    parse_import_record it is picklable, so files are read and parsed in
+    worker processes.
+    """
+    data = source.get('data')
+    if data is None:
+        with open(source['path'], 'rb') as f:
+            data = f.read()
+    email_obj = parse_raw_email(data, source['email_id'])
+    email_obj.raw_bytes = data
+    if source.get('folder'):
+        email_obj.folder = source['folder']
+    return email_obj
+
+
+def _natural_order(name: str):
+    """Sort key ordering names with numbers numerically (2.eml before 10.eml)"""
+    return [int(part) if index % 2 else part for index, part in enumerate(_DIGITS.split(name))]
+
+
+def _sqlite_row_to_email(row, attachments) -> EmailMessage:
+    """Build an EmailMessage from a SQLite archive row and its attachment rows"""
+    if row['raw'] is None:
+        # Same layout as a JSON record, so the MIME tree is rebuilt the same way
+        record = {key: row[key] for key in ('email_id', 'subject', 'from_addr', 'to_addr', 'cc_addr', 'bcc_addr',
+                                            'date', 'message_id', 'body_text', 'body_html', 'folder')}
+        record.update(is_read=bool(row['is_read']), is_important=bool(row['is_important']), attachments=[
+            {'filename': att['filename'], 'content_type': att['content_type'], 'size': att['size'],
+             'content': base64.b64encode(att['content']).decode('ascii') if att['content'] else None}
+            for att in attachments
+        ])
+        return _record_to_email(record)
+    
+    from ..models.email import EmailAttachment
+    
+    return EmailMessage(
+        email_id=row['email_id'],
+        subject=row['subject'],
+        from_addr=row['from_addr'],
+        to_addr=row['to_addr'],
+        cc_addr=row['cc_addr'],
+        bcc_addr=row['bcc_addr'],
+        date=row['date'],
+        message_id=row['message_id'],
+        body_text=row['body_text'],
+        body_html=row['body_html'],
+        is_read=bool(row['is_read']),
+        is_important=bool(row['is_important']),
+        folder=row['folder'],
+        attachments=[
+            EmailAttachment(filename=att['filename'], content_type=att['content_type'], size=att['size'])
+            for att in attachments
+        ],
+        raw_bytes=bytes(row['raw']),
+        internal_date=row['internal_date'],
+        flags=row['flags'].split() if row['flags'] is not None else None
+    )
+
+
+def _import_kind(path: Path) -> str:
+    """Classify an import path: jsonl, jsonl.gz, jsonl.xz, tar.gz, json, eml, mbox,
+    maildir, mbox_dir (a directory of .mbox files) or dir (a directory of .eml files)"""
+    name = path.name.lower()
+    if path.is_dir():
+        if (path / 'cur').is_dir() and (path / 'new').is_dir():
+            return 'maildir'
+        if next(path.rglob('*.mbox'), None) is not None:
+            return 'mbox_dir'
+        return 'dir'
+    for kind in ('jsonl.gz', 'jsonl.xz', 'tar.gz', 'jsonl', 'json', 'eml', 'mbox', 'sqlite'):
+        if name.endswith('.' + kind):
+            return kind
+    if name.endswith('.tgz'):
+        return 'tar.gz'
+    return path.suffix.lower()
+
+
+def _maildir_key_order(key: str):
+    """Sort key putting Maildir messages in delivery order"""
+    match = _MAILDIR_KEY.match(key)
+    if not match:
+        return (float('inf'), 0, 0, key)
+    return (int(match.group(1)), int(match.group(2)), int(match.group(3)), key)
+
+
+def _maildir_folder_name(folder: Optional[str]) -> Optional[str]:
+    """Maildir++ subfolder for a folder; None for INBOX, which is the Maildir root"""
+    if not folder or folder.upper() == 'INBOX':
+        return None
+    return folder.replace('/', '.').strip('.') or None
+
+
+def _apply_mailbox_flags(email_obj: EmailMessage, flags: str, seen_flag: str):
+    """Set read/important status from mbox (R, F) or Maildir (S, F) flags"""
+    email_obj.is_read = seen_flag in flags
+    email_obj.is_important = 'F' in flags
+
+
+def _utc_date(date_str: Optional[str]) -> Optional[str]:
+    """Date header as a sortable UTC ISO timestamp, or None if it cannot be parsed"""
+    if not date_str:
+        return None
+    try:
+        from email.utils import parsedate_to_datetime
+        parsed_date = parsedate_to_datetime(date_str)
+        if parsed_date.tzinfo is not None:
+            parsed_date = parsed_date.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed_date.isoformat()
+    except Exception:
+        return None
+
+
+def _archive_folder_name(folder: Optional[str]) -> str:
+    """Folder name as a safe relative directory inside a tar archive"""
+    parts = [part for part in (folder or 'INBOX').replace('\\', '/').split('/')
+             if part not in ('', '.', '..')]
+    return '/'.join(parts) or 'INBOX'
+
+
+def _attachment_record(att, blob_store: Optional[BlobStore], include_content: bool = True) -> Dict[str, Any]:
+    """Attachment entry of an email record: inline base64, a blob reference,
+    or metadata only when the raw message already carries the content"""
+    record = {
+        'filename': att.filename,
+        'content_type': att.content_type,
+        'size': att.size
+    }
+    if not include_content:
+        return record
+    if blob_store is not None and att.content:
+        record['sha256'] = blob_store.put(att.content)
+    else:
+        record['content'] = base64.b64encode(att.content).decode('utf-8') if att.content else None
+    return record
+
+
+def _email_to_record(email_obj: EmailMessage, blob_store: Optional[BlobStore] = None,
+                     include_raw: bool = False) -> Dict[str, Any]:
+    """Serializable record for one email, as stored in JSON and JSON Lines exports
+    
+    With a blob store, attachment content goes to the store and the record
+    only keeps its SHA-256 digest. With ``include_raw`` the record carries
+    the original message bytes (inline base64, or a blob reference), the
+    INTERNALDATE and the flags; attachment entries are then metadata only.
+    """
+    raw = include_raw and email_obj.raw_bytes is not None
+    record = {
+        'email_id': email_obj.email_id,
+        'subject': email_obj.subject,
+        'from_addr': email_obj.from_addr,
+        'to_addr': email_obj.to_addr,
+        'cc_addr': email_obj.cc_addr,
+        'bcc_addr': email_obj.bcc_addr,
+        'date': email_obj.date,
+        'message_id': email_obj.message_id,
+        'body_text': email_obj.body_text,
+        'body_html': email_obj.body_html,
+        'is_read': email_obj.is_read,
+        'is_important': email_obj.is_important,
+        'folder': email_obj.folder,
+        'attachments': [_attachment_record(att, blob_store, include_content=not raw)
+                        for att in email_obj.attachments]
+    }
+    
+    if raw:
+        if blob_store is not None:
+            record['raw_sha256'] = blob_store.put(email_obj.raw_bytes)
+        else:
+            record['raw'] = base64.b64encode(email_obj.raw_bytes).decode('ascii')
+        record['internal_date'] = email_obj.internal_date
+        record['flags'] = email_obj.flags
+    
+    return record
+
+
+def _raw_record_to_email(email_data: Dict[str, Any], blob_store: Optional[BlobStore]) -> EmailMessage:
+    """Build an EmailMessage around the stored raw bytes, without parsing or rebuilding MIME"""
+    from ..models.email import EmailAttachment
+    
+    if email_data.get('raw') is not None:
+        raw_bytes = base64.b64decode(email_data['raw'])
+    elif blob_store is None:
+        raise ValidationError("Email refers to a raw message blob but the export has no blob directory")
+    else:
+        raw_bytes = blob_store.read(email_data['raw_sha256'])
+    
+    return EmailMessage(
+        email_id=email_data['email_id'],
+        subject=email_data['subject'],
+        from_addr=email_data['from_addr'],
+        to_addr=email_data['to_addr'],
+        cc_addr=email_data.get('cc_addr'),
+        bcc_addr=email_data.get('bcc_addr'),
+        date=email_data.get('date'),
+        message_id=email_data.get('message_id'),
+        is_read=email_data.get('is_read', False),
+        is_important=email_data.get('is_important', False),
+        folder=email_data.get('folder'),
+        attachments=[
+            EmailAttachment(filename=att['filename'], content_type=att['content_type'], size=att['size'])
+            for att in email_data.get('attachments', [])
+        ],
+        raw_bytes=raw_bytes,
+        internal_date=email_data.get('internal_date'),
+        flags=email_data.get('flags')
+    )
+
+
+def _record_to_email(email_data: Dict[str, Any], blob_store: Optional[BlobStore] = None) -> EmailMessage:
+    """Build an EmailMessage from an exported email record
+    
+    Attachments stored as blobs are read from the blob store only while this
+    message's MIME tree is built; their EmailAttachment content stays empty.
+    Records with raw message bytes skip the rebuild entirely.
+    """
+    if email_data.get('raw') is not None or email_data.get('raw_sha256'):
+        return _raw_record_to_email(email_data, blob_store)
+    
+    from ..models.email import EmailAttachment
+
+    attachments = []
+    for att_data in email_data.get('attachments', []):
+        # 解码附件内容（如果存在）
+        content = None
+        if att_data.get('content') and not att_data.get('sha256'):
+            try:
+                content = base64.b64decode(att_data['content'])
+            except Exception as decode_error:  # 修正：给异常一个具体的变量名
+                # 如果解码失败，保持content为None
+                logging.debug(f"Failed to decode attachment content: {str(decode_error)}")
+                content = None
+
+        attachment = EmailAttachment(
+            filename=att_data['filename'],
+            content_type=att_data['content_type'],
+            size=att_data['size'],
+            content=content
+        )
+        attachments.append(attachment)
+
+
+
+    email_obj = EmailMessage(
+        email_id=email_data['email_id'],
+        subject=email_data['subject'],
+        from_addr=email_data['from_addr'],
+        to_addr=email_data['to_addr'],
+        cc_addr=email_data.get('cc_addr'),
+        bcc_addr=email_data.get('bcc_addr'),
+        date=email_data.get('date'),
+        message_id=email_data.get('message_id'),
+        body_text=email_data.get('body_text'),
+        body_html=email_data.get('body_html'),
+        is_read=email_data.get('is_read', False),
+        is_important=email_data.get('is_important', False),
+        folder=email_data.get('folder'),
+        attachments=attachments
+    )
+
+    # Only create raw_message if there are attachments (for attachment display support)
+    if email_data.get('attachments'):
+        # Create a minimal email.message.Message object for JSON imports to support attachment display
+        import email.message
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.base import MIMEBase
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['Subject'] = email_data['subject']
+        msg['From'] = email_data['from_addr']
+        msg['To'] = email_data['to_addr']
+        if email_data.get('cc_addr'):
+            msg['Cc'] = email_data['cc_addr']
+        if email_data.get('message_id'):
+            msg['Message-ID'] = email_data['message_id']
+        if email_data.get('date'):
+            msg['Date'] = email_data['date']
+
+        # Add text body if exists
+        if email_data.get('body_text'):
+            text_part = MIMEText(email_data['body_text'], 'plain', 'utf-8')
+            msg.attach(text_part)
+
+        # Add HTML body if exists
+        if email_data.get('body_html'):
+            html_part = MIMEText(email_data['body_html'], 'html', 'utf-8')
+            msg.attach(html_part)
+
+        # Add attachments to the message object
+        for att_data in email_data.get('attachments', []):
+            if att_data.get('sha256') and not att_data.get('content'):
+                if blob_store is None:
+                    raise ValidationError(f"Attachment {att_data['filename']} refers to a blob but the export has no blob directory")
+                att_data = dict(att_data, content=base64.b64encode(blob_store.read(att_data['sha256'])).decode('ascii'))
+            if att_data.get('content'):
+                content_type_parts = att_data['content_type'].split('/')
+                if len(content_type_parts) == 2:
+                    maintype, subtype = content_type_parts
+                else:
+                    maintype, subtype = 'application', 'octet-stream'
+
+                part = MIMEBase(maintype, subtype)
+
+                # 方法A：直接使用（推荐）
+                # 验证 base64 格式但不解码
+                try:
+                    # 只验证，不实际解码
+                    base64.b64decode(att_data['content'])
+                    # 如果验证通过，直接使用
+                    part.set_payload(att_data['content'])
+                    part['Content-Transfer-Encoding'] = 'base64'
+                except Exception as e:
+                    logging.warning(f"Invalid base64 content: {e}")
+                    # 设置空附件
+                    part.set_payload('')
+                    part['Content-Transfer-Encoding'] = 'base64'
+
+                # 处理文件名...
+                filename = att_data["filename"]
+                try:
+                    filename.encode('ascii')
+                    part.add_header('Content-Disposition', 'attachment',
+                                filename=filename)
+                except UnicodeEncodeError:
+                    part.add_header('Content-Disposition', 'attachment',
+                                filename=('utf-8', '', filename))
+
+                msg.attach(part)
+
+        email_obj.raw_message = msg
+    else:
+        # No attachments, no need for raw_message
+        email_obj.raw_message = None
+    
+    return email_obj
+
+
+class ExportWriter:
+    """Writes exported emails one at a time, so memory does not grow with the export
+
+    Use as a context manager; a format's closing data (such as the JSON
+    Lines footer) is only written when the block exits without an error, so
+    an interrupted export is recognizable as incomplete.
+    """
+    
+    # Whether checkpoint() and rewind() are supported
+    resumable = False
+    
+    def __init__(self, path: Path, blob_store: Optional[BlobStore] = None, include_raw: bool = False):
+        self.path = path
+        self.blob_store = blob_store
+        self.include_raw = include_raw
+        self.count = 0
+    
+    def write(self, email_obj: EmailMessage):
+        raise NotImplementedError
+    
+    def finish(self):
+        """Write closing data after the last email"""
+    
+    def close(self):
+        """Release files without writing closing data"""
+    
+    def checkpoint(self, force: bool = True) -> Optional[Dict[str, Any]]:
+        """Make everything written so far durable and return the position to resume from
+        
+        Args:
+            force: Always checkpoint; otherwise a writer whose checkpoints are
+                costly may skip this one and return None
+        """
+        raise ValidationError(f"{self.__class__.__name__} exports cannot be resumed")
+    
+    def rewind(self, position: Dict[str, Any]):
+        """Discard emails written after a checkpoint() position"""
+        raise ValidationError(f"{self.__class__.__name__} exports cannot be resumed")
+    
+    def __enter__(self) -> 'ExportWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.finish()
+        finally:
+            self.close()
+
+
+class StreamExportWriter(ExportWriter):
+    """Export writer over a single file stream, which can be resumed
+    
+    A checkpoint flushes the stream and records the file size, a valid place
+    to truncate to and carry on writing from. A gzip stream is sync-flushed,
+    so the member stays open and the checkpoint keeps its CRC and size;
+    resuming there ends the member with an empty final block and that
+    trailer, then starts a new one. lzma has no such flush, so an xz stream
+    is only ended (closed and reopened for appending) every
+    XZ_CHECKPOINT_INTERVAL unforced checkpoints.
+    """
+    
+    resumable = True
+    _skipped = 0
+    
+    def _open(self, mode: str):
+        raise NotImplementedError
+    
+    def _start(self, resume_from: Optional[Dict[str, Any]]) -> bool:
+        """Open the stream, fresh or at a checkpoint; True if it was opened fresh"""
+        if resume_from is None:
+            self._file = self._open('w')
+            return True
+        with open(self.path, 'r+b') as f:
+            f.truncate(resume_from['offset'])
+            if 'crc' in resume_from:
+                f.seek(0, os.SEEK_END)
+                f.write(b'\x03\x00' + struct.pack('<II', resume_from['crc'], resume_from['size'] & 0xffffffff))
+        self.count = resume_from['count']
+        self._file = self._open('a')
+        return False
+    
+    def checkpoint(self, force: bool = True) -> Optional[Dict[str, Any]]:
+        self._file.flush()
+        stream = self._file.buffer
+        if isinstance(stream, gzip.GzipFile):
+            stream.flush(zlib.Z_SYNC_FLUSH)
+            return {'offset': self.path.stat().st_size, 'count': self.count,
+                    'crc': stream.crc, 'size': stream.size}
+        if isinstance(stream, lzma.LZMAFile):
+            if not force and self._skipped + 1 < XZ_CHECKPOINT_INTERVAL:
+                self._skipped += 1
+                return None
+            self._skipped = 0
+            self._file.close()
+            self._file = self._open('a')
+        return {'offset': self.path.stat().st_size, 'count': self.count}
+    
+    def rewind(self, position: Dict[str, Any]):
+        self._file.close()
+        self._start(position)
+    
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesExportWriter(StreamExportWriter):
+    """JSON Lines export: a header line, one line per email, then a footer line"""
+    
+    def __init__(self, path: Path, header: Optional[Dict[str, Any]] = None,
+                 blob_store: Optional[BlobStore] = None, compression: Optional[str] = None,
+                 compression_level: int = DEFAULT_COMPRESSION_LEVEL, include_raw: bool = False,
+                 resume_from: Optional[Dict[str, Any]] = None):
+        super().__init__(path, blob_store, include_raw)
+        self.compression = compression
+        self.compression_level = compression_level
+        if not self._start(resume_from):
+            return
+        header_line = {
+            'type': 'export_header',
+            'format_version': JSONL_FORMAT_VERSION,
+            'export_date': datetime.now().isoformat(),
+            **(header or {})
+        }
+        if blob_store is not None:
+            header_line['blob_dir'] = os.path.relpath(blob_store.root, path.parent)
+        self._write_line(header_line)
+    
+    def _write_line(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+    
+    def write(self, email_obj: EmailMessage):
+        self._write_line({'type': 'email', **_email_to_record(email_obj, self.blob_store, self.include_raw)})
+        self.count += 1
+    
+    def _open(self, mode: str):
+        return _open_text_stream(self.path, mode, self.compression, self.compression_level)
+    
+    def finish(self):
+        self._write_line({'type': 'export_footer', 'total_emails': self.count})
+
+
+class JsonExportWriter(StreamExportWriter):
+    """Legacy single-document JSON export, written incrementally
+    
+    ``total_emails`` follows the email list because the count is only known
+    at the end; readers look keys up by name, so the order does not matter.
+    """
+    
+    def __init__(self, path: Path, blob_store: Optional[BlobStore] = None, include_raw: bool = False,
+                 resume_from: Optional[Dict[str, Any]] = None):
+        super().__init__(path, blob_store, include_raw)
+        if not self._start(resume_from):
+            return
+        self._file.write('{\n  "export_date": %s,\n' % json.dumps(datetime.now().isoformat()))
+        if blob_store is not None:
+            self._file.write('  "blob_dir": %s,\n' % json.dumps(os.path.relpath(blob_store.root, path.parent)))
+        self._file.write('  "emails": [')
+    
+    def write(self, email_obj: EmailMessage):
+        record = json.dumps(_email_to_record(email_obj, self.blob_store, self.include_raw),
+                            indent=2, ensure_ascii=False)
+        self._file.write(',\n' if self.count else '\n')
+        self._file.write(textwrap.indent(record, '    '))
+        self.count += 1
+    
+    def finish(self):
+        self._file.write('\n  ],\n  "total_emails": %d\n}\n' % self.count)
+    
+    def _open(self, mode: str):
+        return open(self.path, mode, encoding='utf-8')
+
+
+class TarExportWriter(ExportWriter):
+    """EML files in a gzip-compressed tar archive, one directory per folder
+    
+    Members are appended as they arrive, so the archive is written and read
+    as a stream.
+    """
+    
+    def __init__(self, path: Path, compression_level: int = DEFAULT_COMPRESSION_LEVEL):
+        super().__init__(path)
+        self._tar = tarfile.open(path, 'w:gz', compresslevel=compression_level)
+    
+    def write(self, email_obj: EmailMessage):
+        if email_obj.raw_bytes is None and not email_obj.raw_message:
+            return
+        data = email_obj.raw_bytes if email_obj.raw_bytes is not None else email_obj.raw_message.as_bytes()
+        self.count += 1
+        member = tarfile.TarInfo(
+            f"{_archive_folder_name(email_obj.folder)}/{self.count:06d}_{email_obj.email_id}.eml")
+        member.size = len(data)
+        member.mtime = int(datetime.now().timestamp())
+        self._tar.addfile(member, io.BytesIO(data))
+    
+    def close(self):
+        self._tar.close()
+
+
+class EmlExportWriter(ExportWriter):
+    """EML export: a directory with one .eml file per email"""
+    
+    def __init__(self, path: Path):
+        export_dir = path.parent / path.stem if path.suffix else path
+        super().__init__(export_dir)
+        export_dir.mkdir(parents=True, exist_ok=True)
+    
+    def write(self, email_obj: EmailMessage):
+        if email_obj.raw_bytes is None and not email_obj.raw_message:
+            return
+        self.count += 1
+        eml_file = self.path / f"{self.count:04d}_{email_obj.email_id}.eml"
+        with open(eml_file, 'wb') as f:
+            f.write(email_obj.raw_bytes if email_obj.raw_bytes is not None else email_obj.raw_message.as_bytes())
+
+
+class MboxExportWriter(ExportWriter):
+    """mbox export: a ``.mbox`` directory with one mbox file per folder (``Work/Projects.mbox``)
+    
+    Messages are appended to the folder's file as they arrive; read and
+    flagged status go in the standard Status/X-Status headers.
+    """
+    
+    def __init__(self, path: Path):
+        super().__init__(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self._folder = None
+        self._mbox: Optional[mailbox.mbox] = None
+    
+    def _mailbox_for(self, folder: Optional[str]) -> mailbox.mbox:
+        folder = _archive_folder_name(folder)
+        if folder != self._folder:
+            self.close()
+            mbox_file = self.path / f"{folder}.mbox"
+            mbox_file.parent.mkdir(parents=True, exist_ok=True)
+            self._mbox = mailbox.mbox(mbox_file, create=True)
+            self._folder = folder
+        return self._mbox
+    
+    def write(self, email_obj: EmailMessage):
+        if email_obj.raw_bytes is None and not email_obj.raw_message:
+            return
+        message = mailbox.mboxMessage(email_obj.raw_bytes if email_obj.raw_bytes is not None else email_obj.raw_message)
+        message.set_flags(('R' if email_obj.is_read else '') + ('F' if email_obj.is_important else ''))
+        self._mailbox_for(email_obj.folder).add(message)
+        self.count += 1
+    
+    def close(self):
+        if self._mbox is not None:
+            self._mbox.close()
+            self._mbox = None
+            self._folder = None
+
+
+class MaildirExportWriter(ExportWriter):
+    """Maildir export: a ``.maildir`` directory with INBOX in the root and other
+    folders as Maildir++ subfolders"""
+    
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._root = mailbox.Maildir(path, create=True)
+        self._folders: Dict[Optional[str], mailbox.Maildir] = {None: self._root}
+    
+    def _mailbox_for(self, folder: Optional[str]) -> mailbox.Maildir:
+        name = _maildir_folder_name(folder)
+        if name not in self._folders:
+            if name in self._root.list_folders():
+                self._folders[name] = self._root.get_folder(name)
+            else:
+                self._folders[name] = self._root.add_folder(name)
+        return self._folders[name]
+    
+    def write(self, email_obj: EmailMessage):
+        if email_obj.raw_bytes is None and not email_obj.raw_message:
+            return
+        message = mailbox.MaildirMessage(email_obj.raw_bytes if email_obj.raw_bytes is not None else email_obj.raw_message)
+        message.set_subdir('cur')
+        message.set_flags(('S' if email_obj.is_read else '') + ('F' if email_obj.is_important else ''))
+        self._mailbox_for(email_obj.folder).add(message)
+        self.count += 1
+
+
+class SqliteExportWriter(ExportWriter):
+    """SQLite archive: one row per message with its headers, flags and raw bytes
+    
+    Attachments get their own table (content only for messages without
+    raw bytes, which already contain it) and messages are indexed by date,
+    sender, Message-ID and folder, so an archive can be queried, added to
+    and partially restored without reading all of it. Rows are written in a
+    transaction that each checkpoint commits; resuming deletes the rows
+    after the checkpoint.
+    """
+    
+    resumable = True
+    
+    def __init__(self, path: Path, header: Optional[Dict[str, Any]] = None,
+                 resume_from: Optional[Dict[str, Any]] = None):
+        super().__init__(path)
+        if resume_from is None and path.exists():
+            path.unlink()
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA foreign_keys = ON')
+        self._db.executescript(_SQLITE_SCHEMA)
+        if resume_from is not None:
+            self.rewind(resume_from)
+            return
+        info = {
+            'schema_version': SQLITE_SCHEMA_VERSION,
+            'export_date': datetime.now().isoformat(),
+            **(header or {})
+        }
+        self._db.executemany('INSERT OR REPLACE INTO archive_info (key, value) VALUES (?, ?)',
+                             [(key, json.dumps(value, ensure_ascii=False)) for key, value in info.items()])
+        self._db.commit()
+    
+    def write(self, email_obj: EmailMessage):
+        raw = email_obj.raw_bytes
+        if raw is None and email_obj.raw_message:
+            raw = email_obj.raw_message.as_bytes()
+        cursor = self._db.execute(
+            'INSERT INTO messages (email_id, folder, message_id, subject, from_addr, to_addr, cc_addr, '
+            'bcc_addr, date, date_utc, internal_date, flags, is_read, is_important, body_text, body_html, '
+            'size, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (email_obj.email_id, email_obj.folder, email_obj.message_id, email_obj.subject,
+             email_obj.from_addr, email_obj.to_addr, email_obj.cc_addr, email_obj.bcc_addr,
+             email_obj.date, _utc_date(email_obj.date), email_obj.internal_date,
+             ' '.join(email_obj.flags) if email_obj.flags is not None else None,
+             int(bool(email_obj.is_read)), int(bool(email_obj.is_important)),
+             email_obj.body_text, email_obj.body_html, len(raw) if raw is not None else None, raw))
+        self._db.executemany(
+            'INSERT INTO attachments (message, filename, content_type, size, content) VALUES (?, ?, ?, ?, ?)',
+            [(cursor.lastrowid, att.filename, att.content_type, att.size, None if raw is not None else att.content)
+             for att in email_obj.attachments])
+        self.count += 1
+    
+    def checkpoint(self, force: bool = True) -> Optional[Dict[str, Any]]:
+        self._db.commit()
+        last_id = self._db.execute('SELECT COALESCE(MAX(id), 0) FROM messages').fetchone()[0]
+        return {'last_id': last_id, 'count': self.count}
+    
+    def rewind(self, position: Dict[str, Any]):
+        self._db.rollback()
+        self._db.execute('DELETE FROM messages WHERE id > ?', (position['last_id'],))
+        self._db.commit()
+        self.count = position['count']
+    
+    def finish(self):
+        self._db.execute("INSERT OR REPLACE INTO archive_info (key, value) VALUES ('total_emails', ?)",
+                         (json.dumps(self.count),))
+        self._db.commit()
+    
+    def close(self):
+        self._db.close()
+
 
 class FileBackend:
     """File backend for email import/export operations"""
@@ -22,53 +944,142 @@ class FileBackend:
     def export_emails(self, emails: List[EmailMessage], filename_prefix: str = "emails_export", 
                      format: str = 'json') -> str:
         """Export emails to file using configured export path with date-based filename"""
-        from datetime import datetime
-        
-        # Use configured export path or current directory
-        if self.email_export_path:
-            export_dir = self.email_export_path
-        else:
-            export_dir = Path.cwd()
-        
         try:
-            export_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Generate date-based filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{filename_prefix}_{timestamp}.{format.lower()}"
-            export_file = export_dir / filename
-            
-            if format.lower() == 'json':
-                self._export_to_json(emails, export_file)
-            elif format.lower() == 'eml':
-                self._export_to_eml(emails, export_file)
-            else:
-                raise ValidationError(f"Unsupported export format: {format}")
-            
-            return str(export_file)  # Return the actual file path
+            with self.open_export_writer(filename_prefix, format) as writer:
+                for email_obj in emails:
+                    writer.write(email_obj)
+            return str(writer.path)  # Return the actual file path
             
         except Exception as e:
             raise ValidationError(f"Export failed: {str(e)}")
     
+    def open_export_writer(self, filename_prefix: str = "emails_export", format: str = 'jsonl',
+                           header: Optional[Dict[str, Any]] = None, attachment_blobs: bool = False,
+                           blob_compression: Optional[str] = 'gzip',
+                           compression_level: Optional[int] = None,
+                           include_raw: bool = False,
+                           resume: Optional[Dict[str, Any]] = None) -> ExportWriter:
+        """Open a streaming export file in the configured export path
+        
+        The filename is date-based, unless ``resume`` (a checkpoint() position
+        plus the 'path' it belongs to) reopens an interrupted export of one
+        of the RESUMABLE_FORMATS, discarding anything written after it. ``header`` adds fields to the header line
+        of JSON Lines exports. With ``attachment_blobs``, JSON and JSON Lines
+        exports write each distinct attachment once to the shared ``blobs``
+        directory (optionally gzip-compressed) instead of inlining base64.
+        ``compression_level`` applies to jsonl.gz/tar.gz (1-9) and jsonl.xz (0-9).
+        ``include_raw`` stores the original message bytes, INTERNALDATE and
+        flags in JSON and JSON Lines records; the other formats always write
+        the original bytes when they are known, and SQLite archives the
+        INTERNALDATE and flags too.
+        """
+        format = format.lower()
+        if format not in EXPORT_FORMATS:
+            raise ValidationError(f"Unsupported export format: {format}")
+        if attachment_blobs and format in ('eml', 'tar.gz', 'mbox', 'maildir', 'sqlite'):
+            raise ValidationError("Attachment blobs are only supported for json and jsonl exports")
+        
+        if compression_level is None:
+            compression_level = DEFAULT_COMPRESSION_LEVEL
+        minimum_level = 0 if format == 'jsonl.xz' else 1
+        if not minimum_level <= compression_level <= 9:
+            raise ValidationError(f"Compression level must be between {minimum_level} and 9")
+        
+        if resume is not None and format not in RESUMABLE_FORMATS:
+            raise ValidationError(f"Exports in {format} format cannot be resumed")
+        
+        export_dir = self.export_directory()
+        
+        if resume is not None:
+            export_file = Path(resume['path'])
+        else:
+            # Generate date-based filename
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_file = export_dir / f"{filename_prefix}_{timestamp}.{format}"
+        
+        blob_store = BlobStore(export_dir / BLOB_DIR_NAME, blob_compression) if attachment_blobs else None
+        
+        if format.startswith('jsonl'):
+            compression = format.partition('.')[2] or None
+            return JsonLinesExportWriter(export_file, header, blob_store, compression, compression_level,
+                                         include_raw, resume)
+        if format == 'tar.gz':
+            return TarExportWriter(export_file, compression_level)
+        if format == 'mbox':
+            return MboxExportWriter(export_file)
+        if format == 'maildir':
+            return MaildirExportWriter(export_file)
+        if format == 'json':
+            return JsonExportWriter(export_file, blob_store, include_raw, resume)
+        if format == 'sqlite':
+            return SqliteExportWriter(export_file, header, resume)
+        return EmlExportWriter(export_file)
+    
+    def export_directory(self) -> Path:
+        """The configured export path (or the current directory), created if needed"""
+        export_dir = self.email_export_path if self.email_export_path else Path.cwd()
+        export_dir.mkdir(parents=True, exist_ok=True)
+        return export_dir
+    
+    def checkpoint_path(self, filename_prefix: str, format: str) -> Path:
+        """Where the checkpoint of an export with this prefix and format is kept"""
+        return self.export_directory() / f"{filename_prefix}.{format.lower()}{CHECKPOINT_SUFFIX}"
+    
+    def load_checkpoint(self, filename_prefix: str, format: str) -> Optional[Dict[str, Any]]:
+        """Read an export checkpoint, or None if there is none or it is unreadable"""
+        return _read_json_file(self.checkpoint_path(filename_prefix, format), "export checkpoint")
+    
+    def save_checkpoint(self, filename_prefix: str, format: str, checkpoint: Dict[str, Any]):
+        """Atomically replace an export checkpoint"""
+        _write_json_atomic(self.checkpoint_path(filename_prefix, format), checkpoint)
+    
+    def remove_checkpoint(self, filename_prefix: str, format: str):
+        """Delete an export checkpoint once the export is complete"""
+        path = self.checkpoint_path(filename_prefix, format)
+        if path.exists():
+            path.unlink()
+    
+    def manifest_path(self, filename_prefix: str) -> Path:
+        """Where the high-water marks of exports with this prefix are kept"""
+        return self.export_directory() / f"{filename_prefix}{MANIFEST_SUFFIX}"
+    
+    def load_manifest(self, filename_prefix: str) -> Optional[Dict[str, Any]]:
+        """Read the manifest of the last complete export with this prefix, if any"""
+        return _read_json_file(self.manifest_path(filename_prefix), "export manifest")
+    
+    def save_manifest(self, filename_prefix: str, manifest: Dict[str, Any]):
+        """Atomically replace the export manifest"""
+        _write_json_atomic(self.manifest_path(filename_prefix), manifest)
+    
+    def write_flag_changes(self, export_path: str, changes: List[Dict[str, Any]]) -> str:
+        """Write flag changes next to an export, one JSON line per message"""
+        path = Path(f"{export_path}{FLAG_CHANGES_SUFFIX}")
+        with open(path, 'w', encoding='utf-8') as f:
+            for change in changes:
+                f.write(json.dumps(change, ensure_ascii=False))
+                f.write('\n')
+        return str(path)
+    
     def import_emails(self, import_path: str) -> List[EmailMessage]:
         """Import emails from file with time-based sorting (newest first)"""
         
         # Validate import path
-        valid, error = validate_file_path(import_path, must_exist=True)
+        valid, error = validate_file_path(import_path, must_exist=True, allow_directory=True)
         if not valid:
             raise ValidationError(f"Invalid import path: {error}")
         
         try:
             import_file = Path(import_path)
             
+            kind = _import_kind(import_file)
+            
             emails = []
-            if import_file.suffix.lower() == '.json':
-                # logging.warning("Importing emails from JSON file")
-                emails = self._import_from_json(import_file)
-            elif import_file.suffix.lower() == '.eml':
+            if self.is_streamable(import_path):
+                emails = list(self._iter_streamable(import_file, kind))
+            elif kind == 'eml':
                 # logging.warning("Importing emails from EML file")
                 emails = self._import_from_eml(import_file)
-            elif import_file.is_dir():
+            elif kind == 'dir':
                 emails = self._import_from_directory(import_file)
             else:
                 raise ValidationError(f"Unsupported import format: {import_file.suffix}")
@@ -81,6 +1092,109 @@ class FileBackend:
         except Exception as e:
             raise ValidationError(f"Import failed: {str(e)}")
     
+    def is_streamable(self, import_path: str) -> bool:
+        """Whether iter_import_emails reads this file incrementally, in file order"""
+        return _import_kind(Path(import_path)) in (
+            'jsonl', 'jsonl.gz', 'jsonl.xz', 'json', 'tar.gz', 'mbox', 'mbox_dir', 'maildir', 'sqlite')
+    
+    def has_raw_imports(self, import_path: str) -> bool:
+        """Whether iter_raw_imports can read this path (EML files, directories and tar.gz archives)"""
+        return _import_kind(Path(import_path)) in ('eml', 'dir', 'tar.gz')
+    
+    def iter_raw_imports(self, import_path: str) -> Iterator[Dict[str, Any]]:
+        """Yield the unparsed messages of an EML file, EML directory or tar.gz archive
+        
+        Directory entries are yielded as paths in natural file name order and
+        archive members as bytes in archive order; parse_raw_import turns
+        them into emails, in this process or a worker process.
+        """
+        valid, error = validate_file_path(import_path, must_exist=True, allow_directory=True)
+        if not valid:
+            raise ValidationError(f"Invalid import path: {error}")
+        
+        import_file = Path(import_path)
+        kind = _import_kind(import_file)
+        if kind not in ('eml', 'dir', 'tar.gz'):
+            raise ValidationError(f"Not an EML file, directory or archive: {import_path}")
+        
+        try:
+            if kind == 'tar.gz':
+                yield from self._iter_tar_sources(import_file)
+            elif kind == 'dir':
+                for eml_file in self._eml_files(import_file):
+                    yield {'path': str(eml_file), 'email_id': eml_file.stem, 'folder': None}
+            else:
+                yield {'path': str(import_file), 'email_id': import_file.stem, 'folder': None}
+        except ValidationError:
+            raise
+        except Exception as e:
+            raise ValidationError(f"Import failed: {str(e)}")
+    
+    def has_import_records(self, import_path: str) -> bool:
+        """Whether iter_import_records can read this file (JSON and JSON Lines exports)"""
+        return _import_kind(Path(import_path)) in ('jsonl', 'jsonl.gz', 'jsonl.xz', 'json')
+    
+    def iter_import_records(self, import_path: str) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """Yield the unparsed email records of a JSON or JSON Lines export
+        
+        Each comes with the export's blob directory; parse_import_record
+        turns them into emails, in this process or a worker process. Records
+        are yielded in import order, as iter_import_emails would.
+        """
+        valid, error = validate_file_path(import_path, must_exist=True)
+        if not valid:
+            raise ValidationError(f"Invalid import path: {error}")
+        
+        import_file = Path(import_path)
+        kind = _import_kind(import_file)
+        if kind not in ('jsonl', 'jsonl.gz', 'jsonl.xz', 'json'):
+            raise ValidationError(f"Not a JSON or JSON Lines export: {import_path}")
+        
+        try:
+            if kind == 'json':
+                yield from self._iter_json_records(import_file)
+            else:
+                yield from self._iter_jsonl_records(import_file, kind.partition('.')[2] or None)
+        except ValidationError:
+            raise
+        except Exception as e:
+            raise ValidationError(f"Import failed: {str(e)}")
+    
+    def iter_import_emails(self, import_path: str, folder: Optional[str] = None) -> Iterator[EmailMessage]:
+        """Yield imported emails one at a time
+        
+        JSON Lines exports (plain, .gz or .xz), JSON exports, tar.gz EML
+        archives, mbox files (or directories of them), Maildirs and SQLite
+        archives are read one message at a time in file order (oldest first
+        per folder, as written), so memory stays flat however large the
+        archive is. Other formats are loaded and sorted by import_emails.
+        With ``folder``, only emails exported from that folder are yielded;
+        SQLite archives read just those rows.
+        """
+        valid, error = validate_file_path(import_path, must_exist=True, allow_directory=True)
+        if not valid:
+            raise ValidationError(f"Invalid import path: {error}")
+        
+        if not self.is_streamable(import_path):
+            for email_obj in self.import_emails(import_path):
+                if folder is None or email_obj.folder == folder:
+                    yield email_obj
+            return
+        
+        try:
+            import_file = Path(import_path)
+            kind = _import_kind(import_file)
+            if kind == 'sqlite':
+                yield from self._iter_from_sqlite(import_file, folder)
+                return
+            for email_obj in self._iter_streamable(import_file, kind):
+                if folder is None or email_obj.folder == folder:
+                    yield email_obj
+        except ValidationError:
+            raise
+        except Exception as e:
+            raise ValidationError(f"Import failed: {str(e)}")
+    
     def _parse_email_date(self, date_str: str) -> datetime:
         """Parse email date string to datetime object for sorting"""
         if not date_str:
@@ -101,206 +1215,174 @@ class FileBackend:
             # Fallback to current time if parsing fails (make it naive)
             return datetime.now().replace(tzinfo=None)
     
-    def _export_to_json(self, emails: List[EmailMessage], export_file: Path):
-        """Export emails to JSON format"""
-        export_data = {
-            'export_date': datetime.now().isoformat(),
-            'total_emails': len(emails),
-            'emails': []
-        }
-        
-        for email_obj in emails:
-            email_data = {
-                'email_id': email_obj.email_id,
-                'subject': email_obj.subject,
-                'from_addr': email_obj.from_addr,
-                'to_addr': email_obj.to_addr,
-                'cc_addr': email_obj.cc_addr,
-                'bcc_addr': email_obj.bcc_addr,
-                'date': email_obj.date,
-                'message_id': email_obj.message_id,
-                'body_text': email_obj.body_text,
-                'body_html': email_obj.body_html,
-                'is_read': email_obj.is_read,
-                'is_important': email_obj.is_important,
-                'folder': email_obj.folder,
-                'attachments': [
-                    {
-                        'filename': att.filename,
-                        'content_type': att.content_type,
-                        'size': att.size,
-                        'content': base64.b64encode(att.content).decode('utf-8') if att.content else None
-                    }
-                    for att in email_obj.attachments
-                ]
-            }
-            export_data['emails'].append(email_data)
-        
-        with open(export_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
-    
-    def _export_to_eml(self, emails: List[EmailMessage], export_path: Path):
-        """Export emails to EML format (directory of .eml files)"""
-        export_dir = export_path
-        if export_path.suffix:
-            export_dir = export_path.parent / export_path.stem
-        
-        export_dir.mkdir(parents=True, exist_ok=True)
-        
-        for i, email_obj in enumerate(emails):
-            if email_obj.raw_message:
-                filename = f"{i+1:04d}_{email_obj.email_id}.eml"
-                eml_file = export_dir / filename
-                
-                with open(eml_file, 'wb') as f:
-                    f.write(email_obj.raw_message.as_bytes())
+    def _iter_streamable(self, import_file: Path, kind: str) -> Iterator[EmailMessage]:
+        """Stream emails from a JSON Lines or JSON file, tar.gz archive, mbox, Maildir or SQLite archive"""
+        if kind == 'sqlite':
+            return self._iter_from_sqlite(import_file)
+        if kind == 'tar.gz':
+            return self._iter_from_tar(import_file)
+        if kind == 'mbox':
+            return self._iter_from_mbox(import_file, None)
+        if kind == 'mbox_dir':
+            return self._iter_from_mbox_dir(import_file)
+        if kind == 'maildir':
+            return self._iter_from_maildir(import_file)
+        if kind == 'json':
+            return self._iter_from_json(import_file)
+        return self._iter_from_jsonl(import_file, kind.partition('.')[2] or None)
     
-    def _import_from_json(self, import_file: Path) -> List[EmailMessage]:
-        """Import emails from JSON format"""
-        with open(import_file, 'r', encoding='utf-8') as f:
-            import_data = json.load(f)
-        
-        if 'emails' not in import_data:
-            raise ValidationError("Invalid JSON format: missing 'emails' key")
+    def _iter_from_tar(self, import_file: Path) -> Iterator[EmailMessage]:
+        """Read EML members of a tar.gz archive in archive order; directories name folders"""
+        for source in self._iter_tar_sources(import_file):
+            try:
+                yield parse_raw_import(source)
+            except Exception as e:
+                logging.warning(f"Failed to import {source['name']}: {str(e)}")
+    
+    def _iter_tar_sources(self, import_file: Path) -> Iterator[Dict[str, Any]]:
+        """EML members of a tar.gz archive as parse_raw_import sources, in archive order"""
+        with tarfile.open(import_file, 'r|gz') as tar:
+            for member in tar:
+                if not member.isfile() or not member.name.lower().endswith('.eml'):
+                    continue
+                member_path = Path(member.name)
+                yield {
+                    'data': tar.extractfile(member).read(),
+                    'email_id': member_path.stem,
+                    'folder': member_path.parent.as_posix() if member_path.parent.name else None,
+                    'name': member.name
+                }
+    
+    def _iter_from_mbox(self, mbox_file: Path, folder: Optional[str]) -> Iterator[EmailMessage]:
+        """Read an mbox file in file order, parsing one message at a time"""
+        mbox = mailbox.mbox(mbox_file, create=False)
+        try:
+            for index, key in enumerate(mbox.iterkeys(), 1):
+                try:
+                    message = mbox.get_message(key)
+                    email_obj = parse_email_message(message, str(index))
+                except Exception as e:
+                    logging.warning(f"Failed to import message {index} of {mbox_file}: {str(e)}")
+                    continue
+                _apply_mailbox_flags(email_obj, message.get_flags(), 'R')
+                email_obj.folder = folder
+                yield email_obj
+        finally:
+            mbox.close()
+    
+    def _iter_from_mbox_dir(self, import_dir: Path) -> Iterator[EmailMessage]:
+        """Read a directory of mbox files; each file's relative path names its folder"""
+        for mbox_file in sorted(import_dir.rglob('*.mbox')):
+            folder = mbox_file.relative_to(import_dir).with_suffix('').as_posix()
+            yield from self._iter_from_mbox(mbox_file, folder)
+    
+    def _iter_from_maildir(self, import_dir: Path) -> Iterator[EmailMessage]:
+        """Read a Maildir (root as INBOX, Maildir++ subfolders by name) in delivery order"""
+        root = mailbox.Maildir(import_dir, factory=None, create=False)
+        folders = [('INBOX', root)] + [(name, root.get_folder(name)) for name in sorted(root.list_folders())]
         
-        emails = []
-        for email_data in import_data['emails']:
+        for folder, maildir in folders:
+            for index, key in enumerate(sorted(maildir.iterkeys(), key=_maildir_key_order), 1):
+                try:
+                    message = maildir.get_message(key)
+                    email_obj = parse_email_message(message, str(index))
+                except Exception as e:
+                    logging.warning(f"Failed to import Maildir message {key}: {str(e)}")
+                    continue
+                _apply_mailbox_flags(email_obj, message.get_flags(), 'S')
+                email_obj.folder = folder
+                yield email_obj
+    
+    def _iter_from_sqlite(self, import_file: Path, folder: Optional[str] = None) -> Iterator[EmailMessage]:
+        """Read a SQLite archive in export order, optionally only one folder's rows"""
+        db = sqlite3.connect(import_file.resolve().as_uri() + '?mode=ro', uri=True)
+        db.row_factory = sqlite3.Row
+        try:
+            info = dict(db.execute('SELECT key, value FROM archive_info').fetchall())
+            schema_version = json.loads(info.get('schema_version', '1'))
+            if schema_version > SQLITE_SCHEMA_VERSION:
+                raise ValidationError(f"SQLite archive schema version {schema_version} is newer than supported")
+            
+            if folder is None:
+                rows = db.execute('SELECT * FROM messages ORDER BY id')
+            else:
+                rows = db.execute('SELECT * FROM messages WHERE folder = ? ORDER BY id', (folder,))
+            for row in rows:
+                attachments = db.execute(
+                    'SELECT filename, content_type, size, content FROM attachments WHERE message = ? ORDER BY id',
+                    (row['id'],)).fetchall()
+                yield _sqlite_row_to_email(row, attachments)
+        except sqlite3.DatabaseError as e:
+            raise ValidationError(f"Invalid SQLite archive: {str(e)}")
+        finally:
+            db.close()
+    
+    def _iter_from_jsonl(self, import_file: Path, compression: Optional[str] = None) -> Iterator[EmailMessage]:
+        """Read a JSON Lines export one record at a time"""
+        for number, (record, blob_root) in enumerate(self._iter_jsonl_records(import_file, compression), 1):
             try:
-                # Create EmailMessage from JSON data
-                from ..models.email import EmailAttachment
-                
-                attachments = []
-                for att_data in email_data.get('attachments', []):
-                    # 解码附件内容（如果存在）
-                    content = None
-                    if att_data.get('content'):
-                        try:
-                            content = base64.b64decode(att_data['content'])
-                        except Exception as decode_error:  # 修正：给异常一个具体的变量名
-                            # 如果解码失败，保持content为None
-                            logging.debug(f"Failed to decode attachment content: {str(decode_error)}")
-                            content = None
-                    
-                    attachment = EmailAttachment(
-                        filename=att_data['filename'],
-                        content_type=att_data['content_type'],
-                        size=att_data['size'],
-                        content=content
-                    )
-                    attachments.append(attachment)
-                
-
-
-                email_obj = EmailMessage(
-                    email_id=email_data['email_id'],
-                    subject=email_data['subject'],
-                    from_addr=email_data['from_addr'],
-                    to_addr=email_data['to_addr'],
-                    cc_addr=email_data.get('cc_addr'),
-                    bcc_addr=email_data.get('bcc_addr'),
-                    date=email_data.get('date'),
-                    message_id=email_data.get('message_id'),
-                    body_text=email_data.get('body_text'),
-                    body_html=email_data.get('body_html'),
-                    is_read=email_data.get('is_read', False),
-                    is_important=email_data.get('is_important', False),
-                    folder=email_data.get('folder'),
-                    attachments=attachments
-                )
-                
-                # Only create raw_message if there are attachments (for attachment display support)
-                if email_data.get('attachments'):
-                    # Create a minimal email.message.Message object for JSON imports to support attachment display
-                    import email.message
-                    from email.mime.multipart import MIMEMultipart
-                    from email.mime.base import MIMEBase
-                    from email.mime.text import MIMEText
-                    
-                    msg = MIMEMultipart()
-                    msg['Subject'] = email_data['subject']
-                    msg['From'] = email_data['from_addr']
-                    msg['To'] = email_data['to_addr']
-                    if email_data.get('cc_addr'):
-                        msg['Cc'] = email_data['cc_addr']
-                    if email_data.get('message_id'):
-                        msg['Message-ID'] = email_data['message_id']
-                    if email_data.get('date'):
-                        msg['Date'] = email_data['date']
-                    
-                    # Add text body if exists
-                    if email_data.get('body_text'):
-                        text_part = MIMEText(email_data['body_text'], 'plain', 'utf-8')
-                        msg.attach(text_part)
-                    
-                    # Add HTML body if exists
-                    if email_data.get('body_html'):
-                        html_part = MIMEText(email_data['body_html'], 'html', 'utf-8')
-                        msg.attach(html_part)
-                    
-                    # Add attachments to the message object
-                    for att_data in email_data.get('attachments', []):
-                        if att_data.get('content'):
-                            content_type_parts = att_data['content_type'].split('/')
-                            if len(content_type_parts) == 2:
-                                maintype, subtype = content_type_parts
-                            else:
-                                maintype, subtype = 'application', 'octet-stream'
-                            
-                            part = MIMEBase(maintype, subtype)
-                            
-                            # 方法A：直接使用（推荐）
-                            # 验证 base64 格式但不解码
-                            try:
-                                # 只验证，不实际解码
-                                base64.b64decode(att_data['content'])
-                                # 如果验证通过，直接使用
-                                part.set_payload(att_data['content'])
-                                part['Content-Transfer-Encoding'] = 'base64'
-                            except Exception as e:
-                                logging.warning(f"Invalid base64 content: {e}")
-                                # 设置空附件
-                                part.set_payload('')
-                                part['Content-Transfer-Encoding'] = 'base64'
-                            
-                            # 处理文件名...
-                            filename = att_data["filename"]
-                            try:
-                                filename.encode('ascii')
-                                part.add_header('Content-Disposition', 'attachment',
-                                            filename=filename)
-                            except UnicodeEncodeError:
-                                part.add_header('Content-Disposition', 'attachment',
-                                            filename=('utf-8', '', filename))
-                            
-                            msg.attach(part)
-                    
-                    email_obj.raw_message = msg
-                else:
-                    # No attachments, no need for raw_message
-                    email_obj.raw_message = None
-                
-                emails.append(email_obj)
-                
+                yield parse_import_record(record, blob_root)
+            except KeyError as e:
+                raise ValidationError(f"Missing required field in email record {number}: {str(e)}")
+    
+    def _iter_jsonl_records(self, import_file: Path,
+                            compression: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """Email records of a JSON Lines export, with the blob directory they refer to"""
+        blob_root = None
+        with _open_text_stream(import_file, 'r', compression) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                record_type = record.get('type')
+                if record_type == 'export_header':
+                    if record.get('format_version', 1) > JSONL_FORMAT_VERSION:
+                        raise ValidationError(
+                            f"Export format version {record['format_version']} is newer than supported")
+                    if record.get('blob_dir'):
+                        blob_root = str(import_file.parent / record['blob_dir'])
+                    continue
+                if record_type == 'email':
+                    yield record, blob_root
+    
+    def _iter_from_json(self, import_file: Path) -> Iterator[EmailMessage]:
+        """Read a JSON export one email record at a time"""
+        for record, blob_root in self._iter_json_records(import_file):
+            try:
+                yield parse_import_record(record, blob_root)
             except KeyError as e:
                 raise ValidationError(f"Missing required field in JSON: {str(e)}")
+    
+    def _iter_json_records(self, import_file: Path) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """Email records of a JSON export, with the blob directory they refer to
         
-        # Sort emails by email_id in descending order
-        emails.sort(key=lambda email_obj: int(email_obj.email_id) if email_obj.email_id.isdigit() else 0, reverse=True)
+        Streaming exports write ``total_emails`` after the email list, oldest
+        first per folder, so records are yielded in file order. Exports from
+        before streaming wrote it first and listed emails newest first; those
+        are loaded and sorted by email ID as they always were.
+        """
+        blob_root = None
+        legacy_records = []
+        with open(import_file, 'r', encoding='utf-8') as f:
+            scanner = _JsonScanner(f)
+            for key, value in scanner.iter_document():
+                if key == 'blob_dir' and value:
+                    blob_root = str(import_file.parent / value)
+                elif key == 'emails':
+                    if 'total_emails' in scanner.keys:
+                        legacy_records.append(value)
+                    else:
+                        yield value, blob_root
         
-        # import pickle
-        # os.makedirs("./json", exist_ok=True)
-        # with open("./json/all.pkl", "wb") as f:
-        #     pickle.dump(emails, f)
-
-        return emails
+        if 'emails' not in scanner.keys:
+            raise ValidationError("Invalid JSON format: missing 'emails' key")
+        legacy_records.sort(key=lambda record: int(record['email_id']) if str(record.get('email_id', '')).isdigit() else 0)
+        for record in legacy_records:
+            yield record, blob_root
     
     def _import_from_eml(self, import_file: Path) -> List[EmailMessage]:
         """Import single email from EML format"""
-        with open(import_file, 'rb') as f:
-            raw_email = f.read()
-        
-        email_id = import_file.stem
-        email_obj = parse_raw_email(raw_email, email_id)
+        email_obj = parse_raw_import({'path': str(import_file), 'email_id': import_file.stem})
         # import pickle
         # os.makedirs("./eml", exist_ok=True)
         # with open("./eml/all.pkl", "wb") as f:
@@ -311,7 +1393,7 @@ class FileBackend:
         """Import multiple emails from directory of EML files"""
         emails = []
         
-        for eml_file in import_dir.glob('*.eml'):
+        for eml_file in self._eml_files(import_dir):
             try:
                 imported_emails = self._import_from_eml(eml_file)
                 emails.extend(imported_emails)
@@ -322,6 +1404,10 @@ class FileBackend:
         
         return emails
     
+    def _eml_files(self, import_dir: Path) -> List[Path]:
+        """EML files of a directory in natural file name order"""
+        return sorted(import_dir.glob('*.eml'), key=lambda eml_file: _natural_order(eml_file.name))
+    
     def save_attachment(self, attachment_data: bytes, filename: str) -> str:
         """Save attachment data to file using configured download path"""
         
@@ -1,13 +1,232 @@
+import functools
 import imaplib
 import logging
-from typing import List, Optional, Tuple
-from datetime import datetime
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from datetime import datetime, timedelta
 from ..models.config import EmailConfig
 from ..models.email import EmailFolder, EmailMessage
 from ..utils.exceptions import ConnectionError, AuthenticationError, FolderError
 from ..utils.email_parser import parse_raw_email
+from ..utils.search_query import (
+    SearchQuery, compile_search_query,
+    SEARCH_MODE_UTF8, SEARCH_MODE_CHARSET, SEARCH_MODE_LITERAL
+)
+from ..config.settings import config_manager
 from ..utils.encode_decode import encode_to_imap_utf7, decode_from_imap_utf7
 
+# Cached capabilities older than this are re-queried instead of trusted
+CAPABILITY_MAX_AGE = timedelta(days=7)
+
+# Skip the liveness NOOP when the connection was used this recently (seconds)
+NOOP_INTERVAL = 60
+
+# RFC 6154 special-use attributes recorded in the server profile
+SPECIAL_USE_ATTRIBUTES = ['\\All', '\\Archive', '\\Drafts', '\\Flagged', '\\Junk', '\\Sent', '\\Trash']
+
+_SPECIAL_USE_BY_LOWER = {attribute.lower(): attribute for attribute in SPECIAL_USE_ATTRIBUTES}
+
+# Attributes of Gmail's XLIST, the predecessor of SPECIAL-USE, that were renamed in RFC 6154
+_SPECIAL_USE_BY_LOWER.update({'\\spam': '\\Junk', '\\allmail': '\\All', '\\starred': '\\Flagged'})
+
+# Conventional folder names for each role, used on servers that flag none
+SPECIAL_USE_NAMES = {
+    '\\Sent': ['Sent', 'Sent Messages', 'Sent Items', 'Sent Mail'],
+    '\\Drafts': ['Drafts'],
+    '\\Trash': ['Trash', 'Deleted Items', 'Deleted Messages'],
+    '\\Junk': ['Junk', 'Spam', 'Junk E-mail', 'Junk Email'],
+    '\\Archive': ['Archive', 'Archives']
+}
+
+_ROLE_BY_FOLDER_NAME = {name.lower(): role for role, names in SPECIAL_USE_NAMES.items() for name in names}
+
+# imaplib only sends commands it knows about
+imaplib.Commands.setdefault('XLIST', ('AUTH', 'SELECTED'))
+
+# Search ID lists remembered per connection, keyed by (folder, query)
+SEARCH_CACHE_SIZE = 32
+
+# Unsolicited responses that report a change to the selected mailbox
+_CHANGE_RESPONSES = ('EXISTS', 'EXPUNGE', 'FETCH', 'VANISHED', 'RECENT')
+
+_FETCH_SEQUENCE = re.compile(rb'^(\d+) \(')
+_FETCH_FLAGS = re.compile(rb'FLAGS \(([^)]*)\)')
+_FETCH_INTERNALDATE = re.compile(r'INTERNALDATE "([^"]+)"')
+_FETCH_UID = re.compile(rb'UID (\d+)')
+_FETCH_SIZE = re.compile(rb'RFC822\.SIZE (\d+)')
+_MESSAGE_ID_HEADER = re.compile(rb'^Message-ID:[ \t]*(.*?)[ \t\r]*$', re.IGNORECASE | re.MULTILINE)
+
+# Messages per FETCH when reading a whole folder's headers
+HEADER_FETCH_BATCH = 5000
+
+_CAPABILITY_CODE = re.compile(rb'\[CAPABILITY ([^\]]*)\]', re.IGNORECASE)
+_LIST_RESPONSE = re.compile(r'^\(([^)]*)\)\s+(NIL|"((?:[^"\\]|\\.)*)")\s+(.*)$', re.IGNORECASE)
+
+
+def parse_capability_code(data) -> List[str]:
+    """Extract capabilities from a [CAPABILITY ...] response code, if present"""
+    for item in data or []:
+        if isinstance(item, bytes):
+            match = _CAPABILITY_CODE.search(item)
+            if match:
+                return match.group(1).decode('ascii', errors='ignore').upper().split()
+    return []
+
+
+def format_sequence_set(ids: List[str]) -> str:
+    """Compact message numbers into an IMAP sequence set, e.g. 1:3,7"""
+    numbers = sorted({int(i) for i in ids})
+    ranges = []
+    for number in numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ','.join(f"{a}:{b}" if a != b else str(a) for a, b in ranges)
+
+
+def iter_fetch_response(data) -> List[Tuple[str, bytes, Optional[bytes]]]:
+    """Group a FETCH response into (message number, metadata, literal) per message
+
+    imaplib returns literals as (metadata, bytes) tuples and splits whatever
+    follows a literal into separate bytes items; those are folded back into
+    the metadata of the message they belong to.
+    """
+    items = []
+    for item in data or []:
+        if isinstance(item, tuple) and len(item) == 2:
+            meta, literal = item[0], item[1]
+        elif isinstance(item, bytes):
+            meta, literal = item, None
+        else:
+            continue
+        match = _FETCH_SEQUENCE.match(meta)
+        if match:
+            items.append([match.group(1).decode(), meta, literal])
+        elif items:
+            items[-1][1] += b' ' + meta
+            if literal is not None and items[-1][2] is None:
+                items[-1][2] = literal
+    return [tuple(item) for item in items]
+
+
+def parse_fetch_flags(meta: bytes) -> List[str]:
+    """Extract the FLAGS list from FETCH metadata"""
+    match = _FETCH_FLAGS.search(meta)
+    if not match:
+        return []
+    return match.group(1).decode('utf-8', errors='replace').split()
+
+
+def special_use_role_for_name(name: str, delimiter: Optional[str] = None) -> Optional[str]:
+    """Role a folder name conventionally stands for, e.g. 'INBOX.Sent' -> '\\Sent'
+    
+    Only top-level names and direct children of INBOX count; nested user
+    folders such as 'Clients/Archive' have no role. Without a known
+    hierarchy delimiter, both '.' and '/' are treated as one.
+    """
+    parts = name.split(delimiter) if delimiter else re.split(r'[./]', name)
+    if len(parts) == 2 and parts[0].upper() == 'INBOX':
+        leaf = parts[1]
+    elif len(parts) == 1:
+        leaf = name
+    else:
+        return None
+    return _ROLE_BY_FOLDER_NAME.get(leaf.lower())
+
+
+def parse_fetch_uid(meta: bytes) -> Optional[int]:
+    """Extract the UID from FETCH metadata"""
+    match = _FETCH_UID.search(meta)
+    return int(match.group(1)) if match else None
+
+
+def parse_internaldate(meta: bytes) -> float:
+    """Extract INTERNALDATE from FETCH metadata as a timestamp (0 if missing)"""
+    time_tuple = imaplib.Internaldate2tuple(meta)
+    return time.mktime(time_tuple) if time_tuple else 0.0
+
+
+class _ProfiledIMAP4Mixin:
+    """Take pre-login capabilities from the greeting or server profile
+
+    imaplib always sends CAPABILITY right after the greeting. Most servers
+    already announce their capabilities in the greeting, and the server
+    profile remembers them otherwise, so that round trip can be skipped.
+    """
+
+    def _get_capabilities(self):
+        if 'CAPABILITY' in self.untagged_responses:
+            data = self.untagged_responses.pop('CAPABILITY')[-1]
+            self.capabilities = tuple(str(data, self._encoding).upper().split())
+        elif self.known_capabilities:
+            self.capabilities = tuple(self.known_capabilities)
+        else:
+            super()._get_capabilities()
+
+    def _command_complete(self, name, tag):
+        result = super()._command_complete(name, tag)
+        # The server answered, so the connection was alive at this point
+        self.last_response = datetime.now()
+        return result
+
+
+class ProfiledIMAP4(_ProfiledIMAP4Mixin, imaplib.IMAP4):
+    def __init__(self, host: str, port: int, known_capabilities: Tuple[str, ...] = ()):
+        self.known_capabilities = tuple(known_capabilities)
+        super().__init__(host, port)
+
+
+class ProfiledIMAP4_SSL(_ProfiledIMAP4Mixin, imaplib.IMAP4_SSL):
+    def __init__(self, host: str, port: int, known_capabilities: Tuple[str, ...] = ()):
+        self.known_capabilities = tuple(known_capabilities)
+        super().__init__(host, port)
+
+
+def _is_connection_lost(error: BaseException) -> bool:
+    """Whether an error (or one it was raised from) means the server dropped the connection"""
+    chain = []
+    while error is not None and len(chain) < 10:
+        chain.append(error)
+        error = error.__cause__ or error.__context__
+    if any(isinstance(e, TimeoutError) for e in chain):
+        # A command that outlived a socket timeout; the caller chose to give up
+        return False
+    return any(isinstance(e, (imaplib.IMAP4.abort, OSError)) for e in chain)
+
+
+def _reconnecting(method):
+    """Reconnect once and retry when the connection turns out to be dead mid-call
+
+    Only for commands that are safe to repeat; APPEND, COPY and MOVE could
+    be applied twice and are left to fail instead.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._retry_scope:
+            return method(self, *args, **kwargs)
+        self._retry_scope = True
+        try:
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                if not _is_connection_lost(e):
+                    raise
+                logging.warning(f"IMAP connection lost ({str(e)}), reconnecting")
+            folder = self.current_folder
+            self.drop()
+            self.connect()
+            if folder:
+                # Sequence numbers refer to the folder that was selected
+                self._select_state(folder)
+            return method(self, *args, **kwargs)
+        finally:
+            self._retry_scope = False
+    return wrapper
+
+
 class IMAPBackend:
     """IMAP backend for email operations"""
     
@@ -15,30 +234,63 @@ class IMAPBackend:
         self.config = config
         self.connection: Optional[imaplib.IMAP4_SSL] = None
         self.current_folder: Optional[str] = None
-        self.last_accessed = datetime.now()
         self.utf8_enabled = False
+        self.capabilities: List[str] = []
+        # Search form known to work for non-ASCII queries (learned, then persisted per server)
+        self.search_mode: Optional[str] = None
+        # Server profile (capabilities, delimiter, special-use map, namespace, quirks)
+        self.profile: Dict = {}
+        self._capabilities_from_profile = False
+        # Special-use role -> folder, discovered once per session
+        self._special_folders: Optional[Dict[str, str]] = None
+        # (folder, query key) -> (mailbox state, email IDs), least recently used first
+        self._search_cache: "OrderedDict[Tuple[str, str], Tuple[Tuple, List[str]]]" = OrderedDict()
+        # Change state of the selected folder as of its last SELECT (see _select_state)
+        self._selected_state: Optional[Tuple] = None
+        # Set while a _reconnecting method runs, so nested calls do not retry on their own
+        self._retry_scope = False
+    
+    @property
+    def last_accessed(self) -> datetime:
+        """When the server last completed a command on this connection"""
+        return getattr(self.connection, 'last_response', datetime.min)
     
     def connect(self) -> bool:
         """Establish IMAP connection"""
         try:
+            self.profile = config_manager.get_profile_store().get(self.profile_key)
+            self._special_folders = None
+            pre_auth_capabilities = tuple(self.profile.get('pre_auth_capabilities', []))
+            
             if self.config.use_ssl:
-                self.connection = imaplib.IMAP4_SSL(
+                self.connection = ProfiledIMAP4_SSL(
                     self.config.imap_server,
-                    self.config.imap_port
+                    self.config.imap_port,
+                    known_capabilities=pre_auth_capabilities
                 )
             else:
-                self.connection = imaplib.IMAP4(
+                self.connection = ProfiledIMAP4(
                     self.config.imap_server,
-                    self.config.imap_port
+                    self.config.imap_port,
+                    known_capabilities=pre_auth_capabilities
                 )
+            if list(self.connection.capabilities) != list(pre_auth_capabilities):
+                self._update_profile(pre_auth_capabilities=list(self.connection.capabilities))
             
             # Login
-            self.connection.login(self.config.email, self.config.password)
-            self.last_accessed = datetime.now()
+            status, login_data = self.connection.login(self.config.email, self.config.password)
+            
+            self._load_capabilities(login_data)
+            # imaplib checks its own (pre-login) tuple before ENABLE and friends
+            self.connection.capabilities = tuple(self.capabilities)
             
             # Try to enable UTF-8 support if available
             self._enable_utf8_support()
             
+            # Reuse the search form learned for this server in earlier sessions
+            if self.search_mode is None:
+                self.search_mode = self.profile.get('search_mode')
+            
             logging.info(f"IMAP connected for {self.config.email}")
             return True
             
@@ -58,44 +310,212 @@ class IMAPBackend:
             except:
                 pass
             finally:
-                self.connection = None
-                self.current_folder = None
-                self.utf8_enabled = False
+                self._reset_session()
+    
+    def drop(self):
+        """Close the socket without CLOSE/LOGOUT, for a dead or timed-out connection"""
+        if self.connection:
+            try:
+                self.connection.shutdown()
+            except Exception:
+                pass
+            finally:
+                self._reset_session()
+    
+    def _reset_session(self):
+        self.connection = None
+        self.current_folder = None
+        self._selected_state = None
+        self._search_cache.clear()
+        self.utf8_enabled = False
     
     def ensure_connected(self):
         """Ensure IMAP connection is active"""
         if not self.connection:
             self.connect()
+            return
+        
+        # A connection the server answered within the last NOOP_INTERVAL seconds is assumed alive
+        if datetime.now() - self.last_accessed < timedelta(seconds=NOOP_INTERVAL):
+            return
         
         # Test connection with NOOP
         try:
             self.connection.noop()
-            self.last_accessed = datetime.now()
-        except:
+        except Exception:
             logging.warning("IMAP connection lost, reconnecting...")
-            self.disconnect()
+            self.drop()
             self.connect()
     
+    def _update_profile(self, **values):
+        """Update the in-memory and persisted server profile"""
+        self.profile.update(values)
+        config_manager.get_profile_store().update(self.profile_key, **values)
+    
+    def _query_capabilities(self) -> List[str]:
+        """Ask the server for its capabilities and record them in the profile"""
+        status, data = self.connection.capability()
+        if status != 'OK':
+            raise ConnectionError(f"CAPABILITY failed: {status}")
+        capability_list = data[-1].decode().upper().split()
+        self._capabilities_from_profile = False
+        self._update_profile(
+            capabilities=capability_list,
+            capabilities_checked_at=datetime.now().isoformat()
+        )
+        return capability_list
+    
+    def _load_capabilities(self, login_data):
+        """Determine post-login capabilities with as few round trips as possible
+        
+        Prefer the [CAPABILITY] code most servers put in the LOGIN response,
+        then a recent server profile, and only then a CAPABILITY command.
+        """
+        capability_list = parse_capability_code(login_data)
+        if capability_list:
+            self._capabilities_from_profile = False
+            if capability_list != self.profile.get('capabilities'):
+                self._update_profile(
+                    capabilities=capability_list,
+                    capabilities_checked_at=datetime.now().isoformat()
+                )
+            self.capabilities = capability_list
+            return
+        
+        cached = self.profile.get('capabilities')
+        checked_at = self.profile.get('capabilities_checked_at')
+        if cached and checked_at:
+            try:
+                if datetime.now() - datetime.fromisoformat(checked_at) < CAPABILITY_MAX_AGE:
+                    self.capabilities = list(cached)
+                    self._capabilities_from_profile = True
+                    return
+            except ValueError:
+                pass
+        
+        try:
+            self.capabilities = self._query_capabilities()
+        except Exception as e:
+            logging.warning(f"Could not query IMAP capabilities: {str(e)}")
+            self.capabilities = list(cached or [])
+    
     def _enable_utf8_support(self):
         """Try to enable UTF-8 support on IMAP server"""
         try:
             # Check if server supports UTF8 capability
-            capabilities = self.connection.capability()
-            if capabilities[0] == 'OK':
-                capability_list = capabilities[1][0].decode().upper().split()
-                if 'UTF8=ACCEPT' in capability_list or 'UTF8=ONLY' in capability_list:
-                    # Try to enable UTF-8 support
-                    result = self.connection.enable('UTF8=ACCEPT')
-                    if result[0] == 'OK':
-                        self.utf8_enabled = True
-                        logging.info("UTF-8 support enabled for IMAP connection")
-                    else:
-                        logging.warning("Failed to enable UTF-8 support")
+            capability_list = self.capabilities
+            if 'UTF8=ACCEPT' in capability_list or 'UTF8=ONLY' in capability_list:
+                # Try to enable UTF-8 support
+                result = self.connection.enable('UTF8=ACCEPT')
+                if result[0] == 'OK':
+                    self.utf8_enabled = True
+                    logging.info("UTF-8 support enabled for IMAP connection")
                 else:
-                    logging.info("Server does not support UTF8=ACCEPT capability")
+                    logging.warning("Failed to enable UTF-8 support")
+            else:
+                logging.info("Server does not support UTF8=ACCEPT capability")
         except Exception as e:
             logging.warning(f"Could not check/enable UTF-8 support: {str(e)}")
             self.utf8_enabled = False
+            if self._capabilities_from_profile:
+                # The cached profile may be stale; revalidate it for next time
+                try:
+                    self.capabilities = self._query_capabilities()
+                except Exception:
+                    pass
+    
+    def get_hierarchy_delimiter(self) -> Optional[str]:
+        """Get the folder hierarchy delimiter (cached in the server profile)"""
+        if self.profile.get('hierarchy_delimiter'):
+            return self.profile['hierarchy_delimiter']
+        
+        self.ensure_connected()
+        try:
+            status, data = self.connection.list('""', '""')
+            if status == 'OK' and data and data[0]:
+                match = _LIST_RESPONSE.match(data[0].decode('utf-8', errors='replace'))
+                if match and match.group(3):
+                    self._update_profile(hierarchy_delimiter=match.group(3))
+                    return match.group(3)
+        except Exception as e:
+            logging.warning(f"Could not determine hierarchy delimiter: {str(e)}")
+        return None
+    
+    def get_namespace(self) -> Optional[str]:
+        """Get the raw NAMESPACE response (cached in the server profile)"""
+        if 'namespace' in self.profile:
+            return self.profile['namespace']
+        
+        self.ensure_connected()
+        if 'NAMESPACE' not in self.capabilities:
+            return None
+        try:
+            status, data = self.connection.namespace()
+            if status == 'OK' and data and data[0]:
+                namespace = data[0].decode('utf-8', errors='replace')
+                self._update_profile(namespace=namespace)
+                return namespace
+        except Exception as e:
+            logging.warning(f"Could not query namespace: {str(e)}")
+        return None
+    
+    @property
+    def profile_key(self) -> str:
+        """Key of this server in the server profile store"""
+        return f"imap://{self.config.imap_server}:{self.config.imap_port}/{self.config.email}"
+    
+    def _search_modes(self) -> List[str]:
+        """Search forms to try for non-ASCII queries, learned form first"""
+        modes = [SEARCH_MODE_CHARSET, SEARCH_MODE_LITERAL]
+        if self.utf8_enabled:
+            modes.insert(0, SEARCH_MODE_UTF8)
+        if self.search_mode in modes:
+            modes.remove(self.search_mode)
+            modes.insert(0, self.search_mode)
+        return modes
+    
+    def _remember_search_mode(self, mode: str):
+        """Record the search form that worked so later queries go straight to it"""
+        if self.search_mode == mode:
+            return
+        logging.info(f"Using '{mode}' search form for {self.config.imap_server}")
+        self.search_mode = mode
+        self._update_profile(search_mode=mode)
+    
+    def _run_search(self, query: SearchQuery) -> Tuple[str, list]:
+        """Issue SEARCH for a compiled query using the form this server accepts
+        
+        ASCII-only queries need no CHARSET. Otherwise the learned form is tried
+        first and the remaining ones only if it fails, so a known server costs
+        exactly one SEARCH.
+        """
+        if not query.needs_charset:
+            return self.connection.search(None, query.criteria)
+        
+        status, data = 'NO', [b'']
+        for mode in self._search_modes():
+            try:
+                criteria, literal = query.render(mode, literal_plus='LITERAL+' in self.capabilities)
+            except ValueError:
+                continue
+            
+            try:
+                if literal is not None:
+                    self.connection.literal = literal
+                charset = None if mode == SEARCH_MODE_UTF8 else 'UTF-8'
+                status, data = self.connection.search(charset, criteria)
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as e:
+                logging.debug(f"Search form '{mode}' rejected: {str(e)}")
+                status, data = 'NO', [str(e).encode()]
+            
+            if status == 'OK':
+                self._remember_search_mode(mode)
+                return status, data
+            logging.debug(f"Search form '{mode}' failed: {status} {data}")
+        
+        return status, data
     
     def _quote_folder_name(self, folder_name: str) -> str:
         """Quote folder name if it contains spaces (excluding leading/trailing spaces)"""
@@ -111,6 +531,90 @@ class IMAPBackend:
         
         return folder_name
 
+    def _mailbox_argument(self, folder: str) -> str:
+        """Folder name as sent in commands (quoted, modified UTF-7 unless UTF-8 is enabled)"""
+        quoted_folder_name = self._quote_folder_name(folder)
+        return quoted_folder_name if self.utf8_enabled else encode_to_imap_utf7(quoted_folder_name)
+    
+    def _select_state(self, folder: str) -> Tuple:
+        """Make sure the folder is selected and return its change state
+        
+        The state is (UIDVALIDITY, EXISTS, UIDNEXT, HIGHESTMODSEQ), with None
+        for items the server did not report, as of the last SELECT. When the
+        folder is already selected a NOOP stands in for selecting it again:
+        unsolicited EXISTS, EXPUNGE or FETCH responses (or a new
+        HIGHESTMODSEQ) since the SELECT mean the mailbox changed and it is
+        selected afresh. STATUS is not used on the selected mailbox (RFC 3501
+        6.3.10).
+        """
+        if self.current_folder == folder and self._selected_state is not None:
+            untagged = self.connection.untagged_responses
+            try:
+                self.connection.noop()
+                changed = [untagged.pop(code, None) for code in _CHANGE_RESPONSES]
+                modseq = untagged.pop('HIGHESTMODSEQ', None)
+                if modseq and modseq[-1].decode() != self._selected_state[3]:
+                    changed.append(modseq)
+                if not any(changed):
+                    return self._selected_state
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as e:
+                logging.debug(f"NOOP on selected folder refused, selecting again: {str(e)}")
+        
+        self._selected_state = None
+        status, data = self.connection.select(self._mailbox_argument(folder))
+        if status != 'OK':
+            raise FolderError(f"Failed to select folder '{folder}': {status}")
+        self.current_folder = folder
+        
+        # SELECT starts a fresh response dict
+        untagged = self.connection.untagged_responses
+        values = {'EXISTS': data[0].decode() if data and data[0] else '0'}
+        for code in ('UIDNEXT', 'UIDVALIDITY', 'HIGHESTMODSEQ'):
+            if untagged.get(code):
+                values[code] = untagged[code][-1].decode()
+        # Later responses of these kinds are news about changes since this SELECT
+        for code in _CHANGE_RESPONSES + ('UIDNEXT', 'UIDVALIDITY', 'HIGHESTMODSEQ'):
+            untagged.pop(code, None)
+        
+        self._selected_state = (values.get('UIDVALIDITY'), values['EXISTS'], values.get('UIDNEXT'),
+                                values.get('HIGHESTMODSEQ'))
+        return self._selected_state
+    
+    def _select_for_search(self, folder: str) -> Optional[Tuple]:
+        """Select the folder (see _select_state); None if its state cannot show changes"""
+        state = self._select_state(folder)
+        if state[0] is None or state[2] is None:
+            return None
+        return state
+    
+    def _cached_search_ids(self, key: Tuple[str, str], state: Optional[Tuple]) -> Optional[List[str]]:
+        """Cached IDs for a search if the mailbox has not changed since, else None"""
+        entry = self._search_cache.get(key)
+        if entry is None or state is None:
+            return None
+        if entry[0] != state:
+            del self._search_cache[key]
+            return None
+        self._search_cache.move_to_end(key)
+        return list(entry[1])
+    
+    def _store_search_ids(self, key: Tuple[str, str], state: Optional[Tuple],
+                          email_ids: List[str], depends_on_flags: bool):
+        """Remember search IDs for the given mailbox state
+        
+        UIDNEXT and EXISTS only catch new and expunged mail, so results that
+        depend on flags are cached only when HIGHESTMODSEQ (CONDSTORE) is known.
+        """
+        if state is None or (depends_on_flags and state[3] is None):
+            return
+        self._search_cache[key] = (state, list(email_ids))
+        self._search_cache.move_to_end(key)
+        while len(self._search_cache) > SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+    
+    @_reconnecting
     def select_folder(self, folder: str) -> Tuple[int, int]:
         """Select email folder and return (total_messages, unread_messages)"""
         self.ensure_connected()
@@ -129,6 +633,7 @@ class IMAPBackend:
                 raise FolderError(f"Failed to select folder '{folder}': {status}")
             
             self.current_folder = folder  # Store the original folder name without quotes
+            self._selected_state = None
             total_messages = int(
                 data[0]) if data[0] else 0
             
@@ -141,6 +646,7 @@ class IMAPBackend:
         except Exception as e:
             raise FolderError(f"Error selecting folder '{folder}': {str(e)}")
     
+    @_reconnecting
     def list_folders(self) -> List[EmailFolder]:
         """List all available folders"""
         self.ensure_connected()
@@ -151,6 +657,7 @@ class IMAPBackend:
                 raise FolderError(f"Failed to list folders: {status}")
             
             folder_list = []
+            delimiter = None
             for folder in folders:
                 if self.utf8_enabled:
                     folder_info = folder.decode('utf-8')
@@ -158,6 +665,11 @@ class IMAPBackend:
                     folder_info = decode_from_imap_utf7(folder.decode('utf-8'))
                 logging.debug(f"Parsing folder info: {folder_info}")
                 
+                # Remember the delimiter for the server profile
+                list_match = _LIST_RESPONSE.match(folder_info)
+                if list_match:
+                    delimiter = delimiter or list_match.group(3)
+                
                 # Parse folder name from IMAP response
                 # Format can be: '(\\HasNoChildren) "." "INBOX"' or '(\\HasNoChildren) "." INBOX'
                 parts = folder_info.split('"')
@@ -209,11 +721,281 @@ class IMAPBackend:
                 
                 folder_list.append(folder_obj)
             
+            if delimiter and delimiter != self.profile.get('hierarchy_delimiter'):
+                self._update_profile(hierarchy_delimiter=delimiter)
+            
             return folder_list
             
         except Exception as e:
             raise FolderError(f"Error listing folders: {str(e)}")
     
+    @_reconnecting
+    def list_folder_names(self) -> List[str]:
+        """List selectable folder names with a single LIST (no per-folder SELECT)"""
+        self.ensure_connected()
+        
+        try:
+            return [name for attributes, name in self._list_mailboxes('LIST', '""', '*')
+                    if '\\noselect' not in (attribute.lower() for attribute in attributes)]
+        except Exception as e:
+            raise FolderError(f"Error listing folders: {str(e)}")
+    
+    def get_special_folders(self) -> Dict[str, str]:
+        """Folder holding each special-use role, e.g. {'\\Sent': 'Sent Items'}
+        
+        Discovered with one command per session: LIST (SPECIAL-USE) on
+        servers with RFC 6154, XLIST on older Gmail-style servers, and
+        otherwise a plain LIST matched against conventional folder names.
+        The mapping is recorded in the server profile, which is used
+        instead if discovery fails.
+        """
+        if self._special_folders is not None:
+            return dict(self._special_folders)
+        
+        self.ensure_connected()
+        special_use = {}
+        try:
+            if 'SPECIAL-USE' in self.capabilities:
+                mailboxes = self._list_mailboxes('LIST', '(SPECIAL-USE)', '""', '*')
+            elif 'XLIST' in self.capabilities:
+                mailboxes = self._list_mailboxes('XLIST', '""', '*')
+            else:
+                mailboxes = self._list_mailboxes('LIST', '""', '*')
+            
+            for attributes, name in mailboxes:
+                for attribute in attributes:
+                    role = _SPECIAL_USE_BY_LOWER.get(attribute.lower())
+                    if role:
+                        special_use.setdefault(role, name)
+            
+            if 'SPECIAL-USE' not in self.capabilities and 'XLIST' not in self.capabilities:
+                delimiter = self.get_hierarchy_delimiter()
+                for attributes, name in mailboxes:
+                    role = special_use_role_for_name(name, delimiter)
+                    if role and '\\noselect' not in (attribute.lower() for attribute in attributes):
+                        special_use.setdefault(role, name)
+        except Exception as e:
+            logging.warning(f"Could not discover special-use folders: {str(e)}")
+            special_use = dict(self.profile.get('special_use', {}))
+        else:
+            if special_use != self.profile.get('special_use', {}):
+                self._update_profile(special_use=special_use)
+        
+        self._special_folders = special_use
+        return dict(special_use)
+    
+    def _list_mailboxes(self, command: str, *args: str) -> List[Tuple[List[str], str]]:
+        """Run a LIST-style command; returns (attributes, folder name) per mailbox"""
+        status, data = self.connection._simple_command(command, *args)
+        status, data = self.connection._untagged_response(status, data, command)
+        if status != 'OK':
+            raise FolderError(f"{command} failed: {status}")
+        
+        mailboxes = []
+        for folder in data:
+            if not isinstance(folder, bytes):
+                continue
+            if self.utf8_enabled:
+                folder_info = folder.decode('utf-8')
+            else:
+                folder_info = decode_from_imap_utf7(folder.decode('utf-8'))
+            
+            match = _LIST_RESPONSE.match(folder_info)
+            if not match:
+                continue
+            name = match.group(4).strip()
+            if name.startswith('"') and name.endswith('"'):
+                name = name[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+            if name and name not in [".", ".."]:
+                mailboxes.append((match.group(1).split(), name))
+        return mailboxes
+    
+    def set_timeout(self, seconds: Optional[float]):
+        """Set the socket timeout for commands on this connection (None to block)"""
+        if self.connection and getattr(self.connection, 'sock', None):
+            try:
+                self.connection.sock.settimeout(seconds)
+            except OSError:
+                # Socket already closed; the next command reconnects
+                pass
+    
+    @_reconnecting
+    def fetch_internal_dates(self, email_ids: List[str]) -> Dict[str, float]:
+        """Fetch INTERNALDATE for many messages in one command (timestamps by ID)"""
+        if not email_ids:
+            return {}
+        self.ensure_connected()
+        
+        status, data = self.connection.fetch(format_sequence_set(email_ids), '(INTERNALDATE)')
+        if status != 'OK':
+            raise FolderError(f"Failed to fetch dates: {status}")
+        
+        return {email_id: parse_internaldate(meta) for email_id, meta, _ in iter_fetch_response(data)}
+    
+    @_reconnecting
+    def fetch_summaries(self, email_ids: List[str]) -> List[EmailMessage]:
+        """Fetch headers and flags for many messages in one command
+        
+        Bodies are not downloaded, so the returned messages only carry
+        header fields, read/important status and the folder.
+        """
+        if not email_ids:
+            return []
+        self.ensure_connected()
+        
+        status, data = self.connection.fetch(
+            format_sequence_set(email_ids),
+            '(FLAGS BODY.PEEK[HEADER.FIELDS (SUBJECT FROM TO CC DATE MESSAGE-ID CONTENT-TYPE)])'
+        )
+        if status != 'OK':
+            raise FolderError(f"Failed to fetch headers: {status}")
+        
+        summaries = {}
+        for email_id, meta, literal in iter_fetch_response(data):
+            try:
+                email_obj = parse_raw_email(literal or b'', email_id)
+            except Exception as e:
+                logging.warning(f"Failed to parse headers of email {email_id}: {str(e)}")
+                continue
+            flags = parse_fetch_flags(meta)
+            email_obj.folder = self.current_folder
+            email_obj.is_read = '\\Seen' in flags
+            email_obj.is_important = '\\Flagged' in flags
+            summaries[email_id] = email_obj
+        
+        # Keep the caller's order
+        return [summaries[email_id] for email_id in email_ids if email_id in summaries]
+    
+    @_reconnecting
+    def open_folder(self, folder: str) -> Dict[str, Optional[int]]:
+        """Select a folder without the unread count and return its state
+        
+        Returns uidvalidity, exists, uidnext and highestmodseq (None when the
+        server does not report it).
+        """
+        self.ensure_connected()
+        
+        try:
+            uidvalidity, exists, uidnext, highestmodseq = self._select_state(folder)
+        except FolderError:
+            raise
+        except Exception as e:
+            raise FolderError(f"Error selecting folder '{folder}': {str(e)}")
+        
+        return {
+            'uidvalidity': int(uidvalidity) if uidvalidity else None,
+            'exists': int(exists) if exists else 0,
+            'uidnext': int(uidnext) if uidnext else None,
+            'highestmodseq': int(highestmodseq) if highestmodseq else None
+        }
+    
+    @_reconnecting
+    def fetch_uid_sizes(self, min_uid: int = 1) -> List[Tuple[int, int]]:
+        """List (UID, size in bytes) of messages in the selected folder with UID >= min_uid"""
+        self.ensure_connected()
+        
+        status, data = self.connection.uid('FETCH', f'{max(1, min_uid)}:*', '(UID RFC822.SIZE)')
+        if status != 'OK':
+            raise FolderError(f"Failed to list message UIDs: {status}")
+        
+        sizes = []
+        for _, meta, _ in iter_fetch_response(data):
+            uid = parse_fetch_uid(meta)
+            size = _FETCH_SIZE.search(meta)
+            # "n:*" always matches the highest UID, even below min_uid
+            if uid is not None and uid >= min_uid:
+                sizes.append((uid, int(size.group(1)) if size else 0))
+        sizes.sort()
+        return sizes
+    
+    def iter_message_ids(self, folder: str) -> Iterator[str]:
+        """Yield the Message-ID of every message in a folder
+        
+        Selects the folder and fetches only the Message-ID header, in
+        batches of HEADER_FETCH_BATCH messages. Messages without one are
+        skipped.
+        """
+        exists = self.open_folder(folder)['exists']
+        
+        for start in range(1, exists + 1, HEADER_FETCH_BATCH):
+            end = min(start + HEADER_FETCH_BATCH - 1, exists)
+            status, data = self.connection.fetch(f'{start}:{end}', '(BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])')
+            if status != 'OK':
+                raise FolderError(f"Failed to fetch Message-IDs from '{folder}': {status}")
+            
+            for _, _, literal in iter_fetch_response(data):
+                if not literal:
+                    continue
+                # Unfold continuation lines before matching
+                header = re.sub(rb'\r?\n[ \t]+', b' ', literal)
+                match = _MESSAGE_ID_HEADER.search(header)
+                if match and match.group(1):
+                    yield match.group(1).decode('utf-8', errors='replace')
+    
+    @_reconnecting
+    def fetch_flag_changes(self, max_uid: int, changed_since: int) -> List[Tuple[int, List[str]]]:
+        """(UID, flags) of messages up to max_uid whose flags changed after a
+        CONDSTORE mod-sequence, in the selected folder"""
+        if max_uid < 1:
+            return []
+        self.ensure_connected()
+        
+        status, data = self.connection.uid('FETCH', f'1:{max_uid}',
+                                           f'(UID FLAGS) (CHANGEDSINCE {changed_since})')
+        if status != 'OK':
+            raise FolderError(f"Failed to fetch flag changes: {status}")
+        
+        changes = []
+        for _, meta, _ in iter_fetch_response(data):
+            uid = parse_fetch_uid(meta)
+            if uid is not None and uid <= max_uid:
+                changes.append((uid, parse_fetch_flags(meta)))
+        changes.sort()
+        return changes
+    
+    @_reconnecting
+    def fetch_messages(self, uids: List[int]) -> List[EmailMessage]:
+        """Fetch complete messages by UID in one command, without setting \\Seen
+        
+        Each message keeps its raw bytes, flags, INTERNALDATE and UID; the
+        email_id is its sequence number in the selected folder.
+        """
+        if not uids:
+            return []
+        self.ensure_connected()
+        
+        status, data = self.connection.uid(
+            'FETCH', format_sequence_set([str(uid) for uid in uids]),
+            '(UID FLAGS INTERNALDATE BODY.PEEK[])'
+        )
+        if status != 'OK':
+            raise FolderError(f"Failed to fetch messages: {status}")
+        
+        messages = []
+        for sequence, meta, literal in iter_fetch_response(data):
+            uid = parse_fetch_uid(meta)
+            if uid is None or literal is None:
+                continue
+            try:
+                email_obj = parse_raw_email(literal, sequence)
+            except Exception as e:
+                logging.warning(f"Failed to parse message UID {uid}: {str(e)}")
+                continue
+            flags = parse_fetch_flags(meta)
+            date_match = _FETCH_INTERNALDATE.search(meta.decode('utf-8', errors='replace'))
+            email_obj.folder = self.current_folder
+            email_obj.uid = str(uid)
+            email_obj.raw_bytes = literal
+            email_obj.flags = flags
+            email_obj.internal_date = date_match.group(1) if date_match else None
+            email_obj.is_read = '\\Seen' in flags
+            email_obj.is_important = '\\Flagged' in flags
+            messages.append(email_obj)
+        
+        messages.sort(key=lambda email_obj: int(email_obj.uid))
+        return messages
+    
+    @_reconnecting
     def get_email_ids(self, folder: str, limit: Optional[int] = None) -> List[str]:
         """Get email IDs from folder (newest first)"""
         quoted_folder_name = self._quote_folder_name(folder)
@@ -245,6 +1027,7 @@ class IMAPBackend:
         except Exception as e:
             raise FolderError(f"Error getting email IDs: {str(e)}")
     
+    @_reconnecting
     def fetch_email(self, email_id: str) -> EmailMessage:
         """Fetch single email by ID"""
         self.ensure_connected()
@@ -253,11 +1036,13 @@ class IMAPBackend:
             # Fetch email content and flags separately for better reliability
             # First get the RFC822 content
             status, content_data = self.connection.fetch(email_id, '(RFC822)')
+            # RFC822 sets \Seen, and imaplib consumes the FETCH reply that reports it
+            self._selected_state = None
             if status != 'OK':
                 raise FolderError(f"Failed to fetch email content {email_id}: {status}")
             
-            # Then get current flags separately
-            status, flag_data = self.connection.fetch(email_id, '(FLAGS)')
+            # Then get current flags (and the arrival date) separately
+            status, flag_data = self.connection.fetch(email_id, '(FLAGS INTERNALDATE)')
             if status != 'OK':
                 raise FolderError(f"Failed to fetch email flags {email_id}: {status}")
             
@@ -276,10 +1061,14 @@ class IMAPBackend:
             
             # Extract flags
             flags = []
+            internal_date = None
             for item in flag_data:
                 if isinstance(item, bytes):
                     # Direct bytes response like b'6 (FLAGS (\\Seen \\Flagged))'
                     header = item.decode()
+                    date_match = _FETCH_INTERNALDATE.search(header)
+                    if date_match:
+                        internal_date = date_match.group(1)
                     if 'FLAGS' in header:
                         import re
                         flag_match = re.search(r'FLAGS \(([^)]*)\)', header)
@@ -291,6 +1080,9 @@ class IMAPBackend:
                 elif isinstance(item, tuple) and len(item) == 2:
                     # Tuple response
                     header = item[0].decode() if isinstance(item[0], bytes) else str(item[0])
+                    date_match = _FETCH_INTERNALDATE.search(header)
+                    if date_match:
+                        internal_date = date_match.group(1)
                     if 'FLAGS' in header:
                         import re
                         flag_match = re.search(r'FLAGS \(([^)]*)\)', header)
@@ -302,6 +1094,10 @@ class IMAPBackend:
             
             email_obj = parse_raw_email(raw_email, email_id)
             email_obj.folder = self.current_folder
+            # Keep the server's bytes, flags and arrival date for faithful export
+            email_obj.raw_bytes = raw_email
+            email_obj.flags = flags
+            email_obj.internal_date = internal_date
             
             # Set status based on current IMAP flags
             email_obj.is_read = '\\Seen' in flags
@@ -315,6 +1111,7 @@ class IMAPBackend:
             logging.error(f"Error fetching email {email_id}: {str(e)}")
             raise
     
+    @_reconnecting
     def search_emails(self, query: str, folder: str = None) -> List[str]:
         """Search emails and return email IDs"""
         self.ensure_connected()
@@ -323,39 +1120,27 @@ class IMAPBackend:
         if not folder:
             folder = 'INBOX'
         
-        # Always select folder before searching
-        self.select_folder(folder)
-        
         try:
-            # Handle Unicode/Chinese characters in search query
-            # Based on StackOverflow solution: need to encode Unicode strings to UTF-8 bytes
-            query_bytes = query.encode('utf-8')
+            # Pages of the same query are served from the cache while the mailbox is unchanged
+            state = self._select_for_search(folder)
+            cache_key = (folder, 'TEXT ' + ' '.join(query.split()).casefold())
+            cached = self._cached_search_ids(cache_key, state)
+            if cached is not None:
+                return cached
             
-            # Try UTF-8 search first if server supports it
-            # Use TEXT search which covers all text content (subject, body, headers)
-            # This is more reliable than OR combinations for UTF-8 content
-            if self.utf8_enabled:
-                # When UTF-8 is enabled, we should NOT specify charset parameter
-                # Use TEXT to search all text content
-                search_criteria = b'TEXT "' + query_bytes + b'"'
-                status, email_ids = self.connection.search(None, search_criteria)
-            else:
-                # For servers without UTF-8 support, try UTF-8 charset parameter
-                try:
-                    # Use TEXT with UTF-8 charset
-                    search_criteria = b'TEXT "' + query_bytes + b'"'
-                    status, email_ids = self.connection.search('UTF-8', search_criteria)
-                except Exception as search_error:
-                    logging.warning(f"UTF-8 charset search failed: {search_error}")
-                    status = 'NO'
+            # TEXT covers all text content (subject, body, headers); the query is
+            # sent in whichever form this server is known to accept
+            status, email_ids = self._run_search(compile_search_query({'text': query}))
             
             if status != 'OK':
                 # Fallback to ASCII search if UTF-8 search fails
                 logging.warning(f"UTF-8 search failed, trying ASCII fallback for query: {query}")
                 ascii_query = query.encode('ascii', errors='ignore').decode('ascii')
                 if ascii_query.strip():  # Only search if we have non-empty ASCII query
-                    search_criteria_ascii = f'(OR SUBJECT "{ascii_query}" FROM "{ascii_query}" BODY "{ascii_query}")'
-                    status, email_ids = self.connection.search(None, search_criteria_ascii)
+                    fallback = compile_search_query({'or': [
+                        {'subject': ascii_query}, {'from': ascii_query}, {'body': ascii_query}
+                    ]})
+                    status, email_ids = self._run_search(fallback)
                 else:
                     # If ASCII conversion results in empty string, return empty results
                     logging.warning(f"Query '{query}' contains only non-ASCII characters, no ASCII fallback possible")
@@ -366,12 +1151,54 @@ class IMAPBackend:
             
             id_list = email_ids[0].split()
             # Return newest first
-            return [uid.decode() for uid in reversed(id_list)]
+            result = [uid.decode() for uid in reversed(id_list)]
+            self._store_search_ids(cache_key, state, result, depends_on_flags=False)
+            return result
             
         except Exception as e:
             logging.error(f"Error searching emails with query '{query}': {str(e)}")
             raise FolderError(f"Error searching emails: {str(e)}")
-    
+
+    @_reconnecting
+    def search_compiled(self, query: SearchQuery, folder: str = None) -> List[str]:
+        """Run a compiled SEARCH expression in a single command and return email IDs"""
+        self.ensure_connected()
+
+        # If no folder specified, use INBOX as default
+        if not folder:
+            folder = 'INBOX'
+
+        try:
+            # Pages of the same query are served from the cache while the mailbox is unchanged
+            state = self._select_for_search(folder)
+            cache_key = (folder, query.criteria.decode('utf-8'))
+            cached = self._cached_search_ids(cache_key, state)
+            if cached is not None:
+                return cached
+
+            status, email_ids = self._run_search(query)
+
+            if status != 'OK':
+                # Last resort: drop non-ASCII characters rather than fail outright
+                fallback = query.ascii_fallback() if query.needs_charset else None
+                if fallback is None:
+                    raise FolderError(f"Search failed: {status}")
+                logging.warning(f"UTF-8 search failed, trying ASCII fallback for {query.criteria!r}")
+                status, email_ids = self._run_search(fallback)
+                if status != 'OK':
+                    raise FolderError(f"Search failed: {status}")
+
+            id_list = email_ids[0].split()
+            # Return newest first
+            result = [uid.decode() for uid in reversed(id_list)]
+            self._store_search_ids(cache_key, state, result, query.depends_on_flags)
+            return result
+
+        except Exception as e:
+            logging.error(f"Error running search {query.criteria!r}: {str(e)}")
+            raise FolderError(f"Error searching emails: {str(e)}")
+
+    @_reconnecting
     def mark_as_read(self, email_id: str) -> bool:
         """Mark email as read
         
@@ -382,6 +1209,8 @@ class IMAPBackend:
         
         try:
             result = self.connection.store(email_id, '+FLAGS', '\\Seen')
+            # imaplib consumes the FETCH replies, so _select_state would not notice the change
+            self._selected_state = None
             if result[0] != 'OK':
                 logging.error(f"Failed to mark email {email_id} as read: {result[1]}")
                 return False
@@ -395,6 +1224,7 @@ class IMAPBackend:
             logging.error(f"Error marking email {email_id} as read: {str(e)}")
             return False
     
+    @_reconnecting
     def mark_as_unread(self, email_id: str) -> bool:
         """Mark email as unread
         
@@ -405,6 +1235,8 @@ class IMAPBackend:
         
         try:
             result = self.connection.store(email_id, '-FLAGS', '\\Seen')
+            # imaplib consumes the FETCH replies, so _select_state would not notice the change
+            self._selected_state = None
             if result[0] != 'OK':
                 logging.error(f"Failed to mark email {email_id} as unread: {result[1]}")
                 return False
@@ -418,6 +1250,7 @@ class IMAPBackend:
             logging.error(f"Error marking email {email_id} as unread: {str(e)}")
             return False
     
+    @_reconnecting
     def mark_as_important(self, email_id: str) -> bool:
         """Mark email as important (flagged)
         
@@ -428,6 +1261,8 @@ class IMAPBackend:
         
         try:
             result = self.connection.store(email_id, '+FLAGS', '\\Flagged')
+            # imaplib consumes the FETCH replies, so _select_state would not notice the change
+            self._selected_state = None
             if result[0] != 'OK':
                 logging.error(f"Failed to mark email {email_id} as important: {result[1]}")
                 return False
@@ -441,6 +1276,7 @@ class IMAPBackend:
             logging.error(f"Error marking email {email_id} as important: {str(e)}")
             return False
     
+    @_reconnecting
     def mark_as_not_important(self, email_id: str) -> bool:
         """Remove important flag from email
         
@@ -451,6 +1287,8 @@ class IMAPBackend:
         
         try:
             result = self.connection.store(email_id, '-FLAGS', '\\Flagged')
+            # imaplib consumes the FETCH replies, so _select_state would not notice the change
+            self._selected_state = None
             if result[0] != 'OK':
                 logging.error(f"Failed to remove important flag from email {email_id}: {result[1]}")
                 return False
@@ -471,8 +1309,12 @@ class IMAPBackend:
         try:
             self.connection.store(email_id, '+FLAGS', '\\Deleted')
             self.connection.expunge()
+            self._selected_state = None
         except Exception as e:
             logging.error(f"Error deleting email {email_id}: {str(e)}")
+            if _is_connection_lost(e):
+                # Not retried, but the next command should not reuse the dead socket
+                self.drop()
             raise FolderError(f"Failed to delete email: {str(e)}")
     
     def move_email(self, email_id: str, target_folder: str) -> Optional[str]:
@@ -508,6 +1350,7 @@ class IMAPBackend:
             
             # Expunge to actually remove from current folder
             expunge_result = self.connection.expunge()
+            self._selected_state = None
             if expunge_result[0] != 'OK':
                 logging.warning(f"Failed to expunge deleted emails: {expunge_result[1]}")
             
@@ -519,12 +1362,25 @@ class IMAPBackend:
             
         except Exception as e:
             logging.error(f"Error moving email {email_id} to {target_folder}: {str(e)}")
+            if _is_connection_lost(e):
+                # Not retried, but the next command should not reuse the dead socket
+                self.drop()
             raise FolderError(f"Failed to move email: {str(e)}")
     
-    def append_message(self, folder: str, message: str, flags: str = '\\Seen') -> bool:
-        """Append a message to the specified folder with UTF-8 support"""
+    def append_message(self, folder: str, message: Union[str, bytes], flags: str = '\\Seen',
+                       internal_date: Optional[str] = None) -> bool:
+        """Append a message to the specified folder with UTF-8 support
+        
+        Bytes are sent unchanged, so a message exported with its raw bytes is
+        restored byte for byte. ``internal_date`` (IMAP INTERNALDATE format)
+        keeps the original arrival date instead of the time of the APPEND.
+        """
         self.ensure_connected()
         
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        date_time = f'"{internal_date}"' if internal_date else None
+        
         try:
             # Encode folder name for IMAP operations
             quoted_folder = self._quote_folder_name(folder)
@@ -532,9 +1388,9 @@ class IMAPBackend:
             
             # Use IMAP APPEND command to add message to folder
             if self.utf8_enabled:
-                result = self.connection.append(quoted_folder, flags, None, message.encode('utf-8'))
+                result = self.connection.append(quoted_folder, flags, date_time, message)
             else:
-                result = self.connection.append(utf7_quoted_folder, flags, None, message.encode('utf-8'))
+                result = self.connection.append(utf7_quoted_folder, flags, date_time, message)
             if result[0] == 'OK':
                 logging.info(f"Message appended to {folder}")
                 return True
@@ -543,4 +1399,7 @@ class IMAPBackend:
                 return False
         except Exception as e:
             logging.error(f"Error appending message to {folder}: {str(e)}")
+            if _is_connection_lost(e):
+                # Not retried, but the next command should not reuse the dead socket
+                self.drop()
             raise FolderError(f"Failed to append message to {folder}: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,71 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+from ..models.config import EmailConfig
+from .imap_backend import IMAPBackend
+
+
+class IMAPConnectionPool:
+    """Pool of independent IMAP connections for parallel work
+
+    imaplib connections are not thread-safe and each one has its own selected
+    folder, so parallel operations (multi-folder search, export, import) take
+    a whole backend from the pool for the duration of a task. Connections are
+    opened lazily up to ``max_connections`` and kept for reuse.
+    """
+
+    def __init__(self, config: EmailConfig, max_connections: int = 4):
+        self.config = config
+        self.max_connections = max(1, max_connections)
+        self._idle: "queue.LifoQueue[IMAPBackend]" = queue.LifoQueue()
+        self._all: List[IMAPBackend] = []
+        self._lock = threading.Lock()
+
+    def _checkout(self, timeout: float = None) -> IMAPBackend:
+        """Take an idle backend, creating one if the pool is not full yet"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.max_connections:
+                backend = IMAPBackend(self.config)
+                self._all.append(backend)
+                return backend
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No pooled IMAP connection became available")
+
+    @contextmanager
+    def acquire(self, timeout: float = None) -> Iterator[IMAPBackend]:
+        """Borrow a connected backend for the duration of a with-block
+
+        A backend whose task raised is dropped before being returned, so
+        the next borrower reconnects instead of inheriting a broken session.
+        Dropping sends no CLOSE/LOGOUT, which could block on a connection
+        whose command timed out while the server is still working on it.
+        """
+        backend = self._checkout(timeout)
+        try:
+            backend.ensure_connected()
+            yield backend
+        except Exception:
+            backend.drop()
+            raise
+        finally:
+            self._idle.put(backend)
+
+    def close_all(self):
+        """Disconnect every pooled connection"""
+        with self._lock:
+            backends = list(self._all)
+        for backend in backends:
+            try:
+                backend.disconnect()
+            except Exception as e:
+                logging.debug(f"Error closing pooled IMAP connection: {str(e)}")
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from ..utils.exceptions import ValidationError
+
+
+def _fsync_directory(path: Path):
+    """Make renames and unlinks in a directory durable (a no-op where unsupported)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class OutboxSpool:
+    """Outgoing messages kept on disk until they are delivered
+
+    Each entry is ``<id>.eml`` (the flattened message, see SMTPBackend.flatten) plus
+    ``<id>.json`` (envelope and delivery state). Both are written through
+    a temporary file, fsynced and renamed into place, the metadata last, so
+    an entry whose metadata exists is complete and survives a crash or
+    restart. The message file is dropped once the entry is delivered or
+    given up on; the metadata stays for status queries until pruned.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _path(self, entry_id: str, suffix: str) -> Path:
+        """File of an entry; IDs are checked so they cannot leave the spool directory"""
+        if not isinstance(entry_id, str) or not entry_id.isalnum():
+            raise ValidationError(f"Invalid outbox ID: {entry_id}")
+        return self.root / f"{entry_id}{suffix}"
+
+    def _write_atomic(self, path: Path, data: bytes):
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        _fsync_directory(self.root)
+
+    def add(self, data: bytes, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a message with its metadata and return the stored entry"""
+        entry = dict(entry, id=uuid.uuid4().hex[:16], created=datetime.now().isoformat())
+        self._write_atomic(self._path(entry['id'], '.eml'), data)
+        self.save(entry)
+        return entry
+
+    def save(self, entry: Dict[str, Any]):
+        """Atomically replace an entry's metadata"""
+        with self._lock:
+            self._write_atomic(self._path(entry['id'], '.json'),
+                               json.dumps(entry, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """An entry's metadata, or None if there is no such entry"""
+        try:
+            path = self._path(entry_id, '.json')
+        except ValidationError:
+            return None
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Could not read outbox entry {path}: {str(e)}")
+            return None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Every readable entry, oldest first"""
+        if not self.root.is_dir():
+            return []
+        entries = [self.get(path.stem) for path in self.root.glob('*.json')]
+        return sorted((entry for entry in entries if entry is not None), key=lambda entry: entry['created'])
+
+    def message(self, entry_id: str) -> bytes:
+        """The stored message bytes of an entry"""
+        with open(self._path(entry_id, '.eml'), 'rb') as f:
+            return f.read()
+
+    def discard_message(self, entry_id: str):
+        """Drop the message bytes of an entry that no longer needs them"""
+        path = self._path(entry_id, '.eml')
+        if path.exists():
+            path.unlink()
+
+    def remove(self, entry_id: str):
+        """Delete an entry entirely"""
+        self.discard_message(entry_id)
+        path = self._path(entry_id, '.json')
+        if path.exists():
+            path.unlink()
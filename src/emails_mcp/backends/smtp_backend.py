@@ -1,16 +1,24 @@
+import io
 import smtplib
 import logging
 import os
+import ssl
+from datetime import datetime, timedelta
+from email.generator import BytesGenerator
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from email.utils import formataddr
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from ..models.config import EmailConfig
 from ..utils.exceptions import ConnectionError, AuthenticationError, SendEmailError
 from ..utils.validators import validate_email_list, validate_file_path
-from ..config.settings import ConfigManager
+from ..config.settings import ConfigManager, config_manager
+
+# Skip the liveness NOOP when the connection was used this recently (seconds)
+NOOP_INTERVAL = 60
 
 
 class SMTPBackend:
@@ -19,6 +27,43 @@ class SMTPBackend:
     def __init__(self, config: EmailConfig):
         self.config = config
         self.connection: Optional[smtplib.SMTP] = None
+        self.last_used = datetime.now()
+    
+    @property
+    def profile_key(self) -> str:
+        """Key of this server in the server profile store"""
+        return f"smtp://{self.config.smtp_server}:{self.config.smtp_port}/{self.config.email}"
+    
+    def _starttls(self, profile: dict) -> Optional[bool]:
+        """Upgrade to TLS, trying STARTTLS before the first EHLO
+        
+        Everything learned before TLS must be discarded anyway (RFC 3207), so
+        the first EHLO only serves to discover STARTTLS. Servers that insist on
+        EHLO first answer 503; the profile remembers that, so only the first
+        connection to such a server pays for the failed attempt.
+        
+        Returns:
+            Optional[bool]: whether STARTTLS without EHLO worked, or None if it was not tried
+        """
+        if profile.get('starttls_without_ehlo') is not False:
+            code, reply = self.connection.docmd('STARTTLS')
+            if code == 220:
+                context = ssl._create_stdlib_context()
+                self.connection.sock = context.wrap_socket(
+                    self.connection.sock, server_hostname=self.connection._host
+                )
+                self.connection.file = None
+                self.connection.helo_resp = None
+                self.connection.ehlo_resp = None
+                self.connection.esmtp_features = {}
+                self.connection.does_esmtp = False
+                return True
+            logging.debug(f"STARTTLS before EHLO rejected ({code} {reply}), using full handshake")
+            self.connection.starttls()
+            return False
+        
+        self.connection.starttls()
+        return None
     
     def connect(self) -> bool:
         """Establish SMTP connection"""
@@ -32,9 +77,22 @@ class SMTPBackend:
             if logging.getLogger().isEnabledFor(logging.DEBUG):
                 self.connection.set_debuglevel(1)
             
+            profile = config_manager.get_profile_store().get(self.profile_key)
+            
             # Start TLS if configured
+            learned = {}
             if self.config.use_starttls:
-                self.connection.starttls()
+                without_ehlo = self._starttls(profile)
+                if without_ehlo is not None:
+                    learned['starttls_without_ehlo'] = without_ehlo
+            
+            # EHLO after TLS (or the first one without it) is needed for AUTH anyway
+            self.connection.ehlo_or_helo_if_needed()
+            config_manager.get_profile_store().update(
+                self.profile_key,
+                esmtp_features=dict(self.connection.esmtp_features),
+                **learned
+            )
             
             # Login only if password is provided and server supports auth
             if self.config.password and self.config.password.strip():
@@ -51,6 +109,7 @@ class SMTPBackend:
             else:
                 logging.info(f"No password provided, proceeding without authentication")
             
+            self.last_used = datetime.now()
             logging.info(f"SMTP connected for {self.config.email}")
             return True
             
@@ -73,26 +132,64 @@ class SMTPBackend:
         if not self.connection:
             logging.debug("No SMTP connection, connecting...")
             self.connect()
+            return
+        
+        # A connection used within the last NOOP_INTERVAL seconds is assumed alive
+        if datetime.now() - self.last_used < timedelta(seconds=NOOP_INTERVAL):
+            return
         
         # Test connection with more robust checking
         try:
             status = self.connection.noop()
             if status[0] != 250:  # NOOP should return 250 OK
                 raise Exception(f"NOOP returned {status}")
+            self.last_used = datetime.now()
         except Exception as e:
             logging.warning(f"SMTP connection test failed: {e}, reconnecting...")
             self.disconnect()
             self.connect()
     
+    def reset(self):
+        """Clear any transaction state with RSET, leaving the session ready for the next message"""
+        code, reply = self.connection.rset()
+        if code != 250:
+            raise ConnectionError(f"RSET returned {code} {reply}")
+        self.last_used = datetime.now()
+    
     def send_email(self, to: str, subject: str, body: str, 
                    html_body: Optional[str] = None,
                    cc: Optional[str] = None, 
                    bcc: Optional[str] = None,
-                   attachments: Optional[List[str]] = None) -> tuple[bool, Optional[str]]:
+                   attachments: Optional[List[str]] = None) -> tuple[bool, Optional[bytes]]:
         """Send email with optional HTML, CC, BCC, and attachments
         
         Returns:
-            tuple[bool, Optional[str]]: (success, message_string_for_saving)
+            tuple[bool, Optional[bytes]]: (success, message_bytes_for_saving), the
+            buffer that was transmitted with the Bcc header still in front of it
+        """
+        msg, recipients = self.build_message(to, subject, body, html_body, cc, bcc, attachments)
+        data, offset = self.flatten(msg)
+        
+        try:
+            self.send_bytes(data, recipients, offset)
+            logging.info(f"Email sent successfully to {to}")
+            
+            # Return success and the complete message for saving to Sent folder
+            return True, data
+            
+        except Exception as e:
+            logging.error(f"Error sending email: {str(e)}")
+            raise SendEmailError(f"Failed to send email: {str(e)}")
+
+    def build_message(self, to: str, subject: str, body: str,
+                      html_body: Optional[str] = None,
+                      cc: Optional[str] = None,
+                      bcc: Optional[str] = None,
+                      attachments: Optional[List[str]] = None) -> Tuple[Message, List[str]]:
+        """Validate recipients and build the MIME message
+        
+        Returns:
+            Tuple[Message, List[str]]: (message, envelope recipients including BCC)
         """
         
         # Validate recipients
@@ -110,8 +207,6 @@ class SMTPBackend:
             if not valid:
                 raise SendEmailError(f"Invalid BCC addresses: {error}")
         
-        self.ensure_connected()
-        
         try:
             # Create message
             if html_body or attachments:
@@ -178,16 +273,161 @@ class SMTPBackend:
             if bcc:
                 recipients.extend([addr.strip() for addr in bcc.split(',')])
             
-            # Send email
-            self.connection.send_message(msg, to_addrs=recipients)
-            logging.info(f"Email sent successfully to {to}")
-            
-            # Return success and the complete message for saving to Sent folder
-            return True, msg.as_string()
+            return msg, recipients
             
+        except SendEmailError:
+            raise
         except Exception as e:
-            logging.error(f"Error sending email: {str(e)}")
-            raise SendEmailError(f"Failed to send email: {str(e)}")
+            logging.error(f"Error building email: {str(e)}")
+            raise SendEmailError(f"Failed to build email: {str(e)}")
+    
+    def send_prepared(self, msg: Message, recipients: List[str]) -> Dict[str, Tuple[int, bytes]]:
+        """Send a built message; see send_bytes"""
+        data, offset = self.flatten(msg)
+        return self.send_bytes(data, recipients, offset)
+    
+    def send_bytes(self, data: bytes, recipients: List[str], offset: int = 0) -> Dict[str, Tuple[int, bytes]]:
+        """Send flattened message bytes, pipelining the envelope when the server allows it
+        
+        With ESMTP PIPELINING (RFC 2920), MAIL FROM, every RCPT TO and DATA
+        go out in one write and their replies are read together, so a
+        message costs two round trips however many recipients it has.
+        Only ``data[offset:]`` is transmitted (see flatten), without copying it.
+        
+        Returns:
+            Dict[str, Tuple[int, bytes]]: recipients the server refused, with its reply
+        """
+        self.ensure_connected()
+        
+        try:
+            if not self.connection.has_extn('pipelining'):
+                refused = self._send_sequential(data, offset, recipients)
+            else:
+                refused = self._send_pipelined(data, offset, recipients)
+            self.last_used = datetime.now()
+            return refused
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The transaction was reset; the session is still usable
+            raise
+        except Exception:
+            # Replies may be out of step with commands now; start over on the next message
+            self.disconnect()
+            raise
+    
+    def flatten(self, msg: Message) -> Tuple[bytes, int]:
+        """Serialize a message once, for both SMTP DATA and the Sent copy
+        
+        Returns:
+            Tuple[bytes, int]: the message with CRLF line ends and any Bcc or
+            Resent-Bcc header first, and the offset where those headers end;
+            ``data[offset:]`` is the message as send_message would transmit it
+        """
+        policy = msg.policy.clone(linesep='\r\n')
+        hidden = [(name, msg[name]) for name in ('Bcc', 'Resent-Bcc') if msg[name] is not None]
+        for name, _ in hidden:
+            del msg[name]
+        try:
+            with io.BytesIO() as buffer:
+                for name, value in hidden:
+                    buffer.write(policy.fold_binary(name, value))
+                offset = buffer.tell()
+                BytesGenerator(buffer, policy=policy).flatten(msg, linesep='\r\n')
+                return buffer.getvalue(), offset
+        finally:
+            for name, value in hidden:
+                msg[name] = value
+    
+    def _send_data(self, data: bytes, offset: int):
+        """Transmit message bytes after a 354 reply, dot-stuffed and terminated"""
+        connection = self.connection
+        if data.startswith(b'.', offset) or data.find(b'\n.', offset) != -1:
+            # Dot-stuffing has to rewrite the message; most messages need none
+            connection.send(smtplib._quote_periods(data[offset:]))
+        else:
+            connection.send(memoryview(data)[offset:])
+        connection.send(b'.\r\n' if data.endswith(b'\r\n') else b'\r\n.\r\n')
+    
+    def _send_sequential(self, data: bytes, offset: int, recipients: List[str]) -> Dict[str, Tuple[int, bytes]]:
+        """MAIL, RCPT and DATA one reply at a time, for servers without PIPELINING"""
+        connection = self.connection
+        sender = self.config.email
+        connection.ehlo_or_helo_if_needed()
+        options = []
+        if connection.does_esmtp and connection.has_extn('size'):
+            options.append(f"size={len(data) - offset}")
+        
+        code, reply = connection.mail(sender, options)
+        if code != 250:
+            connection.rset()
+            raise smtplib.SMTPSenderRefused(code, reply, sender)
+        
+        refused = {}
+        for rcpt in recipients:
+            code, reply = connection.rcpt(rcpt)
+            if code not in (250, 251):
+                refused[rcpt] = (code, reply)
+        if len(refused) == len(recipients):
+            connection.rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
+        
+        connection.putcmd("data")
+        code, reply = connection.getreply()
+        if code != 354:
+            connection.rset()
+            raise smtplib.SMTPDataError(code, reply)
+        
+        self._send_data(data, offset)
+        code, reply = connection.getreply()
+        if code != 250:
+            connection.rset()
+            raise smtplib.SMTPDataError(code, reply)
+        return refused
+    
+    def _send_pipelined(self, data: bytes, offset: int, recipients: List[str]) -> Dict[str, Tuple[int, bytes]]:
+        """One MAIL/RCPT.../DATA group, then the message once DATA is accepted"""
+        connection = self.connection
+        sender = self.config.email
+        mail = f"MAIL FROM:{smtplib.quoteaddr(sender)}"
+        if connection.has_extn('size'):
+            mail += f" SIZE={len(data) - offset}"
+        commands = [mail]
+        commands.extend(f"RCPT TO:{smtplib.quoteaddr(rcpt)}" for rcpt in recipients)
+        commands.append("DATA")
+        connection.send(''.join(f"{command}\r\n" for command in commands))
+        
+        code, reply = connection.getreply()
+        if code != 250:
+            # RCPT and DATA fail too once MAIL is rejected; drain their replies
+            for _ in range(len(recipients) + 1):
+                connection.getreply()
+            connection.rset()
+            raise smtplib.SMTPSenderRefused(code, reply, sender)
+        
+        refused = {}
+        for rcpt in recipients:
+            code, reply = connection.getreply()
+            if code not in (250, 251):
+                refused[rcpt] = (code, reply)
+        
+        code, reply = connection.getreply()
+        if code != 354:
+            connection.rset()
+            if len(refused) == len(recipients):
+                raise smtplib.SMTPRecipientsRefused(refused)
+            raise smtplib.SMTPDataError(code, reply)
+        if len(refused) == len(recipients):
+            # DATA was accepted with no recipients: end it empty (RFC 2920)
+            connection.send(b'.\r\n')
+            connection.getreply()
+            connection.rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
+        
+        self._send_data(data, offset)
+        code, reply = connection.getreply()
+        if code != 250:
+            connection.rset()
+            raise smtplib.SMTPDataError(code, reply)
+        return refused
     
     def _attach_file(self, msg: MIMEMultipart, file_path: str):
         """Attach file to message"""
@@ -0,0 +1,135 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+from ..models.config import EmailConfig
+from .smtp_backend import SMTPBackend, NOOP_INTERVAL
+
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP sessions kept warm between sends
+
+    A session is borrowed for one or more messages and handed back to a
+    background maintainer, which issues RSET so the next borrower starts a
+    clean transaction, and reconnects sessions that broke. Sessions idle for
+    longer than ``idle_timeout`` are closed before the server drops them. A
+    borrower therefore gets a ready session without a NOOP, reconnect,
+    STARTTLS or AUTH on its own path, except when the pool is cold.
+    """
+
+    def __init__(self, config: EmailConfig, max_connections: int = 2, idle_timeout: float = NOOP_INTERVAL):
+        self.config = config
+        self.max_connections = max(1, max_connections)
+        self.idle_timeout = idle_timeout
+        self._idle: "queue.LifoQueue[SMTPBackend]" = queue.LifoQueue()
+        self._returned: "queue.Queue[Optional[SMTPBackend]]" = queue.Queue()
+        self._all: List[SMTPBackend] = []
+        self._lock = threading.Lock()
+        self._maintainer: Optional[threading.Thread] = None
+
+    def _checkout(self, timeout: float = None) -> SMTPBackend:
+        """Take an idle session, creating one if the pool is not full yet"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.max_connections:
+                backend = SMTPBackend(self.config)
+                self._all.append(backend)
+                return backend
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No pooled SMTP connection became available")
+
+    @contextmanager
+    def acquire(self, timeout: float = None) -> Iterator[SMTPBackend]:
+        """Borrow a connected SMTP backend for the duration of a with-block
+
+        The session goes back through the maintainer whether or not the
+        block raised; a refused recipient leaves it usable after RSET, and a
+        broken one is reconnected there rather than by the next borrower.
+        """
+        backend = self._checkout(timeout)
+        try:
+            if backend.connection is None or self._is_stale(backend):
+                backend.disconnect()
+                backend.connect()
+            yield backend
+        finally:
+            self._release(backend)
+
+    def _is_stale(self, backend: SMTPBackend) -> bool:
+        return datetime.now() - backend.last_used > timedelta(seconds=self.idle_timeout)
+
+    def _release(self, backend: SMTPBackend):
+        with self._lock:
+            if self._maintainer is None or not self._maintainer.is_alive():
+                self._maintainer = threading.Thread(target=self._maintain, name="smtp-pool-maintainer",
+                                                    daemon=True)
+                self._maintainer.start()
+        self._returned.put(backend)
+
+    def _maintain(self):
+        """Reset returned sessions and evict idle ones until close_all()"""
+        while True:
+            try:
+                backend = self._returned.get(timeout=max(1.0, self.idle_timeout / 2))
+            except queue.Empty:
+                self._evict_idle()
+                continue
+            if backend is None:
+                return
+            self._refresh(backend)
+            self._idle.put(backend)
+
+    def _refresh(self, backend: SMTPBackend):
+        """RSET a returned session, reconnecting it if that fails"""
+        if backend.connection is not None:
+            try:
+                backend.reset()
+                return
+            except Exception as e:
+                logging.debug(f"Pooled SMTP session failed RSET: {str(e)}, reconnecting")
+                backend.disconnect()
+        try:
+            backend.connect()
+        except Exception as e:
+            # The next borrower connects instead
+            logging.warning(f"Could not re-establish pooled SMTP connection: {str(e)}")
+
+    def _evict_idle(self):
+        """Close sessions that have been idle longer than idle_timeout"""
+        waiting = []
+        while True:
+            try:
+                waiting.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for backend in waiting:
+            if backend.connection is not None and self._is_stale(backend):
+                logging.debug("Closing idle pooled SMTP connection")
+                backend.disconnect()
+        # Put back oldest first so the LIFO queue keeps handing out the warmest session
+        for backend in reversed(waiting):
+            self._idle.put(backend)
+
+    def close_all(self):
+        """Stop the maintainer and disconnect every pooled session"""
+        with self._lock:
+            backends = list(self._all)
+            maintainer = self._maintainer
+            self._maintainer = None
+        if maintainer is not None:
+            self._returned.put(None)
+            maintainer.join(timeout=5)
+        for backend in backends:
+            try:
+                backend.disconnect()
+            except Exception as e:
+                logging.debug(f"Error closing pooled SMTP connection: {str(e)}")
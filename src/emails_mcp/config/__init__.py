@@ -1,3 +1,4 @@
 from .settings import ConfigManager, config_manager
+from .server_profile import ServerProfileStore
 
-__all__ = ['ConfigManager', 'config_manager']
\ No newline at end of file
+__all__ = ['ConfigManager', 'config_manager', 'ServerProfileStore']
\ No newline at end of file
@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ServerProfileStore:
+    """Per-server protocol quirks persisted next to the configuration file
+
+    Profiles are keyed by server (e.g. ``imap://user@host:993``) and hold
+    facts learned from the server, such as which search form it accepts, so
+    that later sessions can skip the probing. Without a path the store only
+    lives in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        """Load profiles from disk, ignoring a missing or corrupt file"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._profiles = data
+        except Exception as e:
+            logging.warning(f"Could not read server profile {self.path}: {str(e)}")
+
+    def _save(self):
+        """Write profiles atomically (caller holds the lock)"""
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._profiles, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"Could not write server profile {self.path}: {str(e)}")
+
+    def get(self, server_key: str) -> Dict[str, Any]:
+        """Get a copy of the profile for a server (empty if unknown)"""
+        with self._lock:
+            return dict(self._profiles.get(server_key, {}))
+
+    def update(self, server_key: str, **values):
+        """Update profile values for a server and persist if anything changed"""
+        with self._lock:
+            profile = self._profiles.setdefault(server_key, {})
+            changed = {k: v for k, v in values.items() if profile.get(k) != v}
+            if not changed:
+                return
+            profile.update(changed)
+            self._save()
+
+
+def profile_path_for_config(config_file: Optional[str]) -> Optional[str]:
+    """Profile file stored next to the config file: config.json -> config.profile.json"""
+    if not config_file:
+        return None
+    config_path = Path(config_file)
+    return str(config_path.with_name(f"{config_path.stem}.profile.json"))
@@ -3,6 +3,7 @@ import os
 from pathlib import Path
 from typing import Optional, List
 from ..models.config import EmailConfig, WorkspaceConfig
+from .server_profile import ServerProfileStore, profile_path_for_config
 
 
 class ConfigManager:
@@ -11,6 +12,7 @@ class ConfigManager:
     def __init__(self):
         self.workspace_config: Optional[WorkspaceConfig] = None
         self.email_config: Optional[EmailConfig] = None
+        self.profile_store: Optional[ServerProfileStore] = None
     
     def load_workspace_config(self, attachment_upload_path: str = None, 
                             attachment_download_path: str = None,
@@ -60,7 +62,11 @@ class ConfigManager:
                 smtp_server=account_data.get('smtp_server', 'localhost'),
                 smtp_port=account_data.get('smtp_port', 587),
                 use_ssl=account_data.get('use_ssl', True),
-                use_starttls=account_data.get('use_starttls', True)
+                use_starttls=account_data.get('use_starttls', True),
+                max_connections=account_data.get('max_connections', 4),
+                folder_search_timeout=account_data.get('folder_search_timeout', 30),
+                smtp_max_connections=account_data.get('smtp_max_connections', 2),
+                smtp_idle_timeout=account_data.get('smtp_idle_timeout', 60)
             )
             
             # Validate required fields
@@ -79,6 +85,21 @@ class ConfigManager:
         """Get email configuration"""
         return self.email_config
     
+    def get_profile_store(self) -> ServerProfileStore:
+        """Get the server profile store kept next to the config file"""
+        if self.profile_store is None:
+            config_file = self.workspace_config.config_file if self.workspace_config else None
+            self.profile_store = ServerProfileStore(profile_path_for_config(config_file))
+        return self.profile_store
+    
+    def get_outbox_path(self) -> Path:
+        """Directory of the queued-send spool, next to the config file (config.json -> config.outbox)"""
+        config_file = self.workspace_config.config_file if self.workspace_config else None
+        if not config_file:
+            return Path.cwd() / 'emails_mcp.outbox'
+        config_path = Path(config_file)
+        return config_path.with_name(f"{config_path.stem}.outbox")
+    
     def validate_attachment_upload_path(self, file_path: str) -> tuple[bool, str]:
         """Validate if file path is within attachment upload path"""
         if not self.workspace_config or not self.workspace_config.attachment_upload_path:
@@ -15,6 +15,10 @@ class EmailConfig:
     smtp_port: int = 587
     use_ssl: bool = True
     use_starttls: bool = True
+    max_connections: int = 4            # Pooled IMAP connections for parallel work
+    folder_search_timeout: int = 30     # Seconds allowed per folder in multi-folder search
+    smtp_max_connections: int = 2       # Pooled SMTP sessions kept warm between sends
+    smtp_idle_timeout: int = 60         # Seconds before an unused SMTP session is closed
 
 
 @dataclass
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 
 
 @dataclass
@@ -30,6 +30,10 @@ class EmailMessage:
     is_important: bool = False
     folder: Optional[str] = None
     raw_message: Optional[Any] = None
+    raw_bytes: Optional[bytes] = None       # Original RFC822 bytes as stored on the server
+    internal_date: Optional[str] = None     # IMAP INTERNALDATE, e.g. "17-Jul-1996 02:44:25 -0700"
+    flags: Optional[List[str]] = None       # IMAP flags as stored on the server
+    uid: Optional[str] = None               # IMAP UID, when fetched by UID
     
     def __post_init__(self):
         if self.attachments is None:
@@ -54,6 +58,7 @@ class SearchResult:
     page_size: int
     query: str
     folder: Optional[str] = None
+    failed_folders: Optional[Dict[str, str]] = None   # Folder -> reason, for multi-folder search
     
     @property
     def total_pages(self) -> int:
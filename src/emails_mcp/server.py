@@ -6,7 +6,7 @@ from mcp.server.fastmcp import FastMCP
 from .config import config_manager
 from .services import EmailService, FolderService, SearchService, DraftService
 from .backends import IMAPBackend, SMTPBackend, FileBackend
-from .tools import register_email_tools, register_folder_tools, register_management_tools
+from .tools import register_email_tools, register_folder_tools, register_management_tools, register_search_tools
 
 
 def setup_logging(debug: bool = False):
@@ -34,7 +34,9 @@ def create_services(email_config):
     # Create services
     email_service = EmailService(email_config)
     folder_service = FolderService(imap_backend)
-    search_service = SearchService(imap_backend)
+    # Search shares the email service connection so returned IDs refer to
+    # the folder selected for read_email/move_email
+    search_service = SearchService(email_service.imap_backend)
     draft_service = DraftService(file_backend)
     
     return email_service, folder_service, search_service, draft_service
@@ -109,6 +111,7 @@ def main():
         register_email_tools(mcp, email_service)
         register_folder_tools(mcp, folder_service)
         register_management_tools(mcp, draft_service, email_service)
+        register_search_tools(mcp, search_service)
         
         logger.info("All MCP tools registered successfully")
         
@@ -136,6 +139,12 @@ def main():
         except Exception as e:
             logger.warning(f"Connection test failed: {str(e)}")
         
+        # Deliver emails queued before the last shutdown
+        try:
+            email_service.outbox.resume()
+        except Exception as e:
+            logger.warning(f"Could not resume queued emails: {str(e)}")
+        
         # Start the MCP server
         logger.info("Starting emails MCP server...")
         mcp.run(transport='stdio')
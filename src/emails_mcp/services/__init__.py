@@ -2,5 +2,10 @@ from .email_service import EmailService
 from .folder_service import FolderService  
 from .search_service import SearchService
 from .draft_service import DraftService
+from .export_service import ExportService
+from .import_service import ImportService
+from .outbox_service import OutboxService
+from .sent_copy_service import SentCopyService
 
-__all__ = ['EmailService', 'FolderService', 'SearchService', 'DraftService']
\ No newline at end of file
+__all__ = ['EmailService', 'FolderService', 'SearchService', 'DraftService', 'ExportService', 'ImportService',
+           'OutboxService', 'SentCopyService']
\ No newline at end of file
@@ -1,13 +1,21 @@
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import queue
+import time
 from ..models.config import EmailConfig
 from ..models.email import EmailMessage, SearchResult
 from ..backends.imap_backend import IMAPBackend
-from ..backends.smtp_backend import SMTPBackend
+from ..backends.imap_pool import IMAPConnectionPool
+from ..backends.outbox_spool import OutboxSpool
+from ..backends.smtp_pool import SMTPConnectionPool
+from ..config import config_manager
 from ..utils.exceptions import EmailMCPError, ValidationError
 from ..utils.validators import validate_page_params, validate_search_query
 from ..utils.email_parser import format_email_summary
+from .outbox_service import OutboxService
+from .sent_copy_service import SentCopyService
 
 
 class EmailService:
@@ -16,7 +24,39 @@ class EmailService:
     def __init__(self, email_config: EmailConfig):
         self.config = email_config
         self.imap_backend = IMAPBackend(email_config)
-        self.smtp_backend = SMTPBackend(email_config)
+        self._imap_pool: Optional[IMAPConnectionPool] = None
+        self._smtp_pool: Optional[SMTPConnectionPool] = None
+        self._outbox: Optional[OutboxService] = None
+        self._sent_copies: Optional[SentCopyService] = None
+    
+    @property
+    def imap_pool(self) -> IMAPConnectionPool:
+        """Extra IMAP connections for parallel work, opened on first use"""
+        if self._imap_pool is None:
+            self._imap_pool = IMAPConnectionPool(self.config, self.config.max_connections)
+        return self._imap_pool
+    
+    @property
+    def smtp_pool(self) -> SMTPConnectionPool:
+        """Warm SMTP sessions shared by every send, opened on first use"""
+        if self._smtp_pool is None:
+            self._smtp_pool = SMTPConnectionPool(self.config, self.config.smtp_max_connections,
+                                                 self.config.smtp_idle_timeout)
+        return self._smtp_pool
+    
+    @property
+    def outbox(self) -> OutboxService:
+        """Spool and background worker for queued sends, created on first use"""
+        if self._outbox is None:
+            self._outbox = OutboxService(self, OutboxSpool(config_manager.get_outbox_path()))
+        return self._outbox
+    
+    @property
+    def sent_copies(self) -> SentCopyService:
+        """Background saving of sent emails to the Sent folder, created on first use"""
+        if self._sent_copies is None:
+            self._sent_copies = SentCopyService(self)
+        return self._sent_copies
     
     def get_emails(self, folder: str = "INBOX", page: int = 1, page_size: int = 20) -> SearchResult:
         """Get paginated emails from folder"""
@@ -72,9 +112,11 @@ class EmailService:
         except Exception as e:
             raise EmailMCPError(f"Failed to get emails: {str(e)}")
     
-    def read_email(self, email_id: str) -> EmailMessage:
-        """Read specific email by ID"""
+    def read_email(self, email_id: str, folder: Optional[str] = None) -> EmailMessage:
+        """Read specific email by ID (in the given folder, else the current one)"""
         try:
+            if folder:
+                self.imap_backend.select_folder(folder)
             email_obj = self.imap_backend.fetch_email(email_id)
             
             # Mark as read
@@ -146,54 +188,286 @@ class EmailService:
         except Exception as e:
             raise EmailMCPError(f"Failed to search emails: {str(e)}")
     
+    def search_folders(self, query: str, folders: Optional[List[str]] = None,
+                       page: int = 1, page_size: int = 20) -> SearchResult:
+        """Search several folders in parallel and merge the results by date
+        
+        Each folder is searched on its own pooled connection under its own
+        timeout, which starts once the folder has a connection, so the whole
+        search takes about as long as the slowest folders rather than the
+        sum of all. Folders that fail or time out are left out of the
+        results and reported in failed_folders.
+        """
+        try:
+            # Validate query
+            valid, error = validate_search_query(query)
+            if not valid:
+                raise ValidationError(error)
+            
+            # Validate parameters
+            page, page_size, warning = validate_page_params(page, page_size)
+            
+            if not folders:
+                folders = self.imap_backend.list_folder_names()
+            timeout = self.config.folder_search_timeout
+            
+            # Phase 1: matching IDs and their INTERNALDATE, per folder
+            hits: List[Tuple[float, str, str]] = []
+            failed_folders: Dict[str, str] = {}
+            executor = ThreadPoolExecutor(max_workers=self.imap_pool.max_connections)
+            try:
+                futures = {
+                    executor.submit(self._search_folder, query, folder, timeout): folder
+                    for folder in folders
+                }
+                for future in as_completed(futures):
+                    folder = futures[future]
+                    try:
+                        hits.extend(future.result())
+                    except Exception as e:
+                        logging.warning(f"Search in folder '{folder}' failed: {str(e)}")
+                        failed_folders[folder] = str(e) or type(e).__name__
+            finally:
+                # If collecting failed, searches still queued or running are not waited for
+                executor.shutdown(wait=False, cancel_futures=True)
+            
+            # Newest first across all folders
+            hits.sort(key=lambda hit: hit[0], reverse=True)
+            total_results = len(hits)
+            folder_label = ", ".join(folders)
+            
+            if total_results == 0:
+                return SearchResult(
+                    emails=[],
+                    total_results=0,
+                    current_page=1,
+                    page_size=page_size,
+                    query=query,
+                    folder=folder_label,
+                    failed_folders=failed_folders or None
+                )
+            
+            # Calculate pagination
+            total_pages = (total_results + page_size - 1) // page_size
+            if page > total_pages:
+                page = total_pages
+            
+            start_idx = (page - 1) * page_size
+            page_hits = hits[start_idx:start_idx + page_size]
+            
+            # Phase 2: headers for the page only, one batched FETCH per folder
+            page_ids: Dict[str, List[str]] = {}
+            for _, folder, email_id in page_hits:
+                page_ids.setdefault(folder, []).append(email_id)
+            
+            fetched: Dict[Tuple[str, str], EmailMessage] = {}
+            with ThreadPoolExecutor(max_workers=self.imap_pool.max_connections) as executor:
+                futures = {
+                    executor.submit(self._fetch_folder_summaries, folder, email_ids, timeout): folder
+                    for folder, email_ids in page_ids.items()
+                }
+                for future in as_completed(futures):
+                    folder = futures[future]
+                    try:
+                        for email_obj in future.result():
+                            fetched[(folder, email_obj.email_id)] = email_obj
+                    except Exception as e:
+                        logging.error(f"Failed to fetch search results from '{folder}': {str(e)}")
+            
+            emails = [fetched[(folder, email_id)] for _, folder, email_id in page_hits
+                      if (folder, email_id) in fetched]
+            
+            return SearchResult(
+                emails=emails,
+                total_results=total_results,
+                current_page=page,
+                page_size=page_size,
+                query=query,
+                folder=folder_label,
+                failed_folders=failed_folders or None
+            )
+            
+        except Exception as e:
+            raise EmailMCPError(f"Failed to search folders: {str(e)}")
+    
+    def _search_folder(self, query: str, folder: str, timeout: float) -> List[Tuple[float, str, str]]:
+        """Search one folder on a pooled connection within ``timeout`` seconds
+        
+        The timeout starts once a connection is acquired and covers the
+        SEARCH and the date FETCH. A timed-out connection is dropped by the
+        pool without CLOSE/LOGOUT, so the folder gives up on time.
+        
+        Returns [(internal date, folder, email_id)].
+        """
+        with self.imap_pool.acquire() as backend:
+            deadline = time.monotonic() + timeout
+            
+            def remaining() -> float:
+                seconds = deadline - time.monotonic()
+                if seconds <= 0:
+                    raise TimeoutError(f"Timed out after {timeout}s")
+                return seconds
+            
+            try:
+                backend.set_timeout(remaining())
+                email_ids = backend.search_emails(query, folder)
+                backend.set_timeout(remaining())
+                dates = backend.fetch_internal_dates(email_ids)
+            except Exception:
+                # The backend wraps socket timeouts in its own errors
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out after {timeout}s")
+                raise
+            finally:
+                backend.set_timeout(None)
+        
+        return [(dates.get(email_id, 0.0), folder, email_id) for email_id in email_ids]
+    
+    def _fetch_folder_summaries(self, folder: str, email_ids: List[str],
+                                timeout: float) -> List[EmailMessage]:
+        """Fetch header summaries for emails of one folder on a pooled connection"""
+        with self.imap_pool.acquire() as backend:
+            backend.set_timeout(timeout)
+            try:
+                backend.select_folder(folder)
+                return backend.fetch_summaries(email_ids)
+            finally:
+                backend.set_timeout(None)
+    
     def send_email(self, to: str, subject: str, body: str,
                    html_body: Optional[str] = None,
                    cc: Optional[str] = None,
                    bcc: Optional[str] = None,
                    attachments: Optional[List[str]] = None,
-                   save_to_sent: bool = True) -> bool:
-        """Send email and optionally save to Sent folder"""
+                   save_to_sent: bool = True) -> Tuple[bool, Optional[str]]:
+        """Send email and optionally save to Sent folder
+        
+        The Sent copy is appended in the background after this returns; its
+        outcome is reported by ``sent_copies.status()``.
+        
+        Returns:
+            Tuple[bool, Optional[str]]: (success, ID of the queued Sent copy or None)
+        """
         try:
-            # Send the email first
-            success, message_string = self.smtp_backend.send_email(
-                to=to,
-                subject=subject,
-                body=body,
-                html_body=html_body,
-                cc=cc,
-                bcc=bcc,
-                attachments=attachments
-            )
+            # Send the email first, on a warm pooled session
+            with self.smtp_pool.acquire() as smtp_backend:
+                success, message_bytes = smtp_backend.send_email(
+                    to=to,
+                    subject=subject,
+                    body=body,
+                    html_body=html_body,
+                    cc=cc,
+                    bcc=bcc,
+                    attachments=attachments
+                )
             
             # If sending was successful and save_to_sent is True, save to Sent folder
-            if success and save_to_sent and message_string:
-                try:
-                    # Try common sent folder names
-                    sent_folders = ["Sent", "INBOX.Sent", "Sent Messages", "Sent Items"]
-                    saved = False
-                    
-                    for folder in sent_folders:
-                        try:
-                            self.imap_backend.append_message(folder, message_string)
-                            saved = True
-                            logging.info(f"Email saved to {folder} folder")
-                            break
-                        except Exception as e:
-                            logging.debug(f"Failed to save to {folder}: {str(e)}")
-                            continue
-                    
-                    if not saved:
-                        logging.warning("Could not save email to any Sent folder")
-                
-                except Exception as e:
-                    logging.error(f"Error saving email to Sent folder: {str(e)}")
-                    # Don't fail the whole operation if saving to Sent fails
+            sent_copy_id = None
+            if success and save_to_sent and message_bytes:
+                # The buffer that went out over SMTP, Bcc header included
+                sent_copy_id = self.sent_copies.submit(message_bytes, to, subject)['id']
             
-            return success
+            return success, sent_copy_id
             
         except Exception as e:
             raise EmailMCPError(f"Failed to send email: {str(e)}")
     
+    def queue_email(self, to: str, subject: str, body: str,
+                    html_body: Optional[str] = None,
+                    cc: Optional[str] = None,
+                    bcc: Optional[str] = None,
+                    attachments: Optional[List[str]] = None,
+                    save_to_sent: bool = True) -> Dict[str, Any]:
+        """Write an email to the outbox spool for background delivery; returns its entry"""
+        return self.outbox.enqueue(to, subject, body, html_body, cc, bcc, attachments, save_to_sent)
+    
+    def save_to_sent_folder(self, imap_backend: IMAPBackend, message) -> Optional[str]:
+        """Append a sent message to the server's Sent folder; returns that folder"""
+        folder = imap_backend.get_special_folders().get('\\Sent')
+        if not folder:
+            logging.warning("Could not save email: the server has no Sent folder")
+            return None
+        
+        if imap_backend.append_message(folder, message):
+            logging.info(f"Email saved to {folder} folder")
+            return folder
+        
+        logging.warning(f"Could not save email to Sent folder {folder}")
+        return None
+    
+    def send_bulk(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send many messages concurrently over the pooled SMTP sessions
+        
+        Each sender holds one session for as long as there are messages left,
+        so the batch goes out over ``smtp_max_connections`` connections at
+        once, with PIPELINING where the server offers it. Bulk messages are
+        not copied to the Sent folder.
+        
+        Args:
+            messages: Message specs with 'to', 'subject' and 'body', and
+                optionally 'html_body', 'cc', 'bcc' and 'attachments'
+        
+        Returns:
+            One result per message, in input order: 'to', 'status' ('sent' or
+            'failed'), 'refused' (recipient -> server reply, for recipients
+            the server rejected while accepting the others) and 'error'
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        pending: "queue.Queue[int]" = queue.Queue()
+        for index in range(len(messages)):
+            pending.put(index)
+        
+        def sender():
+            with self.smtp_pool.acquire() as smtp_backend:
+                while True:
+                    try:
+                        index = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    results[index] = self._send_bulk_message(smtp_backend, messages[index])
+        
+        connection_errors = []
+        workers = min(self.smtp_pool.max_connections, len(messages))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for future in as_completed([executor.submit(sender) for _ in range(workers)]):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Bulk sender stopped: {str(e)}")
+                    connection_errors.append(str(e))
+        
+        # Messages no sender got to because every connection failed
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = {'to': messages[index].get('to'), 'status': 'failed', 'refused': {},
+                                  'error': f"Not sent: {connection_errors[0] if connection_errors else 'no connection'}"}
+        return results
+    
+    @staticmethod
+    def _send_bulk_message(smtp_backend, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one bulk message spec on a borrowed session; never raises"""
+        result = {'to': spec.get('to'), 'status': 'failed', 'refused': {}, 'error': None}
+        try:
+            msg, recipients = smtp_backend.build_message(
+                to=spec['to'],
+                subject=spec.get('subject', ''),
+                body=spec.get('body', ''),
+                html_body=spec.get('html_body'),
+                cc=spec.get('cc'),
+                bcc=spec.get('bcc'),
+                attachments=spec.get('attachments')
+            )
+            refused = smtp_backend.send_prepared(msg, recipients)
+            result['status'] = 'sent'
+            result['refused'] = {rcpt: f"{code} {reply.decode('utf-8', 'replace')}"
+                                 for rcpt, (code, reply) in refused.items()}
+        except KeyError as e:
+            result['error'] = f"Missing required field: {str(e)}"
+        except Exception as e:
+            logging.error(f"Error sending bulk email to {spec.get('to')}: {str(e)}")
+            result['error'] = str(e)
+        return result
+    
     def reply_email(self, email_id: str, body: str,
                    html_body: Optional[str] = None,
                    cc: Optional[str] = None,
@@ -238,7 +512,7 @@ class EmailService:
                 full_html_body = f"{html_body}<br><br><hr><b>Original Message:</b><br>From: {original_email.from_addr}<br>Date: {original_email.date}<br>Subject: {original_subject}<br><br>{original_html}"
             
             # Send reply
-            return self.send_email(
+            success, _ = self.send_email(
                 to=reply_to,
                 subject=reply_subject,
                 body=full_body,
@@ -246,6 +520,7 @@ class EmailService:
                 cc=reply_cc,
                 bcc=bcc
             )
+            return success
             
         except Exception as e:
             raise EmailMCPError(f"Failed to reply to email: {str(e)}")
@@ -297,7 +572,7 @@ class EmailService:
         try:
             if not original_email or not original_email.attachments:
                 # No attachments, use regular send_email
-                return self.send_email(
+                success, _ = self.send_email(
                     to=to,
                     subject=subject,
                     body=body,
@@ -305,6 +580,7 @@ class EmailService:
                     cc=cc,
                     bcc=bcc
                 )
+                return success
             
             # Extract attachment data from original email's raw message
             import tempfile
@@ -329,7 +605,7 @@ class EmailService:
                                     temp_files.append(temp_file_path)
                 
                 # Send email with temporary attachment files
-                success = self.send_email(
+                success, _ = self.send_email(
                     to=to,
                     subject=subject,
                     body=body,
@@ -409,24 +685,39 @@ class EmailService:
         return success_count
     
     def check_connection(self) -> Tuple[bool, bool]:
-        """Check IMAP and SMTP connections"""
-        imap_ok = False
-        smtp_ok = False
+        """Check IMAP and SMTP connections
         
-        try:
-            self.imap_backend.ensure_connected()
-            imap_ok = True
-        except:
-            pass
+        The two handshakes are independent, so they run concurrently and a
+        cold start waits for the slower one instead of both in sequence.
+        """
+        def check_imap() -> bool:
+            try:
+                self.imap_backend.ensure_connected()
+                return True
+            except:
+                return False
         
-        try:
-            smtp_ok = self.smtp_backend.test_connection()
-        except:
-            pass
+        def check_smtp() -> bool:
+            try:
+                # Borrowing a session connects it, which also warms the pool for the next send
+                with self.smtp_pool.acquire():
+                    return True
+            except:
+                return False
         
-        return imap_ok, smtp_ok
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            imap_future = executor.submit(check_imap)
+            smtp_future = executor.submit(check_smtp)
+            return imap_future.result(), smtp_future.result()
     
     def cleanup(self):
         """Cleanup connections"""
         self.imap_backend.disconnect()
-        self.smtp_backend.disconnect()
\ No newline at end of file
+        if self._outbox is not None:
+            self._outbox.stop()
+        if self._sent_copies is not None:
+            self._sent_copies.stop()
+        if self._smtp_pool is not None:
+            self._smtp_pool.close_all()
+        if self._imap_pool is not None:
+            self._imap_pool.close_all()
\ No newline at end of file
@@ -0,0 +1,377 @@
+import logging
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..backends.file_backend import FileBackend, RESUMABLE_FORMATS
+from ..utils.exceptions import EmailMCPError
+
+# A UID FETCH batch ends at whichever limit is reached first
+EXPORT_BATCH_SIZE = 200
+EXPORT_BATCH_BYTES = 32 * 1024 * 1024
+
+# Batches a worker may fetch ahead of the writer, per folder
+FOLDER_QUEUE_DEPTH = 2
+
+# Version of the export checkpoint layout
+CHECKPOINT_VERSION = 1
+
+# Version of the export manifest layout
+MANIFEST_VERSION = 1
+
+# How often blocked workers check whether the export was cancelled
+_CANCEL_POLL_SECONDS = 0.5
+
+
+def _uid_batches(uid_sizes: List[Tuple[int, int]]) -> List[List[int]]:
+    """Split (UID, size) pairs into FETCH batches bounded by count and bytes"""
+    batches, batch, batch_bytes = [], [], 0
+    for uid, size in uid_sizes:
+        if batch and (len(batch) >= EXPORT_BATCH_SIZE or batch_bytes + size > EXPORT_BATCH_BYTES):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(uid)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class ExportService:
+    """Parallel streaming email export
+
+    One worker per pooled IMAP connection takes folders from a queue and
+    fetches them in large UID batches. Batches are handed to the calling
+    thread, the only one that touches the export writer, which drains the
+    folders in their requested order. Each folder buffers at most a couple
+    of batches ahead of the writer, so memory use does not depend on the
+    size of the mailbox, and the output is the same as a sequential export.
+
+    Exports in a resumable format keep a checkpoint next to the output with
+    each folder's UIDVALIDITY and last exported UID, updated after every
+    batch. Running an interrupted export again continues from it.
+
+    Every complete export records each folder's UIDVALIDITY, last exported
+    UID and HIGHESTMODSEQ in a manifest, from which an incremental export
+    fetches only newer messages and, with CONDSTORE, the flag changes.
+    """
+
+    def __init__(self, email_service, file_backend: FileBackend):
+        self.email_service = email_service
+        self.file_backend = file_backend
+
+    def export_folders(self, folders: List[str], filename_prefix: str, format: str = 'jsonl',
+                       max_emails: Optional[int] = None, attachment_blobs: bool = False,
+                       compression_level: Optional[int] = None, include_raw: bool = False,
+                       resume: bool = True, incremental: bool = False) -> Dict[str, Any]:
+        """Export folders to a single file
+
+        Within each folder emails are written oldest first, so the export can
+        be imported in file order. With ``max_emails`` the newest emails are
+        kept, as before. ``attachment_blobs`` stores attachments once in the
+        shared blob directory instead of inline. ``compression_level`` applies
+        to the compressed formats (jsonl.gz, jsonl.xz, tar.gz). ``include_raw``
+        keeps the original message bytes, INTERNALDATE and flags in JSON
+        records so they can be restored byte for byte.
+
+        For json and jsonl formats, if a checkpoint from an earlier run with
+        the same prefix, format and options exists, that export is continued:
+        complete folders are skipped and partial ones fetch only UIDs after
+        the last exported one (the whole folder again if its UIDVALIDITY
+        changed). The checkpoint is removed once every folder is complete.
+        ``resume=False`` discards it and starts a new export.
+
+        With ``incremental``, only messages after the UIDs recorded in the
+        manifest of the last complete export with this prefix are exported
+        (a folder whose UIDVALIDITY changed is exported in full). On servers
+        with CONDSTORE, flags changed since then on older messages are
+        written to a small ``.flags.jsonl`` file next to the export.
+
+        Returns:
+            Dict with 'path', 'total_emails', 'folders' (name -> exported
+            count), 'status' (name -> 'complete', 'failed' or 'skipped'),
+            'errors' (name -> error for folders that failed), 'resumed',
+            'checkpoint' (path to resume from, or None if complete),
+            'incremental' (whether a manifest was used), 'flag_changes'
+            (number of changed messages) and 'flag_changes_path'
+        """
+        format = format.lower()
+        options = {
+            'folders': folders,
+            'max_emails': max_emails,
+            'attachment_blobs': attachment_blobs,
+            'compression_level': compression_level,
+            'include_raw': include_raw,
+            'incremental': incremental
+        }
+        checkpointed = format in RESUMABLE_FORMATS
+        job = self._load_job(filename_prefix, format, options) if checkpointed and resume else None
+        resumed = job is not None
+        if job is None:
+            job = {'version': CHECKPOINT_VERSION, 'options': options, 'path': None,
+                   'position': None, 'folders': {}}
+
+        folder_stats: Dict[str, int] = {}
+        folder_status: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+
+        todo = [index for index, folder in enumerate(folders)
+                if not job['folders'].get(folder, {}).get('complete')]
+        pending: "queue.Queue[int]" = queue.Queue()
+        for index in todo:
+            pending.put(index)
+        feeds = {index: queue.Queue(maxsize=FOLDER_QUEUE_DEPTH) for index in todo}
+        resume_points = {folder: (state['uidvalidity'], state['last_uid'])
+                         for folder, state in job['folders'].items() if not state.get('complete')}
+        manifest = self.file_backend.load_manifest(filename_prefix) if incremental else None
+        baselines = {folder: (entry.get('uidvalidity'), entry.get('last_uid', 0), entry.get('highestmodseq'))
+                     for folder, entry in (manifest or {}).get('folders', {}).items()}
+        cancel = threading.Event()
+
+        worker_count = min(self.email_service.imap_pool.max_connections, len(todo))
+        workers = [
+            threading.Thread(target=self._export_worker,
+                             args=(folders, pending, feeds, cancel, max_emails, resume_points, baselines),
+                             name=f"export-worker-{n}", daemon=True)
+            for n in range(worker_count)
+        ]
+
+        try:
+            header = {'folders': folders}
+            resume_from = dict(job['position'], path=job['path']) if resumed else None
+            with self.file_backend.open_export_writer(filename_prefix, format, header,
+                                                      attachment_blobs=attachment_blobs,
+                                                      compression_level=compression_level,
+                                                      include_raw=include_raw,
+                                                      resume=resume_from) as writer:
+                job['path'] = str(writer.path)
+
+                def save_progress(force: bool = True):
+                    if checkpointed:
+                        position = writer.checkpoint(force)
+                        if position is None:
+                            return
+                        job['position'] = position
+                        self.file_backend.save_checkpoint(filename_prefix, format, job)
+
+                save_progress()
+                for worker in workers:
+                    worker.start()
+
+                for index, folder in enumerate(folders):
+                    state = job['folders'].get(folder)
+                    if state is not None and state.get('complete'):
+                        folder_stats[folder] = state['exported']
+                        folder_status[folder] = 'complete'
+                        continue
+                    remaining = max_emails - writer.count if max_emails else None
+                    if remaining is not None and remaining <= 0:
+                        folder_status[folder] = 'skipped'
+                        continue
+                    error = self._write_folder(folder, feeds[index], writer, remaining, job, save_progress)
+                    if error is not None:
+                        logging.error(f"Error exporting folder {folder}: {error}")
+                        errors[folder] = error
+                        folder_status[folder] = 'failed'
+                    else:
+                        folder_stats[folder] = job['folders'][folder]['exported']
+                        folder_status[folder] = 'complete'
+
+            incomplete = checkpointed and bool(errors)
+            if checkpointed and not incomplete:
+                self.file_backend.remove_checkpoint(filename_prefix, format)
+
+            flag_changes = [
+                {'folder': folder, 'uid': uid, 'flags': flags}
+                for folder in folders if folder_status.get(folder) == 'complete'
+                for uid, flags in job['folders'][folder].get('flag_changes', [])
+            ]
+            flag_changes_path = None
+            if flag_changes:
+                flag_changes_path = self.file_backend.write_flag_changes(str(writer.path), flag_changes)
+            if not incomplete:
+                self._update_manifest(filename_prefix, str(writer.path), job, folder_status)
+
+            return {
+                'path': str(writer.path),
+                'total_emails': writer.count,
+                'folders': folder_stats,
+                'status': folder_status,
+                'errors': errors,
+                'resumed': resumed,
+                'checkpoint': str(self.file_backend.checkpoint_path(filename_prefix, format)) if incomplete else None,
+                'incremental': manifest is not None,
+                'flag_changes': len(flag_changes),
+                'flag_changes_path': flag_changes_path
+            }
+
+        except Exception as e:
+            if checkpointed and job['position'] is not None:
+                raise EmailMCPError(f"Failed to export emails: {str(e)} "
+                                    f"(progress is checkpointed; run the same export again to resume)")
+            raise EmailMCPError(f"Failed to export emails: {str(e)}")
+
+        finally:
+            cancel.set()
+            for worker in workers:
+                if worker.is_alive():
+                    worker.join()
+
+    def _load_job(self, filename_prefix: str, format: str,
+                  options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The checkpoint to resume from, or None if there is no usable one"""
+        job = self.file_backend.load_checkpoint(filename_prefix, format)
+        if job is None:
+            return None
+        if job.get('version') != CHECKPOINT_VERSION or job.get('options') != options:
+            logging.info(f"Export options changed, not resuming the checkpointed {filename_prefix} export")
+            return None
+        if not job.get('position') or not job.get('path') or not Path(job['path']).exists():
+            return None
+        return job
+
+    def _update_manifest(self, filename_prefix: str, export_path: str, job: Dict[str, Any],
+                         folder_status: Dict[str, str]) -> None:
+        """Record the high-water marks of the folders this export completed"""
+        manifest = self.file_backend.load_manifest(filename_prefix) or {}
+        if manifest.get('version') != MANIFEST_VERSION:
+            manifest = {'version': MANIFEST_VERSION, 'folders': {}}
+        for folder, status in folder_status.items():
+            if status != 'complete':
+                continue
+            state = job['folders'][folder]
+            manifest['folders'][folder] = {
+                'uidvalidity': state['uidvalidity'],
+                'last_uid': state['last_uid'],
+                'highestmodseq': state.get('highestmodseq')
+            }
+        manifest['updated'] = datetime.now().isoformat()
+        manifest['last_export'] = export_path
+        self.file_backend.save_manifest(filename_prefix, manifest)
+
+    def _write_folder(self, folder: str, feed: queue.Queue, writer, limit: Optional[int],
+                      job: Dict[str, Any], save_progress: Callable[..., None]) -> Optional[str]:
+        """Drain one folder's batches into the writer, checkpointing after each
+
+        The writer may skip a batch's checkpoint; the folder's start and end
+        are always checkpointed, so the position a folder starts at is exact.
+
+        Returns the folder's error, if any; a failed folder's records are
+        removed again when the writer can rewind. Workers fetch at most
+        ``max_emails`` per folder; with a smaller remaining ``limit`` the
+        oldest of those are skipped here.
+        """
+        state = job['folders'].get(folder)
+        written, skip = 0, 0
+        while True:
+            item = feed.get()
+            kind = item[0]
+            if kind == 'total':
+                _, total, folder_state, resumed, after_uid, flag_changes = item
+                if state is not None and not resumed:
+                    # UIDVALIDITY changed, so the UIDs exported so far mean nothing
+                    writer.rewind(state['start'])
+                    job['position'] = state['start']
+                    state = None
+                if state is None:
+                    skip = max(0, total - limit) if limit is not None else 0
+                    state = {'uidvalidity': folder_state['uidvalidity'],
+                             'highestmodseq': folder_state['highestmodseq'],
+                             'last_uid': after_uid, 'exported': 0, 'complete': False,
+                             'flag_changes': flag_changes, 'start': job['position']}
+                    job['folders'][folder] = state
+                    save_progress()
+            elif kind == 'batch':
+                _, emails, last_uid = item
+                for email_obj in emails:
+                    if skip:
+                        skip -= 1
+                        continue
+                    if limit is not None and written >= limit:
+                        break
+                    writer.write(email_obj)
+                    written += 1
+                    state['exported'] += 1
+                state['last_uid'] = last_uid
+                save_progress(force=False)
+            elif kind == 'error':
+                if state is not None and state['start'] is not None:
+                    # Later folders will be written after this one, so its
+                    # partial records are dropped and it is fetched again
+                    # in full on resume; only an interruption leaves a tail
+                    writer.rewind(state['start'])
+                    del job['folders'][folder]
+                    save_progress()
+                return item[1]
+            else:
+                state['complete'] = True
+                save_progress()
+                return None
+
+    def _export_worker(self, folders: List[str], pending: queue.Queue, feeds: Dict[int, queue.Queue],
+                       cancel: threading.Event, max_emails: Optional[int],
+                       resume_points: Dict[str, Tuple[Optional[int], int]],
+                       baselines: Dict[str, Tuple[Optional[int], int, Optional[int]]]) -> None:
+        """Export folders from the queue until it is empty or the export is cancelled"""
+        while not cancel.is_set():
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            feed = feeds[index]
+            folder = folders[index]
+            try:
+                self._fetch_folder(folder, feed, cancel, max_emails, resume_points.get(folder),
+                                   baselines.get(folder))
+                self._put(feed, ('done',), cancel)
+            except Exception as e:
+                self._put(feed, ('error', str(e)), cancel)
+
+    def _fetch_folder(self, folder: str, feed: queue.Queue, cancel: threading.Event,
+                      limit: Optional[int], resume_point: Optional[Tuple[Optional[int], int]],
+                      baseline: Optional[Tuple[Optional[int], int, Optional[int]]]) -> None:
+        """Fetch one folder in UID batches, oldest first, into its feed
+
+        With a resume point whose UIDVALIDITY still matches, only UIDs after
+        the last exported one are fetched; likewise for an incremental
+        baseline, which also yields the flag changes since its mod-sequence.
+        """
+        with self.email_service.imap_pool.acquire() as imap_backend:
+            state = imap_backend.open_folder(folder)
+            uidvalidity = state['uidvalidity']
+            resumed = resume_point is not None and uidvalidity is not None and resume_point[0] == uidvalidity
+            since = baseline is not None and uidvalidity is not None and baseline[0] == uidvalidity
+
+            after_uid = resume_point[1] if resumed else baseline[1] if since else 0
+            uid_sizes = imap_backend.fetch_uid_sizes(after_uid + 1) if state['exists'] else []
+            if limit and not resumed:
+                uid_sizes = uid_sizes[-limit:]
+
+            # A resumed folder already recorded its flag changes
+            flag_changes = []
+            if since and not resumed and baseline[2] and state['highestmodseq'] \
+                    and state['highestmodseq'] > baseline[2]:
+                flag_changes = imap_backend.fetch_flag_changes(baseline[1], baseline[2])
+            self._put(feed, ('total', len(uid_sizes), state, resumed, after_uid, flag_changes), cancel)
+
+            for batch in _uid_batches(uid_sizes):
+                if cancel.is_set():
+                    return
+                emails = imap_backend.fetch_messages(batch)
+                if len(emails) < len(batch):
+                    logging.error(f"Failed to fetch {len(batch) - len(emails)} emails from {folder}")
+                for email_obj in emails:
+                    email_obj.folder = folder
+                self._put(feed, ('batch', emails, batch[-1]), cancel)
+
+    @staticmethod
+    def _put(feed: queue.Queue, item, cancel: threading.Event) -> None:
+        """Hand an item to the writer, giving up if the export is cancelled"""
+        while not cancel.is_set():
+            try:
+                feed.put(item, timeout=_CANCEL_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
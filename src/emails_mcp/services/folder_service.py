@@ -96,9 +96,10 @@ class FolderService:
         if not valid:
             raise FolderError(error)
         
-        # Prevent deletion of system folders
+        # Prevent deletion of system folders, by common name and by the server's special-use roles
         system_folders = ['INBOX', 'Sent', 'Drafts', 'Trash', 'Spam']
-        if folder_name.strip() in system_folders:
+        system_folders.extend(self.imap_backend.get_special_folders().values())
+        if folder_name.strip() in system_folders or folder_name.strip().upper() == 'INBOX':
             raise FolderError(f"Cannot delete system folder: {folder_name}")
         
         try:
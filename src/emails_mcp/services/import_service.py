@@ -0,0 +1,408 @@
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from ..backends.file_backend import FileBackend, parse_import_record, parse_raw_import
+from ..backends.imap_backend import special_use_role_for_name
+from ..models.email import EmailMessage
+from ..utils.exceptions import EmailMCPError
+from ..utils.message_ids import MessageIdSet
+from ..utils.parallel import DEFAULT_PROCESSES, ordered_parallel_map
+from .folder_service import FolderService
+
+# Messages queued per APPEND worker ahead of its connection
+APPEND_QUEUE_DEPTH = 32
+
+
+def reconstruct_email_message(email_obj: EmailMessage) -> str:
+    """Reconstruct email message from EmailMessage object"""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.utils import formatdate
+
+    # Create message
+    if email_obj.body_html:
+        msg = MIMEMultipart('alternative')
+        msg.attach(MIMEText(email_obj.body_text or '', 'plain', 'utf-8'))
+        msg.attach(MIMEText(email_obj.body_html, 'html', 'utf-8'))
+    else:
+        msg = MIMEText(email_obj.body_text or '', 'plain', 'utf-8')
+
+    # Set headers
+    msg['Subject'] = email_obj.subject or ''
+    msg['From'] = email_obj.from_addr or ''
+    msg['To'] = email_obj.to_addr or ''
+    if email_obj.cc_addr:
+        msg['Cc'] = email_obj.cc_addr
+    if email_obj.bcc_addr:
+        msg['Bcc'] = email_obj.bcc_addr
+    if email_obj.message_id:
+        msg['Message-ID'] = email_obj.message_id
+    if email_obj.date:
+        msg['Date'] = email_obj.date
+    else:
+        msg['Date'] = formatdate(localtime=True)
+
+    return msg.as_string()
+
+
+def message_for_append(email_obj: EmailMessage) -> Union[str, bytes]:
+    """The message to APPEND: original bytes if known, else the parsed or rebuilt message"""
+    if email_obj.raw_bytes is not None:
+        # Original bytes from the export: append as-is, no parse/rebuild
+        return email_obj.raw_bytes
+    if email_obj.raw_message:
+        return email_obj.raw_message.as_string()
+    return reconstruct_email_message(email_obj)
+
+
+def flags_for_append(email_obj: EmailMessage) -> str:
+    """Flags to restore with APPEND"""
+    if email_obj.flags is not None:
+        # \Recent is set by the server and cannot be appended
+        return ' '.join(f for f in email_obj.flags if f.lower() != '\\recent')
+    return '\\Seen' if email_obj.is_read else ''
+
+
+class FolderPlan:
+    """Resolves import target folders against a single LIST
+
+    Each folder name is looked up, and created if needed, once per import;
+    later messages for it reuse the answer instead of selecting the folder.
+    A missing top-level folder (or child of INBOX) named after a
+    special-use role, e.g. an archive's 'Sent', maps to the server's folder
+    for that role and is never created.
+    """
+
+    def __init__(self, folder_service: FolderService, existing: Iterable[str], preserve_folders: bool,
+                 special_folders: Optional[Dict[str, str]] = None, delimiter: Optional[str] = None):
+        self.folder_service = folder_service
+        self.preserve_folders = preserve_folders
+        self.special_folders = special_folders or {}
+        self.delimiter = delimiter
+        self._existing: Set[str] = set(existing)
+        self._existing_lower = {name.lower() for name in self._existing}
+        self._resolved: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self.created: List[str] = []
+        self.redirected: Dict[str, str] = {}
+
+    def _exists(self, folder: str) -> bool:
+        if folder in self._existing:
+            return True
+        # INBOX is case-insensitive
+        return folder.upper() == 'INBOX' and 'inbox' in self._existing_lower
+
+    def resolve(self, folder: str, from_source: bool) -> str:
+        """Folder to append to for a message whose target is ``folder``
+
+        ``from_source`` says the name came from the archive rather than
+        from the caller; only those folders are created when missing.
+        Raises EmailMCPError if the folder cannot be used.
+        """
+        if folder in self._resolved:
+            return self._resolved[folder]
+        if folder in self._errors:
+            raise EmailMCPError(self._errors[folder])
+
+        role = special_use_role_for_name(folder, self.delimiter)
+        if self._exists(folder):
+            resolved = folder
+        elif role in self.special_folders:
+            resolved = self.special_folders[role]
+        elif self.preserve_folders and from_source and role is None:
+            try:
+                # Create folder once; later messages reuse it
+                self.folder_service.create_folder(folder)
+                self.created.append(folder)
+                self._existing.add(folder)
+                resolved = folder
+            except Exception as e:
+                # If can't create custom folder, fall back to INBOX
+                logging.warning(f"Cannot create folder '{folder}', importing to INBOX instead: {str(e)}")
+                self.redirected[folder] = str(e)
+                resolved = "INBOX"
+        else:
+            # For system folders or when preserve_folders=False, fail if it does not exist
+            self._errors[folder] = f"Cannot access folder '{folder}': folder does not exist"
+            raise EmailMCPError(self._errors[folder])
+
+        self._resolved[folder] = resolved
+        return resolved
+
+
+@dataclass
+class ImportItem:
+    """A message ready to APPEND, or the reason it could not be read"""
+    email_id: str
+    folder: Optional[str]                   # folder named by the source archive
+    message: Optional[bytes] = None
+    flags: str = ''
+    internal_date: Optional[str] = None
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def item_from_email(email_obj: EmailMessage) -> ImportItem:
+    """Reduce an email to what APPEND needs"""
+    message = message_for_append(email_obj)
+    if isinstance(message, str):
+        message = message.encode('utf-8')
+    return ImportItem(email_obj.email_id, email_obj.folder, message,
+                      flags_for_append(email_obj), email_obj.internal_date, email_obj.message_id)
+
+
+def prepare_import_record(args: Tuple[Dict[str, Any], Optional[str]]) -> ImportItem:
+    """Parse one export record into an ImportItem; runs in a worker process"""
+    record, blob_root = args
+    try:
+        return item_from_email(parse_import_record(record, blob_root))
+    except Exception as e:
+        return ImportItem(str(record.get('email_id')), record.get('folder'),
+                          error=f"Cannot read email from export: {str(e)}")
+
+
+def prepare_raw_import(source: Dict[str, Any]) -> ImportItem:
+    """Read and parse one EML file or archive member into an ImportItem; runs in a worker process"""
+    try:
+        return item_from_email(parse_raw_import(source))
+    except Exception as e:
+        return ImportItem(source['email_id'], source.get('folder'),
+                          error=f"Cannot read email from {source.get('name') or source.get('path')}: {str(e)}")
+
+
+class ImportService:
+    """Imports emails into IMAP folders
+
+    Target folders are resolved from one LIST before anything is appended
+    and each missing folder is created once. JSON and JSON Lines records,
+    EML files and tar.gz archive members are parsed in a process pool, in
+    order. Messages are then routed to one
+    APPEND worker per pooled connection: every folder sticks to a single
+    worker, so messages keep their source order within each folder while
+    different folders are restored in parallel.
+
+    With ``skip_duplicates``, the worker that owns a folder first reads the
+    Message-IDs already in it with one bulk header fetch into a compact
+    hashed set, and skips messages whose Message-ID is present, so an
+    import can simply be run again after a partial failure.
+    """
+
+    def __init__(self, email_service, parse_processes: int = DEFAULT_PROCESSES):
+        self.email_service = email_service
+        self.parse_processes = parse_processes
+
+    def import_file(self, file_backend: FileBackend, import_path: str, target_folder: Optional[str] = None,
+                    preserve_folders: bool = True, skip_duplicates: bool = False,
+                    source_folder: Optional[str] = None) -> Dict[str, Any]:
+        """Import an export file or directory; see import_emails for the result
+
+        With ``source_folder``, only emails exported from that folder are
+        imported, selected before they are parsed.
+        """
+        if file_backend.has_import_records(import_path):
+            records = file_backend.iter_import_records(import_path)
+            if source_folder is not None:
+                records = (entry for entry in records if entry[0].get('folder') == source_folder)
+            items = ordered_parallel_map(prepare_import_record, records, self.parse_processes)
+        elif file_backend.has_raw_imports(import_path):
+            # Workers read directory entries themselves; archive members are passed as bytes
+            sources = file_backend.iter_raw_imports(import_path)
+            if source_folder is not None:
+                sources = (source for source in sources if source['folder'] == source_folder)
+            items = ordered_parallel_map(prepare_raw_import, sources, self.parse_processes)
+        elif file_backend.is_streamable(import_path):
+            # Exports are already in import order; read them one at a time
+            items = (item_from_email(email_obj)
+                     for email_obj in file_backend.iter_import_emails(import_path, source_folder))
+        else:
+            # Loaded and sorted by email ID (oldest first) by the backend
+            emails = [email_obj for email_obj in file_backend.import_emails(import_path)
+                      if source_folder is None or email_obj.folder == source_folder]
+            emails = self._group_by_folder(emails, target_folder, preserve_folders)
+            items = (item_from_email(email_obj) for email_obj in emails)
+        return self._import_items(items, target_folder, preserve_folders, skip_duplicates)
+
+    def import_emails(self, emails: Iterable[EmailMessage], target_folder: Optional[str] = None,
+                      preserve_folders: bool = True, skip_duplicates: bool = False) -> Dict[str, Any]:
+        """Append emails to the server
+
+        Returns:
+            Dict with 'imported', 'skipped' (duplicates), 'failed', 'folders'
+            (name -> imported count), 'failures' (one reason per failed
+            email), 'results' (per email in source order: (email_id, folder,
+            'imported'/'skipped'/'failed', error or None)), 'created' (folders
+            created) and 'redirected' (folder -> why its emails went to INBOX
+            instead)
+        """
+        if isinstance(emails, list):
+            emails = self._group_by_folder(emails, target_folder, preserve_folders)
+        return self._import_items((item_from_email(email_obj) for email_obj in emails),
+                                  target_folder, preserve_folders, skip_duplicates)
+
+    def _import_items(self, items: Iterable[ImportItem], target_folder: Optional[str],
+                      preserve_folders: bool, skip_duplicates: bool) -> Dict[str, Any]:
+        results: Dict[int, Tuple[str, Optional[str], str, Optional[str]]] = {}
+        pool = self.email_service.imap_pool
+
+        try:
+            # This connection plans folders; the others append
+            with pool.acquire() as imap_backend:
+                plan = FolderPlan(FolderService(imap_backend), imap_backend.list_folder_names(),
+                                  preserve_folders, imap_backend.get_special_folders(),
+                                  imap_backend.get_hierarchy_delimiter())
+                appenders = pool.max_connections - 1
+                if appenders < 1:
+                    known_ids: Dict[str, Any] = {}
+                    for index, item in enumerate(items):
+                        folder = self._route(plan, item, index, results, target_folder, preserve_folders)
+                        if folder is not None:
+                            results[index] = (item.email_id, folder,
+                                              *self._deliver(imap_backend, folder, item, known_ids, skip_duplicates))
+                else:
+                    self._dispatch(items, plan, appenders, results, target_folder, preserve_folders,
+                                   skip_duplicates)
+
+        except Exception as e:
+            raise EmailMCPError(f"Failed to import emails: {str(e)}")
+
+        ordered = [results[index] for index in sorted(results)]
+        folder_stats: Dict[str, int] = {}
+        failures: List[str] = []
+        skipped = 0
+        for email_id, folder, status, error in ordered:
+            if status == 'imported':
+                folder_stats[folder] = folder_stats.get(folder, 0) + 1
+            elif status == 'skipped':
+                skipped += 1
+            else:
+                failures.append(f"Email {email_id}: {error}")
+
+        return {
+            'imported': len(ordered) - len(failures) - skipped,
+            'skipped': skipped,
+            'failed': len(failures),
+            'folders': folder_stats,
+            'failures': failures,
+            'results': ordered,
+            'created': plan.created,
+            'redirected': plan.redirected
+        }
+
+    def _route(self, plan: FolderPlan, item: ImportItem, index: int, results: Dict[int, tuple],
+               target_folder: Optional[str], preserve_folders: bool) -> Optional[str]:
+        """Folder to append an item to, or None after recording why it cannot be imported"""
+        if item.error is not None:
+            results[index] = (item.email_id, item.folder, 'failed', item.error)
+            return None
+        try:
+            return plan.resolve(self._target(item, target_folder, preserve_folders),
+                                bool(preserve_folders and item.folder))
+        except Exception as e:
+            results[index] = (item.email_id, item.folder, 'failed', str(e))
+            return None
+
+    def _dispatch(self, items: Iterable[ImportItem], plan: FolderPlan, appenders: int,
+                  results: Dict[int, tuple], target_folder: Optional[str], preserve_folders: bool,
+                  skip_duplicates: bool) -> None:
+        """Route items to APPEND workers, each folder to the same worker"""
+        queues = [queue.Queue(maxsize=APPEND_QUEUE_DEPTH) for _ in range(appenders)]
+        workers = [
+            threading.Thread(target=self._append_worker, args=(work, results, skip_duplicates),
+                             name=f"import-worker-{n}", daemon=True)
+            for n, work in enumerate(queues)
+        ]
+        for worker in workers:
+            worker.start()
+
+        owner: Dict[str, int] = {}
+        load = [0] * appenders
+        try:
+            for index, item in enumerate(items):
+                folder = self._route(plan, item, index, results, target_folder, preserve_folders)
+                if folder is None:
+                    continue
+                if folder not in owner:
+                    owner[folder] = min(range(appenders), key=load.__getitem__)
+                load[owner[folder]] += 1
+                queues[owner[folder]].put((index, folder, item))
+        finally:
+            for work in queues:
+                work.put(None)
+            for worker in workers:
+                worker.join()
+
+    def _append_worker(self, work: queue.Queue, results: Dict[int, tuple], skip_duplicates: bool) -> None:
+        """Append queued items in order on one pooled connection until the end marker"""
+        known_ids: Dict[str, Any] = {}
+        try:
+            with self.email_service.imap_pool.acquire() as imap_backend:
+                while True:
+                    entry = work.get()
+                    if entry is None:
+                        return
+                    index, folder, item = entry
+                    results[index] = (item.email_id, folder,
+                                      *self._deliver(imap_backend, folder, item, known_ids, skip_duplicates))
+        except Exception as e:
+            # No connection: fail whatever is left for this worker
+            while True:
+                entry = work.get()
+                if entry is None:
+                    return
+                index, folder, item = entry
+                results[index] = (item.email_id, folder, 'failed', f"Cannot connect for APPEND: {str(e)}")
+
+    def _deliver(self, imap_backend, folder: str, item: ImportItem, known_ids: Dict[str, Any],
+                 skip_duplicates: bool) -> Tuple[str, Optional[str]]:
+        """APPEND an item unless it is a duplicate; returns (status, error)
+
+        ``known_ids`` maps folders to their MessageIdSet, or to the error
+        that kept it from being read, and is filled on first use.
+        """
+        if skip_duplicates and item.message_id:
+            if folder not in known_ids:
+                try:
+                    known_ids[folder] = MessageIdSet(imap_backend.iter_message_ids(folder))
+                except Exception as e:
+                    logging.error(f"Cannot read Message-IDs of '{folder}': {str(e)}")
+                    known_ids[folder] = f"Cannot check '{folder}' for duplicates: {str(e)}"
+            if isinstance(known_ids[folder], str):
+                return 'failed', known_ids[folder]
+            if item.message_id in known_ids[folder]:
+                return 'skipped', None
+
+        error = self._append(imap_backend, folder, item)
+        if error is not None:
+            return 'failed', error
+        if isinstance(known_ids.get(folder), MessageIdSet):
+            # Duplicates within the source are skipped too
+            known_ids[folder].add(item.message_id)
+        return 'imported', None
+
+    @staticmethod
+    def _append(imap_backend, folder: str, item: ImportItem) -> Optional[str]:
+        """APPEND one message; returns the error, or None on success"""
+        try:
+            if imap_backend.append_message(folder, item.message, flags=item.flags,
+                                           internal_date=item.internal_date):
+                return None
+            return f"APPEND to '{folder}' failed"
+        except Exception as e:
+            return str(e)
+
+    @staticmethod
+    def _target(email_obj, target_folder: Optional[str], preserve_folders: bool) -> str:
+        """Target folder named by the archive or the caller"""
+        if preserve_folders and email_obj.folder:
+            return email_obj.folder
+        return target_folder or "INBOX"
+
+    def _group_by_folder(self, emails: List[EmailMessage], target_folder: Optional[str],
+                         preserve_folders: bool) -> List[EmailMessage]:
+        """Order emails folder by folder, keeping their order within each folder"""
+        groups: Dict[str, List[EmailMessage]] = {}
+        for email_obj in emails:
+            groups.setdefault(self._target(email_obj, target_folder, preserve_folders), []).append(email_obj)
+        return [email_obj for group in groups.values() for email_obj in group]
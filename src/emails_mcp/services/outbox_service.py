@@ -0,0 +1,195 @@
+import logging
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from ..backends.outbox_spool import OutboxSpool
+from ..backends.smtp_backend import SMTPBackend
+from ..utils.exceptions import EmailMCPError
+
+# Delivery attempts before a queued message is given up on
+OUTBOX_MAX_ATTEMPTS = 8
+
+# Seconds before the first retry; doubled after every failed attempt up to OUTBOX_RETRY_MAX
+OUTBOX_RETRY_BASE = 30
+OUTBOX_RETRY_MAX = 3600
+
+# Delivered and failed entries stay queryable this long
+OUTBOX_RETENTION = timedelta(days=7)
+
+# Entry states a delivery is still owed for
+PENDING_STATUSES = ('queued', 'sending')
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Whether a delivery error is a 5xx rejection that retrying will not fix"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def _retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, so retries after an outage do not arrive together"""
+    delay = min(OUTBOX_RETRY_MAX, OUTBOX_RETRY_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxService:
+    """Queued sending through an on-disk spool and a background delivery worker
+
+    ``enqueue`` builds the message, writes it durably to the spool and
+    returns; one worker thread then delivers due entries over the pooled
+    SMTP sessions, retrying temporary failures (4xx replies, lost
+    connections) with exponential backoff and giving up on 5xx rejections
+    or after OUTBOX_MAX_ATTEMPTS. Delivery is at least once: an entry
+    interrupted mid-send by a crash is sent again after restart.
+    """
+
+    def __init__(self, email_service, spool: OutboxSpool):
+        self.email_service = email_service
+        self.spool = spool
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def enqueue(self, to: str, subject: str, body: str,
+                html_body: Optional[str] = None,
+                cc: Optional[str] = None,
+                bcc: Optional[str] = None,
+                attachments: Optional[List[str]] = None,
+                save_to_sent: bool = True) -> Dict[str, Any]:
+        """Spool a message for delivery and return its entry (with 'id')"""
+        try:
+            # Building needs no connection; attachments are read now, while the caller waits
+            builder = SMTPBackend(self.email_service.config)
+            msg, recipients = builder.build_message(to, subject, body, html_body, cc, bcc, attachments)
+            data, offset = builder.flatten(msg)
+            entry = self.spool.add(data, {
+                'to': to,
+                'subject': subject,
+                'recipients': recipients,
+                'offset': offset,
+                'save_to_sent': save_to_sent,
+                'status': 'queued',
+                'attempts': 0,
+                'next_attempt': time.time(),
+                'last_error': None,
+                'refused': {},
+                'sent_at': None,
+                'saved_to': None
+            })
+        except Exception as e:
+            raise EmailMCPError(f"Failed to queue email: {str(e)}")
+
+        self.start()
+        return entry
+
+    def status(self, entry_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One entry, or every entry still in the spool (oldest first)"""
+        if entry_id is not None:
+            entry = self.spool.get(entry_id)
+            return [entry] if entry is not None else []
+        return self.spool.entries()
+
+    def resume(self) -> int:
+        """Start delivering entries left from an earlier run; returns how many are pending"""
+        pending = sum(1 for entry in self.spool.entries() if entry['status'] in PENDING_STATUSES)
+        if pending:
+            logging.info(f"Resuming delivery of {pending} queued emails")
+            self.start()
+        return pending
+
+    def start(self):
+        """Start the delivery worker if it is not running, or wake it up"""
+        with self._lock:
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, timeout: float = 5):
+        """Stop the worker after its current delivery"""
+        with self._lock:
+            self._stopping = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                wait = self._deliver_due()
+            except Exception as e:
+                logging.error(f"Outbox worker error: {str(e)}")
+                wait = OUTBOX_RETRY_BASE
+            if wait is None:
+                self._prune()
+            # Sleep until the next entry is due or a new one is queued
+            self._wake.wait(wait)
+
+    def _deliver_due(self) -> Optional[float]:
+        """Deliver every due entry; seconds until the next retry, or None if nothing is pending"""
+        while not self._stopping:
+            now = time.time()
+            pending = [entry for entry in self.spool.entries() if entry['status'] in PENDING_STATUSES]
+            if not pending:
+                return None
+            due = [entry for entry in pending if entry['next_attempt'] <= now]
+            if not due:
+                return min(entry['next_attempt'] for entry in pending) - now
+            for entry in due:
+                if self._stopping:
+                    break
+                self._deliver(entry)
+        return None
+
+    def _deliver(self, entry: Dict[str, Any]):
+        entry.update(status='sending', attempts=entry['attempts'] + 1)
+        self.spool.save(entry)
+
+        try:
+            data = self.spool.message(entry['id'])
+            with self.email_service.smtp_pool.acquire() as smtp_backend:
+                refused = smtp_backend.send_bytes(data, entry['recipients'], entry.get('offset', 0))
+        except Exception as e:
+            entry['last_error'] = str(e)
+            if _is_permanent(e) or entry['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+                logging.error(f"Giving up on queued email {entry['id']} to {entry['to']}: {str(e)}")
+                entry['status'] = 'failed'
+                self.spool.save(entry)
+                self.spool.discard_message(entry['id'])
+            else:
+                logging.warning(f"Queued email {entry['id']} not delivered (attempt {entry['attempts']}): "
+                                f"{str(e)}, retrying")
+                entry.update(status='queued', next_attempt=time.time() + _retry_delay(entry['attempts']))
+                self.spool.save(entry)
+            return
+
+        entry.update(status='sent', sent_at=datetime.now().isoformat(), last_error=None,
+                     refused={rcpt: f"{code} {reply.decode('utf-8', 'replace')}"
+                              for rcpt, (code, reply) in refused.items()})
+        logging.info(f"Queued email {entry['id']} sent to {entry['to']}")
+        if entry['save_to_sent']:
+            # The stored bytes still start with the Bcc header that was not transmitted
+            try:
+                with self.email_service.imap_pool.acquire() as imap_backend:
+                    entry['saved_to'] = self.email_service.save_to_sent_folder(imap_backend, data)
+            except Exception as e:
+                logging.error(f"Error saving queued email {entry['id']} to Sent folder: {str(e)}")
+        self.spool.save(entry)
+        self.spool.discard_message(entry['id'])
+
+    def _prune(self):
+        """Remove delivered and failed entries older than OUTBOX_RETENTION"""
+        cutoff = (datetime.now() - OUTBOX_RETENTION).isoformat()
+        for entry in self.spool.entries():
+            if entry['status'] not in PENDING_STATUSES and entry['created'] < cutoff:
+                self.spool.remove(entry['id'])
@@ -1,17 +1,18 @@
 import logging
-from typing import List, Optional
-from ..models.email import EmailMessage
+from typing import Any, Dict, List, Optional, Union
+from ..models.email import EmailMessage, SearchResult
 from ..backends.imap_backend import IMAPBackend
-from ..backends.file_backend import FileBackend
-from ..utils.exceptions import EmailMCPError
+from ..utils.exceptions import EmailMCPError, ValidationError
+from ..utils.validators import validate_page_params
+from ..utils.search_query import compile_search_query
 
 
 class SearchService:
     """Email search service layer"""
-    
+
     def __init__(self, imap_backend: IMAPBackend):
         self.imap_backend = imap_backend
-    
+
     def search_emails_by_query(self, query: str, folder: Optional[str] = None) -> List[str]:
         """Search emails and return email IDs"""
         try:
@@ -21,174 +22,90 @@ class SearchService:
             return self.imap_backend.search_emails(query, folder)
         except Exception as e:
             raise EmailMCPError(f"Failed to search emails: {str(e)}")
-    
+
+    def search_ids(self, query: Union[Dict[str, Any], List[Any]], folder: Optional[str] = None) -> List[str]:
+        """Search emails with a structured query and return email IDs (newest first)
+
+        The whole query is compiled into one IMAP SEARCH expression, so compound
+        filters cost a single server round trip. See compile_search_query for
+        the supported fields.
+        """
+        try:
+            compiled = compile_search_query(query)
+            return self.imap_backend.search_compiled(compiled, folder or 'INBOX')
+        except ValidationError:
+            raise
+        except Exception as e:
+            raise EmailMCPError(f"Failed to search emails: {str(e)}")
+
+    def search(self, query: Union[Dict[str, Any], List[Any]], folder: Optional[str] = None,
+               page: int = 1, page_size: int = 20) -> SearchResult:
+        """Search emails with a structured query and pagination"""
+        try:
+            page, page_size, warning = validate_page_params(page, page_size)
+            folder = folder or 'INBOX'
+
+            email_ids = self.search_ids(query, folder)
+            total_results = len(email_ids)
+
+            if total_results == 0:
+                return SearchResult(
+                    emails=[],
+                    total_results=0,
+                    current_page=1,
+                    page_size=page_size,
+                    query=str(query),
+                    folder=folder
+                )
+
+            # Calculate pagination
+            total_pages = (total_results + page_size - 1) // page_size
+            if page > total_pages:
+                page = total_pages
+
+            start_idx = (page - 1) * page_size
+            page_ids = email_ids[start_idx:start_idx + page_size]
+
+            # Fetch emails
+            emails: List[EmailMessage] = []
+            for email_id in page_ids:
+                try:
+                    emails.append(self.imap_backend.fetch_email(email_id))
+                except Exception as e:
+                    logging.error(f"Failed to fetch search result {email_id}: {str(e)}")
+
+            return SearchResult(
+                emails=emails,
+                total_results=total_results,
+                current_page=page,
+                page_size=page_size,
+                query=str(query),
+                folder=folder
+            )
+
+        except ValidationError:
+            raise
+        except Exception as e:
+            raise EmailMCPError(f"Failed to search emails: {str(e)}")
+
     def search_by_sender(self, sender: str, folder: Optional[str] = None) -> List[str]:
         """Search emails by sender"""
         try:
-            # If no folder specified, use INBOX as default
-            if not folder:
-                folder = 'INBOX'
-            
-            # Always select folder before searching
-            self.imap_backend.select_folder(folder)
-            
-            self.imap_backend.ensure_connected()
-            
-            # Use UTF-8 aware search similar to the main search method
-            # Encode sender to UTF-8 bytes for proper Chinese character handling
-            sender_bytes = sender.encode('utf-8')
-            
-            if self.imap_backend.utf8_enabled:
-                # When UTF-8 is enabled, don't specify charset
-                search_criteria = b'FROM "' + sender_bytes + b'"'
-                status, email_ids = self.imap_backend.connection.search(None, search_criteria)
-            else:
-                # Try UTF-8 charset first
-                try:
-                    search_criteria = b'FROM "' + sender_bytes + b'"'
-                    status, email_ids = self.imap_backend.connection.search('UTF-8', search_criteria)
-                except Exception as search_error:
-                    logging.warning(f"UTF-8 charset search failed: {search_error}")
-                    status = 'NO'
-                
-                # Improved fallback strategy for Chinese content
-                if status != 'OK':
-                    # Try different search approaches for Chinese content
-                    search_attempts = [
-                        # Try searching with quoted sender name only (no special chars)
-                        f'FROM "{sender}"',
-                        # Try without quotes
-                        f'FROM {sender}',
-                        # Try with partial email if contains @
-                        f'FROM "{sender.split("@")[0]}"' if '@' in sender else None,
-                        # Try domain search if email
-                        f'FROM "@{sender.split("@")[1]}"' if '@' in sender else None
-                    ]
-                    
-                    for attempt in search_attempts:
-                        if attempt is None:
-                            continue
-                        try:
-                            status, email_ids = self.imap_backend.connection.search(None, attempt)
-                            if status == 'OK' and email_ids[0]:
-                                break
-                        except:
-                            continue
-                    
-                    # Final ASCII fallback only if all above failed
-                    if status != 'OK':
-                        ascii_sender = sender.encode('ascii', errors='ignore').decode('ascii')
-                        if ascii_sender.strip():
-                            status, email_ids = self.imap_backend.connection.search(None, f'FROM "{ascii_sender}"')
-                        else:
-                            # Return empty if we can't search at all
-                            return []
-            
-            if status != 'OK':
-                raise EmailMCPError(f"Search failed: {status}")
-            
-            id_list = email_ids[0].split()
-            return [uid.decode() for uid in reversed(id_list)]
-            
+            return self.search_ids({'from': sender}, folder)
         except Exception as e:
             raise EmailMCPError(f"Failed to search by sender: {str(e)}")
-    
+
     def search_by_subject(self, subject: str, folder: Optional[str] = None) -> List[str]:
         """Search emails by subject"""
         try:
-            # If no folder specified, use INBOX as default
-            if not folder:
-                folder = 'INBOX'
-            
-            # Always select folder before searching
-            self.imap_backend.select_folder(folder)
-            
-            self.imap_backend.ensure_connected()
-            
-            # Use UTF-8 aware search similar to the main search method
-            # Encode subject to UTF-8 bytes for proper Chinese character handling
-            subject_bytes = subject.encode('utf-8')
-            
-            if self.imap_backend.utf8_enabled:
-                # When UTF-8 is enabled, don't specify charset
-                search_criteria = b'SUBJECT "' + subject_bytes + b'"'
-                status, email_ids = self.imap_backend.connection.search(None, search_criteria)
-            else:
-                # Try UTF-8 charset first
-                try:
-                    search_criteria = b'SUBJECT "' + subject_bytes + b'"'
-                    status, email_ids = self.imap_backend.connection.search('UTF-8', search_criteria)
-                except Exception as search_error:
-                    logging.warning(f"UTF-8 charset search failed: {search_error}")
-                    status = 'NO'
-                
-                # Improved fallback strategy for Chinese subject search
-                if status != 'OK':
-                    # Try different search approaches for Chinese subjects
-                    search_attempts = [
-                        # Try searching with quoted subject
-                        f'SUBJECT "{subject}"',
-                        # Try without quotes  
-                        f'SUBJECT {subject}',
-                        # Try partial subject search (first 10 chars)
-                        f'SUBJECT "{subject[:10]}"' if len(subject) > 10 else None,
-                        # Try partial subject search (last 10 chars)  
-                        f'SUBJECT "{subject[-10:]}"' if len(subject) > 10 else None
-                    ]
-                    
-                    for attempt in search_attempts:
-                        if attempt is None:
-                            continue
-                        try:
-                            status, email_ids = self.imap_backend.connection.search(None, attempt)
-                            if status == 'OK' and email_ids[0]:
-                                break
-                        except:
-                            continue
-                    
-                    # Final ASCII fallback only if all above failed
-                    if status != 'OK':
-                        ascii_subject = subject.encode('ascii', errors='ignore').decode('ascii')
-                        if ascii_subject.strip():
-                            status, email_ids = self.imap_backend.connection.search(None, f'SUBJECT "{ascii_subject}"')
-                        else:
-                            # Return empty if we can't search at all
-                            return []
-            
-            if status != 'OK':
-                raise EmailMCPError(f"Search failed: {status}")
-            
-            id_list = email_ids[0].split()
-            return [uid.decode() for uid in reversed(id_list)]
-            
+            return self.search_ids({'subject': subject}, folder)
         except Exception as e:
             raise EmailMCPError(f"Failed to search by subject: {str(e)}")
-    
-    def search_by_date_range(self, since_date: str, before_date: Optional[str] = None, 
+
+    def search_by_date_range(self, since_date: str, before_date: Optional[str] = None,
                            folder: Optional[str] = None) -> List[str]:
         """Search emails by date range (YYYY-MM-DD format)"""
         try:
-            # If no folder specified, use INBOX as default
-            if not folder:
-                folder = 'INBOX'
-            
-            # Always select folder before searching
-            self.imap_backend.select_folder(folder)
-            
-            self.imap_backend.ensure_connected()
-            
-            # Construct date search criteria
-            search_criteria = f'SINCE "{since_date}"'
-            if before_date:
-                search_criteria += f' BEFORE "{before_date}"'
-            
-            status, email_ids = self.imap_backend.connection.search(None, search_criteria)
-            
-            if status != 'OK':
-                raise EmailMCPError(f"Search failed: {status}")
-            
-            id_list = email_ids[0].split()
-            return [uid.decode() for uid in reversed(id_list)]
-            
+            return self.search_ids({'since': since_date, 'before': before_date}, folder)
         except Exception as e:
-            raise EmailMCPError(f"Failed to search by date: {str(e)}")
\ No newline at end of file
+            raise EmailMCPError(f"Failed to search by date: {str(e)}")
@@ -0,0 +1,90 @@
+import logging
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Finished results kept for status queries; older ones are forgotten first
+SENT_COPY_HISTORY = 100
+
+
+class SentCopyService:
+    """Saves copies of sent emails to the Sent folder after the send has returned
+
+    ``submit`` records the copy as pending and hands it to one background
+    worker, which appends copies in order over a pooled IMAP connection, so
+    the APPEND (and any folder guessing) is not part of the send latency.
+    The outcome of each copy is kept for ``status`` queries instead of
+    failing the send.
+    """
+
+    def __init__(self, email_service):
+        self.email_service = email_service
+        self._queue: "queue.Queue[Optional[Tuple[Dict[str, Any], bytes]]]" = queue.Queue()
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, message: bytes, to: str, subject: str) -> Dict[str, Any]:
+        """Queue a sent message for saving; returns its status record (with 'id')"""
+        record = {
+            'id': uuid.uuid4().hex[:16],
+            'to': to,
+            'subject': subject,
+            'status': 'pending',
+            'folder': None,
+            'error': None,
+            'created': datetime.now().isoformat(),
+            'finished': None
+        }
+        with self._lock:
+            self._records[record['id']] = record
+            self._trim()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sent-copy-worker", daemon=True)
+                self._thread.start()
+        self._queue.put((record, message))
+        return dict(record)
+
+    def status(self, copy_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One record, or every remembered record (oldest first)"""
+        with self._lock:
+            if copy_id is not None:
+                record = self._records.get(copy_id)
+                return [dict(record)] if record is not None else []
+            return [dict(record) for record in self._records.values()]
+
+    def stop(self, timeout: float = 30):
+        """Finish the copies already queued, then stop the worker"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _trim(self):
+        """Forget the oldest finished records beyond SENT_COPY_HISTORY"""
+        excess = len(self._records) - SENT_COPY_HISTORY
+        for copy_id in [copy_id for copy_id, record in self._records.items()
+                        if record['status'] != 'pending'][:max(0, excess)]:
+            del self._records[copy_id]
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            record, message = item
+            try:
+                with self.email_service.imap_pool.acquire() as imap_backend:
+                    folder = self.email_service.save_to_sent_folder(imap_backend, message)
+                update = {'status': 'saved', 'folder': folder} if folder else \
+                    {'status': 'failed', 'error': "No Sent folder accepted the message"}
+            except Exception as e:
+                logging.error(f"Error saving email to Sent folder: {str(e)}")
+                update = {'status': 'failed', 'error': str(e)}
+            with self._lock:
+                record.update(update, finished=datetime.now().isoformat())
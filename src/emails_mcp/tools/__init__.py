@@ -1,5 +1,6 @@
 from .email_tools import register_email_tools
 from .folder_tools import register_folder_tools
 from .management_tools import register_management_tools
+from .search_tools import register_search_tools
 
-__all__ = ['register_email_tools', 'register_folder_tools', 'register_management_tools']
\ No newline at end of file
+__all__ = ['register_email_tools', 'register_folder_tools', 'register_management_tools', 'register_search_tools']
\ No newline at end of file
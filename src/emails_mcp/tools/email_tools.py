@@ -1,5 +1,6 @@
 import logging
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from mcp.server.fastmcp import FastMCP
 from ..services.email_service import EmailService
 from ..utils.email_parser import format_email_summary
@@ -43,14 +44,15 @@ def register_email_tools(mcp: FastMCP, email_service: EmailService):
             return f"Error getting emails: {str(e)}"
     
     @mcp.tool()
-    async def read_email(email_id: str) -> str:
+    async def read_email(email_id: str, folder: str = None) -> str:
         """Read full content of a specific email
         
         Args:
             email_id: Email ID to read
+            folder: Folder containing the email, e.g. from a multi-folder search (optional, defaults to the current folder)
         """
         try:
-            email = email_service.read_email(email_id)
+            email = email_service.read_email(email_id, folder)
             
             output = f"Email ID: {email.email_id}\n"
             output += f"Subject: {email.subject}\n"
@@ -82,7 +84,8 @@ def register_email_tools(mcp: FastMCP, email_service: EmailService):
             return f"Error reading email: {str(e)}"
     
     @mcp.tool()
-    async def search_emails(query: str, folder: str = "INBOX", page: int = 1, page_size: int = 20) -> str:
+    async def search_emails(query: str, folder: str = "INBOX", page: int = 1, page_size: int = 20,
+                           folders: List[str] = None, all_folders: bool = False) -> str:
         """Search emails with query string (sorted by date descending)
         
         Args:
@@ -90,21 +93,34 @@ def register_email_tools(mcp: FastMCP, email_service: EmailService):
             folder: Folder to search in (default: INBOX)
             page: Page number starting from 1 (default: 1)
             page_size: Number of results per page (default: 20)
+            folders: Search these folders in parallel instead of a single folder (optional)
+            all_folders: Search every folder in parallel (default: False)
         """
         try:
-            result = email_service.search_emails(query, folder, page, page_size)
+            multi_folder = all_folders or bool(folders)
+            if multi_folder:
+                result = email_service.search_folders(query, None if all_folders else folders, page, page_size)
+            else:
+                result = email_service.search_emails(query, folder, page, page_size)
+            
+            skipped = ""
+            if result.failed_folders:
+                skipped = f"Skipped folders (failed or timed out): {', '.join(sorted(result.failed_folders))}\n"
             
             if not result.emails:
-                return f"No emails found matching query: {query}"
+                return f"No emails found matching query: {query}\n{skipped}".rstrip()
             
             output = f"Search query: {query}\n"
-            output += f"Folder: {result.folder or 'current'}\n"
+            output += f"Folder: {'all folders' if all_folders else result.folder or 'current'}\n"
             output += f"Page: {result.current_page}/{result.total_pages}\n"
-            output += f"Total results: {result.total_results}\n\n"
+            output += f"Total results: {result.total_results}\n"
+            output += f"{skipped}\n"
             
             for i, email in enumerate(result.emails, 1):
                 output += f"{(result.current_page-1)*result.page_size + i}. "
                 output += f"ID: {email.email_id}\n"
+                if multi_folder:
+                    output += f"   Folder: {email.folder}\n"
                 output += f"   Subject: {email.subject}\n"
                 output += f"   From: {email.from_addr}\n"
                 output += f"   Date: {email.date}\n\n"
@@ -116,7 +132,8 @@ def register_email_tools(mcp: FastMCP, email_service: EmailService):
     
     @mcp.tool()
     async def send_email(to: str, subject: str, body: str, html_body: str = None,
-                        cc: str = None, bcc: str = None, attachments: List[str] = None) -> str:
+                        cc: str = None, bcc: str = None, attachments: List[str] = None,
+                        queued: bool = False) -> str:
         """Send an email with optional HTML body, CC, BCC, and attachments
         
         Args:
@@ -127,9 +144,22 @@ def register_email_tools(mcp: FastMCP, email_service: EmailService):
             cc: CC recipients, comma-separated (optional)
             bcc: BCC recipients, comma-separated (optional)
             attachments: List of file paths to attach (optional)
+            queued: Return as soon as the email is saved to the local outbox and deliver it in the background, retrying temporary failures; check progress with get_outbox_status (default: False)
         """
         try:
-            success = email_service.send_email(
+            if queued:
+                entry = email_service.queue_email(
+                    to=to,
+                    subject=subject,
+                    body=body,
+                    html_body=html_body,
+                    cc=cc,
+                    bcc=bcc,
+                    attachments=attachments
+                )
+                return f"Email to {to} queued for delivery (outbox ID: {entry['id']})"
+            
+            success, sent_copy_id = email_service.send_email(
                 to=to,
                 subject=subject,
                 body=body,
@@ -141,13 +171,122 @@ def register_email_tools(mcp: FastMCP, email_service: EmailService):
             
             if success:
                 attachment_info = f" with {len(attachments)} attachments" if attachments else ""
-                return f"Email sent successfully to {to}{attachment_info}"
+                result_msg = f"Email sent successfully to {to}{attachment_info}"
+                if sent_copy_id:
+                    result_msg += (f"; saving a copy to the Sent folder in the background "
+                                   f"(see get_sent_copy_status, copy ID: {sent_copy_id})")
+                return result_msg
             else:
                 return "Email sending failed"
                 
         except Exception as e:
             return f"Error sending email: {str(e)}"
     
+    @mcp.tool()
+    async def get_sent_copy_status(copy_id: str = None) -> str:
+        """Show whether recently sent emails were saved to the Sent folder
+        
+        Args:
+            copy_id: Copy ID returned by send_email (optional, default: all recent copies)
+        """
+        try:
+            records = email_service.sent_copies.status(copy_id)
+            if not records:
+                if copy_id:
+                    return f"No Sent folder copy with ID {copy_id}"
+                return "No Sent folder copies recorded in this session"
+            
+            lines = []
+            for record in records:
+                line = f"[{record['id']}] {record['status']} - To: {record['to']} - Subject: {record['subject']}"
+                if record['status'] == 'saved':
+                    line += f" - saved to {record['folder']}"
+                elif record['status'] == 'failed':
+                    line += f" - {record['error']}"
+                lines.append(line)
+            
+            failed = sum(1 for record in records if record['status'] == 'failed')
+            pending = sum(1 for record in records if record['status'] == 'pending')
+            return (f"{len(records)} Sent folder copies ({pending} pending, {failed} failed):\n"
+                    + "\n".join(lines))
+            
+        except Exception as e:
+            return f"Error getting Sent copy status: {str(e)}"
+    
+    @mcp.tool()
+    async def get_outbox_status(outbox_id: str = None) -> str:
+        """Show delivery status of emails sent with queued=True
+        
+        Args:
+            outbox_id: Outbox ID returned when the email was queued (optional, default: all recent queued emails)
+        """
+        try:
+            entries = email_service.outbox.status(outbox_id)
+            if not entries:
+                return f"No queued email with outbox ID {outbox_id}" if outbox_id else "The outbox is empty"
+            
+            lines = []
+            for entry in entries:
+                line = f"[{entry['id']}] {entry['status']} - To: {entry['to']} - Subject: {entry['subject']}"
+                if entry['status'] == 'sent':
+                    line += f" - sent {entry['sent_at']}"
+                    if entry['refused']:
+                        line += f", refused: {', '.join(f'{rcpt} ({reply})' for rcpt, reply in entry['refused'].items())}"
+                    if entry['save_to_sent'] and not entry['saved_to']:
+                        line += ", not saved to Sent"
+                else:
+                    line += f" - {entry['attempts']} attempts"
+                    if entry['status'] == 'queued' and entry['attempts']:
+                        next_attempt = datetime.fromtimestamp(entry['next_attempt']).strftime('%H:%M:%S')
+                        line += f", next at {next_attempt}"
+                    if entry['last_error']:
+                        line += f", last error: {entry['last_error']}"
+                lines.append(line)
+            
+            pending = sum(1 for entry in entries if entry['status'] in ('queued', 'sending'))
+            return f"{len(entries)} queued emails ({pending} pending):\n" + "\n".join(lines)
+            
+        except Exception as e:
+            return f"Error getting outbox status: {str(e)}"
+    
+    @mcp.tool()
+    async def send_bulk(messages: List[Dict[str, Any]]) -> str:
+        """Send many separate emails at once over several SMTP connections
+        
+        Args:
+            messages: List of messages, each with 'to', 'subject' and 'body' and optionally 'html_body', 'cc', 'bcc' and 'attachments' (same meaning as in send_email)
+        """
+        try:
+            if not messages:
+                return "No messages to send"
+            
+            results = email_service.send_bulk(messages)
+            sent = [result for result in results if result['status'] == 'sent']
+            failed = [(index, result) for index, result in enumerate(results) if result['status'] == 'failed']
+            
+            result_msg = f"Successfully sent {len(sent)}/{len(results)} emails"
+            
+            partial = [result for result in sent if result['refused']]
+            if partial:
+                result_msg += f"\n\n{len(partial)} emails were sent with some recipients refused:"
+                for result in partial[:5]:
+                    refused = ', '.join(f"{rcpt} ({reply})" for rcpt, reply in result['refused'].items())
+                    result_msg += f"\n  - To {result['to']}: {refused}"
+                if len(partial) > 5:
+                    result_msg += f"\n  ... and {len(partial)-5} more"
+            
+            if failed:
+                result_msg += f"\n\n{len(failed)} emails failed:"
+                for index, result in failed[:5]:
+                    result_msg += f"\n  - Message {index + 1} to {result['to']}: {result['error']}"
+                if len(failed) > 5:
+                    result_msg += f"\n  ... and {len(failed)-5} more"
+            
+            return result_msg
+            
+        except Exception as e:
+            return f"Error sending bulk emails: {str(e)}"
+    
     @mcp.tool()
     async def reply_email(email_id: str, body: str, html_body: str = None,
                          cc: str = None, bcc: str = None, reply_all: bool = False) -> str:
@@ -3,37 +3,6 @@ from mcp.server.fastmcp import FastMCP
 from ..services.draft_service import DraftService
 
 
-def _reconstruct_email_message(email_obj) -> str:
-    """Reconstruct email message from EmailMessage object"""
-    from email.mime.multipart import MIMEMultipart
-    from email.mime.text import MIMEText
-    from email.utils import formatdate
-    
-    # Create message
-    if email_obj.body_html:
-        msg = MIMEMultipart('alternative')
-        msg.attach(MIMEText(email_obj.body_text or '', 'plain', 'utf-8'))
-        msg.attach(MIMEText(email_obj.body_html, 'html', 'utf-8'))
-    else:
-        msg = MIMEText(email_obj.body_text or '', 'plain', 'utf-8')
-    
-    # Set headers
-    msg['Subject'] = email_obj.subject or ''
-    msg['From'] = email_obj.from_addr or ''
-    msg['To'] = email_obj.to_addr or ''
-    if email_obj.cc_addr:
-        msg['Cc'] = email_obj.cc_addr
-    if email_obj.bcc_addr:
-        msg['Bcc'] = email_obj.bcc_addr
-    if email_obj.message_id:
-        msg['Message-ID'] = email_obj.message_id
-    if email_obj.date:
-        msg['Date'] = email_obj.date
-    else:
-        msg['Date'] = formatdate(localtime=True)
-    
-    return msg.as_string()
-
 def register_management_tools(mcp: FastMCP, draft_service: DraftService, email_service):
     """Register management and utility MCP tools"""
     
@@ -195,7 +164,11 @@ def register_management_tools(mcp: FastMCP, draft_service: DraftService, email_s
             return f"Error deleting draft: {str(e)}"
     
     @mcp.tool()
-    async def export_emails(folder: str = None, export_path: str = "emails_export.json", max_emails: int = None, export_all_folders: bool = False) -> str:
+    async def export_emails(folder: str = None, export_path: str = "emails_export.json", max_emails: int = None,
+                           export_all_folders: bool = False, format: str = "jsonl",
+                           attachment_blobs: bool = False, compression_level: int = None,
+                           include_raw: bool = False, resume: bool = True,
+                           incremental: bool = False) -> str:
         """Export emails to file for backup
         
         Args:
@@ -203,10 +176,17 @@ def register_management_tools(mcp: FastMCP, draft_service: DraftService, email_s
             export_path: Path where to save the export file  
             max_emails: Maximum number of emails to export (optional, exports all if not specified)
             export_all_folders: Export from all folders instead of just one (default: False)
+            format: Export format: jsonl (streamed, one email per line), jsonl.gz, jsonl.xz, json, eml, tar.gz (EML files per folder), mbox (one file per folder), maildir or sqlite (a queryable archive) (default: jsonl)
+            attachment_blobs: Store each distinct attachment once in a shared, compressed blob directory instead of inline base64 (json/jsonl formats only, default: False)
+            compression_level: Compression level for jsonl.gz/tar.gz (1-9) and jsonl.xz (0-9) (default: 6)
+            include_raw: Store the original message bytes, arrival date and flags in json/jsonl exports so import restores them exactly (default: False)
+            resume: Continue an interrupted json/jsonl export with the same settings from its checkpoint instead of starting over (default: True)
+            incremental: Export only emails added since the last complete export of the same folder(s), plus a file of flag changes (default: False)
         """
         try:
             from ..backends.file_backend import FileBackend
             from ..config import config_manager
+            from ..services.export_service import ExportService
             from ..services.folder_service import FolderService
             
             # Initialize services
@@ -221,76 +201,57 @@ def register_management_tools(mcp: FastMCP, draft_service: DraftService, email_s
                 # Get all selectable folders
                 all_folders = folder_service.get_folders()
                 folders_to_export = [f.name for f in all_folders if f.can_select]
-                print(f"Exporting from all folders: {folders_to_export}")
             else:
                 # Export from single folder
                 target_folder = folder or "INBOX"
                 folders_to_export = [target_folder]
             
-            # Export from all specified folders
-            all_emails = []
-            folder_stats = {}
-            
-            for folder_name in folders_to_export:
-                print(f"Processing folder: {folder_name}")
-                folder_emails = []
-                page = 1
-                page_size = 100  # Process in smaller batches
-                
-                while True:
-                    try:
-                        result = email_service.get_emails(folder_name, page=page, page_size=page_size)
-                        
-                        if not result.emails:
-                            break
-                            
-                        folder_emails.extend(result.emails)
-                        
-                        # Check if we've reached the global maximum
-                        if max_emails and len(all_emails) + len(folder_emails) >= max_emails:
-                            remaining = max_emails - len(all_emails)
-                            folder_emails = folder_emails[:remaining]
-                            break
-                        
-                        # Check if we've got all emails from this folder
-                        if page * page_size >= result.total_results:
-                            break
-                            
-                        page += 1
-                        
-                    except Exception as e:
-                        print(f"Error reading from folder {folder_name}, page {page}: {str(e)}")
-                        break
-                
-                # Add folder emails to total
-                all_emails.extend(folder_emails)
-                folder_stats[folder_name] = len(folder_emails)
-                
-                # Check global limit
-                if max_emails and len(all_emails) >= max_emails:
-                    break
-            
-            if not all_emails:
-                folders_desc = "all folders" if export_all_folders else folders_to_export[0]
-                return f"No emails found to export from {folders_desc}"
-            
-            # Validate export path
             workspace_config = config_manager.workspace_config
             file_backend = FileBackend(
                 email_export_path=workspace_config.email_export_path if workspace_config else None,
                 attachment_download_path=workspace_config.attachment_download_path if workspace_config else None
             )
+            export_service = ExportService(email_service, file_backend)
             
             export_name = "all_folders_export" if export_all_folders else f"{folders_to_export[0]}_export"
-            exported_file = file_backend.export_emails(all_emails, export_name, 'json')
+            result = export_service.export_folders(folders_to_export, export_name, format, max_emails,
+                                                   attachment_blobs=attachment_blobs,
+                                                   compression_level=compression_level,
+                                                   include_raw=include_raw, resume=resume,
+                                                   incremental=incremental)
+            
+            flag_msg = ""
+            if result['flag_changes']:
+                flag_msg = f"Recorded flag changes on {result['flag_changes']} emails in {result['flag_changes_path']}\n"
+            
+            if result['total_emails'] == 0 and not result['errors']:
+                folders_desc = "all folders" if export_all_folders else folders_to_export[0]
+                if result['incremental']:
+                    return (f"No new emails in {folders_desc} since the last export\n" + flag_msg).rstrip()
+                return f"No emails found to export from {folders_desc}"
             
             # Build result message
-            result_msg = f"Successfully exported {len(all_emails)} emails to {exported_file}\n"
+            result_msg = f"Successfully exported {result['total_emails']} emails to {result['path']}\n"
+            if result['incremental']:
+                result_msg += "Incremental export: only emails added since the last export\n"
+            result_msg += flag_msg
+            if result['resumed']:
+                result_msg += "Resumed from the checkpoint of an interrupted export\n"
             
             if export_all_folders:
                 result_msg += "Export breakdown by folder:\n"
-                for folder_name, count in folder_stats.items():
-                    result_msg += f"  - {folder_name}: {count} emails\n"
+                for folder_name, status in result['status'].items():
+                    if status == 'complete':
+                        result_msg += f"  - {folder_name}: {result['folders'][folder_name]} emails\n"
+                    elif status == 'skipped':
+                        result_msg += f"  - {folder_name}: skipped (max_emails reached)\n"
+            
+            if result['errors']:
+                result_msg += "Folders that could not be exported:\n"
+                for folder_name, error in result['errors'].items():
+                    result_msg += f"  - {folder_name}: {error}\n"
+                if result['checkpoint']:
+                    result_msg += f"Progress saved to {result['checkpoint']}; run the same export again to export only what is missing\n"
             
             return result_msg.rstrip()
                 
@@ -298,17 +259,21 @@ def register_management_tools(mcp: FastMCP, draft_service: DraftService, email_s
             return f"Error exporting emails: {str(e)}"
     
     @mcp.tool()
-    async def import_emails(import_path: str, target_folder: str = None, preserve_folders: bool = True) -> str:
+    async def import_emails(import_path: str, target_folder: str = None, preserve_folders: bool = True,
+                            skip_duplicates: bool = False, source_folder: str = None) -> str:
         """Import emails from backup file to IMAP server
         
         Args:
-            import_path: Path to import file (.json or .eml) or a directory
+            import_path: Path to import file (.jsonl, .jsonl.gz, .jsonl.xz, .tar.gz, .mbox, .json, .sqlite or .eml) or a directory (Maildir, .mbox files or .eml files)
             target_folder: Target folder for imported emails (if preserve_folders=False)
             preserve_folders: Whether to preserve original folder structure (default: True)
+            skip_duplicates: Skip emails whose Message-ID is already in the target folder, e.g. when re-running a failed import (default: False)
+            source_folder: Only import emails that were exported from this folder; SQLite archives read just those rows (default: all)
         """
         try:
             from ..backends.file_backend import FileBackend
             from ..config import config_manager
+            from ..services.import_service import ImportService
             
             # Validate import path  
             workspace_config = config_manager.workspace_config
@@ -317,98 +282,20 @@ def register_management_tools(mcp: FastMCP, draft_service: DraftService, email_s
                 attachment_download_path=workspace_config.attachment_download_path if workspace_config else None
             )
             
-            imported_emails = file_backend.import_emails(import_path)
-            
-            if not imported_emails:
-                return f"No emails found in import file {import_path}"
-            
-            # 按email_id从大到小排序，确保导入时保持原始顺序
-            # 因为get_emails返回的是newest first，所以ID越大的邮件越新
-            # 倒序导入可以保持原来的头部（最老）和尾部（最新）顺序
-            try:
-                imported_emails.sort(key=lambda x: int(x.email_id) if x.email_id.isdigit() else 0, reverse=False)
-                print(f"Sorted {len(imported_emails)} emails by ID for proper import order")
-            except Exception as e:
-                print(f"Warning: Could not sort emails by ID: {str(e)}, importing in original order")
-            
             # Import emails to IMAP server
-            success_count = 0
-            failed_count = 0
-            failed_reasons = []
-            folder_stats = {}
-            
-            for email_obj in imported_emails:
-                try:
-                    # Determine target folder
-                    if preserve_folders and email_obj.folder:
-                        import_folder = email_obj.folder
-                    else:
-                        import_folder = target_folder or "INBOX"
-                    
-                    # Ensure target folder exists and is accessible
-                    folder_created = False
-                    try:
-                        email_service.imap_backend.select_folder(import_folder)
-                    except Exception as e:
-                        # If folder doesn't exist, try to create it
-                        if preserve_folders and email_obj.folder and email_obj.folder not in ["INBOX", "SENT", "DRAFTS", "TRASH"]:
-                            try:
-                                from ..services.folder_service import FolderService
-                                folder_service = FolderService(email_service.imap_backend)
-                                
-                                # Create folder and all necessary parent folders
-                                success = folder_service.create_folder(import_folder)
-                                if success:
-                                    folder_created = True
-                                    print(f"Created folder: {import_folder}")
-                                    # Re-select the newly created folder
-                                    email_service.imap_backend.select_folder(import_folder)
-                                else:
-                                    raise Exception("Failed to create folder")
-                                    
-                            except Exception as create_error:
-                                # If can't create custom folder, fall back to INBOX
-                                print(f"Warning: Cannot create folder '{import_folder}': {str(create_error)}")
-                                print(f"Importing email {email_obj.email_id} to INBOX instead")
-                                import_folder = "INBOX"
-                                email_service.imap_backend.select_folder(import_folder)
-                        else:
-                            # For system folders or when preserve_folders=False, fail if can't access
-                            failed_count += 1
-                            failed_reasons.append(f"Email {email_obj.email_id}: Cannot access folder '{import_folder}': {str(e)}")
-                            continue
-                    
-                    # Convert EmailMessage back to raw email format if needed
-                    if email_obj.raw_message:
-                        # Use existing raw message
-                        message_string = email_obj.raw_message.as_string()
-                    else:
-                        # Reconstruct email from EmailMessage data
-                        message_string = _reconstruct_email_message(email_obj)
-                    
-                    # Import to IMAP server using APPEND command
-                    success = email_service.imap_backend.append_message(
-                        import_folder, 
-                        message_string,
-                        flags='\\Seen' if email_obj.is_read else ''
-                    )
-                    
-                    if success:
-                        success_count += 1
-                        # Track folder statistics
-                        if import_folder not in folder_stats:
-                            folder_stats[import_folder] = 0
-                        folder_stats[import_folder] += 1
-                    else:
-                        failed_count += 1
-                        failed_reasons.append(f"Email {email_obj.email_id}: APPEND to '{import_folder}' failed")
-                        
-                except Exception as e:
-                    failed_count += 1
-                    failed_reasons.append(f"Email {email_obj.email_id}: {str(e)}")
+            result = ImportService(email_service).import_file(file_backend, import_path, target_folder,
+                                                              preserve_folders, skip_duplicates, source_folder)
+            success_count = result['imported']
+            failed_count = result['failed']
+            failed_reasons = result['failures']
+            folder_stats = result['folders']
+            
+            total_count = success_count + failed_count + result['skipped']
+            if total_count == 0:
+                return f"No emails found in import file {import_path}"
             
             # Build result message
-            result_msg = f"Successfully imported {success_count}/{len(imported_emails)} emails"
+            result_msg = f"Successfully imported {success_count}/{total_count} emails"
             
             if preserve_folders and len(folder_stats) > 1:
                 result_msg += "\n\nImport breakdown by folder:"
@@ -418,6 +305,14 @@ def register_management_tools(mcp: FastMCP, draft_service: DraftService, email_s
                 folder_name = list(folder_stats.keys())[0]
                 result_msg += f" to {folder_name}"
             
+            if result['skipped']:
+                result_msg += f"\n\nSkipped {result['skipped']} emails already present in their target folder"
+            
+            if result['created']:
+                result_msg += f"\n\nCreated folders: {', '.join(result['created'])}"
+            for folder, reason in result['redirected'].items():
+                result_msg += f"\nCould not create folder '{folder}', imported its emails to INBOX: {reason}"
+            
             if failed_count > 0:
                 result_msg += f"\n\n{failed_count} emails failed to import:"
                 for reason in failed_reasons[:5]:  # Show first 5 failures
@@ -0,0 +1,48 @@
+from typing import Any, Dict
+from mcp.server.fastmcp import FastMCP
+from ..services.search_service import SearchService
+
+
+def register_search_tools(mcp: FastMCP, search_service: SearchService):
+    """Register search-related MCP tools"""
+
+    @mcp.tool()
+    async def advanced_search(query: Dict[str, Any], folder: str = "INBOX",
+                              page: int = 1, page_size: int = 20) -> str:
+        """Search emails with a structured query compiled into a single IMAP SEARCH (sorted by date descending)
+
+        Args:
+            query: Conditions combined with AND. Fields: from, to, cc, bcc, subject, body, text,
+                since, before, on (YYYY-MM-DD), flags (e.g. ["unseen", "!flagged"]),
+                larger, smaller (bytes), has_attachment (bool), header ({name: value}).
+                Combinators: "and"/"or" (list of sub-queries), "not" (sub-query).
+                Example: {"from": "alice", "or": [{"subject": "invoice"}, {"has_attachment": true}]}
+            folder: Folder to search in (default: INBOX)
+            page: Page number starting from 1 (default: 1)
+            page_size: Number of results per page (default: 20)
+        """
+        try:
+            result = search_service.search(query, folder, page, page_size)
+
+            if not result.emails:
+                return f"No emails found matching query: {query}"
+
+            output = f"Search query: {query}\n"
+            output += f"Folder: {result.folder}\n"
+            output += f"Page: {result.current_page}/{result.total_pages}\n"
+            output += f"Total results: {result.total_results}\n\n"
+
+            for i, email in enumerate(result.emails, 1):
+                output += f"{(result.current_page-1)*result.page_size + i}. "
+                output += f"ID: {email.email_id}\n"
+                output += f"   Subject: {email.subject}\n"
+                output += f"   From: {email.from_addr}\n"
+                output += f"   Date: {email.date}\n"
+                if email.attachments:
+                    output += f"   Attachments: {len(email.attachments)} files\n"
+                output += "\n"
+
+            return output
+
+        except Exception as e:
+            return f"Error searching emails: {str(e)}"
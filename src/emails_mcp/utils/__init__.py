@@ -1,6 +1,7 @@
 from .exceptions import *
 from .validators import *
 from .email_parser import *
+from .search_query import *
 
 __all__ = [
     # Exceptions
@@ -29,5 +30,11 @@ __all__ = [
     'extract_attachments_info',
     'extract_email_body',
     'parse_raw_email',
-    'format_email_summary'
+    'parse_email_message',
+    'format_email_summary',
+
+    # Search query
+    'compile_search_query',
+    'format_imap_date',
+    'SearchQuery'
 ]
\ No newline at end of file
@@ -237,7 +237,16 @@ def parse_raw_email(raw_email: bytes, email_id: str) -> EmailMessage:
     """Parse raw email bytes into EmailMessage object with improved Chinese support"""
     try:
         msg = email.message_from_bytes(raw_email)
-        
+    except Exception as e:
+        logging.error(f"Failed to parse email {email_id}: {str(e)}")
+        raise ValidationError(f"Failed to parse email: {str(e)}")
+    
+    return parse_email_message(msg, email_id)
+
+
+def parse_email_message(msg: email.message.Message, email_id: str) -> EmailMessage:
+    """Build an EmailMessage from an already parsed message (e.g. from a mailbox)"""
+    try:
         # Extract headers with proper Chinese decoding
         subject = decode_email_header(msg.get('Subject', ''))
         
@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Worker processes used for CPU-bound parsing by default
+DEFAULT_PROCESSES = min(4, os.cpu_count() or 1)
+
+
+def _pool_context():
+    """Start worker processes without forking this (threaded) process where possible"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _map_chunk(func: Callable[[T], R], chunk: List[T]) -> List[R]:
+    return [func(item) for item in chunk]
+
+
+def ordered_parallel_map(func: Callable[[T], R], items: Iterable[T], processes: int = DEFAULT_PROCESSES,
+                         chunk_size: int = 16) -> Iterator[R]:
+    """Map ``func`` over ``items`` in worker processes, yielding results in input order
+
+    Items are sent in chunks with at most two chunks per process in flight,
+    so a long or streamed input is consumed lazily and memory stays bounded.
+    ``func`` and the items must be picklable; with one process everything
+    runs here instead.
+    """
+    if processes <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    iterator = iter(items)
+    executor = ProcessPoolExecutor(max_workers=processes, mp_context=_pool_context())
+    pending = deque()
+
+    def submit_next() -> bool:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return False
+        pending.append(executor.submit(_map_chunk, func, chunk))
+        return True
+
+    try:
+        for _ in range(processes * 2):
+            if not submit_next():
+                break
+        while pending:
+            results = pending.popleft().result()
+            submit_next()
+            yield from results
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,316 @@
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .exceptions import ValidationError
+
+
+# Flag names accepted in structured queries mapped to IMAP SEARCH keys
+FLAG_SEARCH_KEYS = {
+    'seen': 'SEEN',
+    'read': 'SEEN',
+    'unseen': 'UNSEEN',
+    'unread': 'UNSEEN',
+    'flagged': 'FLAGGED',
+    'important': 'FLAGGED',
+    'unflagged': 'UNFLAGGED',
+    'not_important': 'UNFLAGGED',
+    'answered': 'ANSWERED',
+    'unanswered': 'UNANSWERED',
+    'deleted': 'DELETED',
+    'undeleted': 'UNDELETED',
+    'draft': 'DRAFT',
+    'undraft': 'UNDRAFT',
+    'recent': 'RECENT',
+    'new': 'NEW',
+    'old': 'OLD',
+}
+
+# Search keys whose result changes when flags change (not only on new/expunged mail)
+_FLAG_DEPENDENT_KEYS = {key.encode('ascii') for key in FLAG_SEARCH_KEYS.values()} | {b'KEYWORD', b'UNKEYWORD'}
+
+# Text fields accepted in structured queries mapped to IMAP SEARCH keys
+TEXT_SEARCH_KEYS = {
+    'from': 'FROM',
+    'to': 'TO',
+    'cc': 'CC',
+    'bcc': 'BCC',
+    'subject': 'SUBJECT',
+    'body': 'BODY',
+    'text': 'TEXT',
+}
+
+# Date fields accepted in structured queries mapped to IMAP SEARCH keys
+DATE_SEARCH_KEYS = {
+    'since': 'SINCE',
+    'before': 'BEFORE',
+    'on': 'ON',
+    'sent_since': 'SENTSINCE',
+    'sent_before': 'SENTBEFORE',
+    'sent_on': 'SENTON',
+}
+
+_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def format_imap_date(value: Union[str, date, datetime]) -> str:
+    """Convert YYYY-MM-DD (or a date object) to IMAP date format DD-Mon-YYYY"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            # Accept dates already in IMAP format
+            try:
+                datetime.strptime(value, '%d-%b-%Y')
+                return value
+            except ValueError:
+                raise ValidationError(f"Invalid date '{value}', expected YYYY-MM-DD")
+    # Month names must be English regardless of locale, so avoid strftime('%b')
+    return f"{value.day}-{_MONTHS[value.month - 1]}-{value.year}"
+
+
+def quote_search_string(value: str) -> bytes:
+    """Quote a search string as an IMAP quoted string (UTF-8 encoded)"""
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+    return b'"' + escaped.encode('utf-8') + b'"'
+
+
+# Ways of sending a search containing non-ASCII text, in order of preference
+SEARCH_MODE_UTF8 = 'utf8'           # UTF8=ACCEPT enabled, quoted UTF-8, no CHARSET
+SEARCH_MODE_CHARSET = 'charset'     # CHARSET UTF-8 with quoted UTF-8 strings
+SEARCH_MODE_LITERAL = 'literal'     # CHARSET UTF-8 with UTF-8 sent as literals
+SEARCH_MODES = [SEARCH_MODE_UTF8, SEARCH_MODE_CHARSET, SEARCH_MODE_LITERAL]
+
+
+class SearchText(str):
+    """A string argument of a search key, rendered as quoted string or literal"""
+
+
+class SearchQuery:
+    """Compiled IMAP SEARCH expression
+
+    The expression is kept as a token list (bytes for syntax, SearchText for
+    string arguments) so the same query can be rendered in whichever form the
+    server accepts. ``criteria`` is the quoted-string rendering;
+    ``needs_charset`` tells whether it contains non-ASCII text and therefore
+    needs UTF-8 support, a CHARSET argument or literals. ``depends_on_flags``
+    tells whether the result can change through flag updates alone.
+    """
+
+    def __init__(self, tokens: List[Union[bytes, SearchText]]):
+        self.tokens = tokens
+        self.needs_charset = any(
+            isinstance(token, SearchText) and not token.isascii() for token in tokens
+        )
+        self.depends_on_flags = any(
+            isinstance(token, bytes) and token in _FLAG_DEPENDENT_KEYS for token in tokens
+        )
+
+    @property
+    def criteria(self) -> bytes:
+        return self.render()[0]
+
+    def render(self, mode: str = SEARCH_MODE_CHARSET,
+               literal_plus: bool = False) -> Tuple[bytes, Optional[bytes]]:
+        """Render as (criteria, literal) for IMAP4.search in the given mode
+
+        In literal mode, non-ASCII strings are sent as literals: inline
+        non-synchronizing literals when the server has LITERAL+, otherwise a
+        single synchronizing literal which must be the last token (returned
+        separately, for IMAP4.literal). Raises ValueError when the query cannot
+        be expressed in the requested mode.
+        """
+        literal = None
+        parts: List[bytes] = []
+
+        for index, token in enumerate(self.tokens):
+            if isinstance(token, SearchText):
+                if mode == SEARCH_MODE_LITERAL and not token.isascii():
+                    data = token.encode('utf-8')
+                    if literal_plus:
+                        piece = b'{%d+}\r\n' % len(data) + data
+                    elif literal is None and index == len(self.tokens) - 1:
+                        # imaplib appends the literal after the command text
+                        literal = data
+                        continue
+                    else:
+                        raise ValueError("Query needs LITERAL+ to send several literals")
+                else:
+                    piece = quote_search_string(token)
+            else:
+                piece = token
+
+            # No space after "(" or before ")"
+            if parts and parts[-1] != b'(' and piece != b')':
+                parts.append(b' ')
+            parts.append(piece)
+
+        return b''.join(parts), literal
+
+    def ascii_fallback(self) -> Optional['SearchQuery']:
+        """Return a copy with non-ASCII characters dropped, or None if nothing is left"""
+        tokens = []
+        for token in self.tokens:
+            if isinstance(token, SearchText) and not token.isascii():
+                stripped = token.encode('ascii', errors='ignore').decode('ascii')
+                if not stripped.strip():
+                    return None
+                token = SearchText(stripped)
+            tokens.append(token)
+        return SearchQuery(tokens)
+
+    def __repr__(self) -> str:
+        return f"SearchQuery({self.criteria!r})"
+
+
+def _text(key: str, value: Any) -> List[Union[bytes, SearchText]]:
+    """Search key followed by a string argument"""
+    return [key.encode('ascii'), SearchText(str(value))]
+
+
+def _compile_flags(flags: Any) -> List[List[Union[bytes, SearchText]]]:
+    """Compile a flag name or list of flag names into search keys"""
+    if isinstance(flags, str):
+        flags = [f.strip() for f in flags.split(',') if f.strip()]
+
+    keys = []
+    for flag in flags:
+        name = str(flag).strip().lower()
+        if name in FLAG_SEARCH_KEYS:
+            keys.append([FLAG_SEARCH_KEYS[name].encode('ascii')])
+        elif name.startswith('!'):
+            # "!seen" negates the flag
+            if name[1:] not in FLAG_SEARCH_KEYS:
+                raise ValidationError(f"Unknown flag in search query: {flag}")
+            keys.append([b'NOT', FLAG_SEARCH_KEYS[name[1:]].encode('ascii')])
+        else:
+            # Treat anything else as a keyword flag
+            keyword = str(flag).strip()
+            if not keyword.isascii() or not keyword or any(c in keyword for c in ' ()"\\{%*]'):
+                raise ValidationError(f"Invalid keyword flag in search query: {flag}")
+            keys.append([b'KEYWORD', keyword.encode('ascii')])
+    return keys
+
+
+def _compile_size(key: str, value: Any) -> List[bytes]:
+    """Compile larger/smaller size criteria (value in bytes)"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid size for '{key}': {value}")
+    if size < 0:
+        raise ValidationError(f"Invalid size for '{key}': {value}")
+    return [key.upper().encode('ascii'), str(size).encode('ascii')]
+
+
+def _combine_and(parts: List[List[Union[bytes, SearchText]]]) -> List[Union[bytes, SearchText]]:
+    """Combine search keys with AND (IMAP default conjunction)"""
+    if not parts:
+        return [b'ALL']
+    if len(parts) == 1:
+        return parts[0]
+    tokens: List[Union[bytes, SearchText]] = [b'(']
+    for part in parts:
+        tokens.extend(part)
+    tokens.append(b')')
+    return tokens
+
+
+def _combine_or(parts: List[List[Union[bytes, SearchText]]]) -> List[Union[bytes, SearchText]]:
+    """Combine search keys with OR (IMAP OR is binary, so fold from the right)"""
+    if not parts:
+        raise ValidationError("'or' requires at least one condition")
+    result = parts[-1]
+    for part in reversed(parts[:-1]):
+        result = [b'OR'] + part + result
+    return result
+
+
+def _compile_node(node: Any) -> List[Union[bytes, SearchText]]:
+    """Compile one query node (dict of conditions, or list meaning AND)"""
+    if isinstance(node, list):
+        return _combine_and([_compile_node(item) for item in node])
+
+    if not isinstance(node, dict):
+        raise ValidationError(f"Invalid search condition: {node!r}")
+
+    parts = []
+    for key, value in node.items():
+        key_lower = key.lower()
+
+        if value is None:
+            continue
+
+        if key_lower == 'and':
+            items = value if isinstance(value, list) else [value]
+            parts.append(_combine_and([_compile_node(item) for item in items]))
+        elif key_lower == 'or':
+            items = value if isinstance(value, list) else [value]
+            parts.append(_combine_or([_compile_node(item) for item in items]))
+        elif key_lower == 'not':
+            parts.append([b'NOT'] + _compile_node(value))
+        elif key_lower in TEXT_SEARCH_KEYS:
+            values = value if isinstance(value, list) else [value]
+            for text in values:
+                parts.append(_text(TEXT_SEARCH_KEYS[key_lower], text))
+        elif key_lower in DATE_SEARCH_KEYS:
+            parts.append([DATE_SEARCH_KEYS[key_lower].encode('ascii'),
+                          format_imap_date(value).encode('ascii')])
+        elif key_lower in ('flags', 'flag'):
+            parts.extend(_compile_flags(value))
+        elif key_lower in ('larger', 'smaller'):
+            parts.append(_compile_size(key_lower, value))
+        elif key_lower == 'has_attachment':
+            # IMAP has no attachment criterion; multipart/mixed is the usual approximation
+            attachment_key = [b'HEADER', SearchText('Content-Type'), SearchText('multipart/mixed')]
+            parts.append(attachment_key if value else [b'NOT'] + attachment_key)
+        elif key_lower == 'header':
+            if not isinstance(value, dict):
+                raise ValidationError("'header' expects an object of header name to value")
+            for header_name, header_value in value.items():
+                parts.append([b'HEADER', SearchText(str(header_name)), SearchText(str(header_value))])
+        else:
+            raise ValidationError(f"Unknown search field: {key}")
+
+    return _combine_and(parts)
+
+
+def compile_search_query(query: Union[Dict[str, Any], List[Any]]) -> SearchQuery:
+    """Compile a structured query into a single IMAP SEARCH expression
+
+    A query is a dict of conditions which are ANDed together. Supported keys:
+    from, to, cc, bcc, subject, body, text, since, before, on, sent_since,
+    sent_before, sent_on (YYYY-MM-DD), flags (e.g. ["unseen", "!flagged"]),
+    larger, smaller (bytes), has_attachment, header ({name: value}), and the
+    combinators and/or (list of sub-queries) and not (sub-query).
+
+    Example: {"from": "alice", "or": [{"subject": "invoice"}, {"has_attachment": true}],
+              "not": {"flags": "seen"}}
+    """
+    if not query:
+        raise ValidationError("Search query cannot be empty")
+
+    tokens = _compile_node(query)
+
+    # A top-level parenthesized list is redundant; SEARCH ANDs its keys already
+    if tokens[0] == b'(' and _closing_paren_index(tokens) == len(tokens) - 1:
+        tokens = tokens[1:-1]
+
+    return SearchQuery(tokens)
+
+
+def _closing_paren_index(tokens: List[Union[bytes, SearchText]]) -> int:
+    """Index of the parenthesis closing the group opened by tokens[0]"""
+    depth = 0
+    for index, token in enumerate(tokens):
+        if isinstance(token, SearchText):
+            continue
+        if token == b'(':
+            depth += 1
+        elif token == b')':
+            depth -= 1
+            if depth == 0:
+                return index
+    return -1
@@ -96,8 +96,9 @@ def validate_page_params(page: int, page_size: int, max_page_size: int = 50) ->
     return page, page_size, warning
 
 
-def validate_file_path(file_path: str, must_exist: bool = True) -> tuple[bool, str]:
-    """Validate file path"""
+def validate_file_path(file_path: str, must_exist: bool = True,
+                       allow_directory: bool = False) -> tuple[bool, str]:
+    """Validate file path (or directory path, with allow_directory)"""
     if not file_path:
         return False, "File path cannot be empty"
     
@@ -107,7 +108,7 @@ def validate_file_path(file_path: str, must_exist: bool = True) -> tuple[bool, s
         if must_exist and not path.exists():
             return False, f"File does not exist: {file_path}"
         
-        if must_exist and not path.is_file():
+        if must_exist and not path.is_file() and not (allow_directory and path.is_dir()):
             return False, f"Path is not a file: {file_path}"
         
         return True, ""